@@ -0,0 +1,222 @@
+"""
+A cache of searched positions, shared by every game of the web server.
+
+Many web games reach the same early positions (most of them open in the
+centre), and every time the engine searched them again. ``AnalysisCache``
+remembers the best move and score of every completed search, keyed by the
+position, the side to move and the search parameters (algorithm, depth and
+threat search). Only searches that ran to their end are stored, so the
+time limit does not need to be part of the key.
+
+Keys are normalised over the 8 symmetries of the board (rotations and
+reflections): a position and its mirror image share one entry, whose move
+is stored for the canonical orientation and mapped back on a hit. A key is
+the 16-byte BLAKE2 digest of the canonical position and the parameters.
+
+The cache keeps ``max_entries`` in memory, evicting the least recently used
+ones. Given a ``path``, it is also kept in an SQLite file (trimmed back to
+``max_disk_entries`` every ``TRIM_INTERVAL`` stores), so it survives
+restarts and can be shared by several server processes. Hits, misses and
+stores are counted per board size.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Stores between two trims of the SQLite file
+TRIM_INTERVAL = 1000
+
+# Algorithms whose completed searches are deterministic enough to cache
+CACHEABLE = ('negamax', 'pvs', 'sss')
+
+# The symmetries of the board, as (row, col) -> (row, col) maps for a board of size n
+SYMMETRIES = (
+    lambda row, col, n: (row, col),
+    lambda row, col, n: (col, n - 1 - row),
+    lambda row, col, n: (n - 1 - row, n - 1 - col),
+    lambda row, col, n: (n - 1 - col, row),
+    lambda row, col, n: (row, n - 1 - col),
+    lambda row, col, n: (n - 1 - row, col),
+    lambda row, col, n: (col, row),
+    lambda row, col, n: (n - 1 - col, n - 1 - row),
+)
+
+# Cell permutations and their inverses of every symmetry, keyed by board size
+_PERMUTATIONS = {}
+
+
+def symmetry_tables(board_size):
+    """Return ``(forward, inverse)``: per symmetry, the cell each cell maps to and back."""
+    tables = _PERMUTATIONS.get(board_size)
+    if tables is None:
+        n = board_size
+        forward, inverse = [], []
+        for symmetry in SYMMETRIES:
+            cells = [0] * (n * n)
+            back = [0] * (n * n)
+            for cell in range(n * n):
+                row, col = symmetry(*divmod(cell, n), n)
+                cells[cell] = row * n + col
+                back[row * n + col] = cell
+            forward.append(tuple(cells))
+            inverse.append(tuple(back))
+        tables = _PERMUTATIONS[board_size] = (tuple(forward), tuple(inverse))
+    return tables
+
+
+def canonical_position(position):
+    """Normalise a position over the board's symmetries.
+
+    Args:
+        position: The position (see ``parallel_search.encode_position``).
+
+    Returns:
+        tuple: ``(stones, symmetry)``: the smallest sorted (cell, player)
+        tuple over all symmetries, and the index of a symmetry giving it.
+    """
+    board_size, stones, _ = position
+    forward, _ = symmetry_tables(board_size)
+    best, best_symmetry = None, 0
+    for index, cells in enumerate(forward):
+        transformed = tuple(sorted((cells[cell], player) for cell, player in stones))
+        if best is None or transformed < best:
+            best, best_symmetry = transformed, index
+    return best, best_symmetry
+
+
+class AnalysisCache:
+    """Completed search results by symmetry-normalised position, with LRU eviction."""
+
+    def __init__(self, max_entries=100000, path=None, max_disk_entries=1000000):
+        """Initialize the cache.
+
+        Args:
+            max_entries: The number of results kept in memory.
+            path: An SQLite file to keep the results in as well (None: memory only).
+            max_disk_entries: The number of results kept in the file.
+        """
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.path = path
+        self.entries = OrderedDict()  # key -> (canonical move cell, score, depth), least recently used first
+        self.counts = {}  # board size -> {'hits': ..., 'misses': ..., 'stores': ...}
+        self.lock = threading.Lock()
+        self.stores = 0  # Stores since the file was last trimmed
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS analysis (key BLOB PRIMARY KEY, board_size INTEGER, "
+                            "move INTEGER, score REAL, depth INTEGER, last_used REAL)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS analysis_last_used ON analysis (last_used)")
+            self.db.commit()
+
+    def key(self, position, algorithm, depth, threat_search):
+        """Return ``(key, symmetry)`` for a position and search parameters."""
+        board_size, _, current_player = position
+        stones, symmetry = canonical_position(position)
+        text = repr((board_size, current_player, algorithm, depth, bool(threat_search), stones))
+        return hashlib.blake2b(text.encode(), digest_size=16).digest(), symmetry
+
+    def _count(self, board_size, name):
+        """Count a hit, miss or store (called with the lock held)."""
+        counts = self.counts.setdefault(board_size, {'hits': 0, 'misses': 0, 'stores': 0})
+        counts[name] += 1
+
+    def get(self, position, algorithm, depth, threat_search=True):
+        """Look a search up.
+
+        Args:
+            position: The position (see ``parallel_search.encode_position``).
+            algorithm: The search algorithm.
+            depth: The search depth.
+            threat_search: Whether the search looked for threats first.
+
+        Returns:
+            dict: The ``move`` (in the position's orientation), ``score`` and
+            ``depth`` of the cached search, or None.
+        """
+        board_size = position[0]
+        if algorithm not in CACHEABLE:
+            return None
+        key, symmetry = self.key(position, algorithm, depth, threat_search)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            elif self.db is not None:
+                row = self.db.execute("SELECT move, score, depth FROM analysis WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    entry = tuple(row)
+                    self.db.execute("UPDATE analysis SET last_used = ? WHERE key = ?", (time.time(), key))
+                    self.db.commit()
+                    self._remember(key, entry)
+            self._count(board_size, 'hits' if entry is not None else 'misses')
+        if entry is None:
+            return None
+        cell, score, searched_depth = entry
+        _, inverse = symmetry_tables(board_size)
+        return {'move': divmod(inverse[symmetry][cell], board_size), 'score': score, 'depth': searched_depth}
+
+    def put(self, position, algorithm, depth, threat_search, move, score, searched_depth):
+        """Store a completed search.
+
+        Args:
+            position: The position (see ``parallel_search.encode_position``).
+            algorithm: The search algorithm.
+            depth: The search depth asked for.
+            threat_search: Whether the search looked for threats first.
+            move: The best move found.
+            score: Its score (None for a forced win found by the threat search).
+            searched_depth: The depth actually completed (a forced result ends
+                the search early; 0 for the threat search).
+        """
+        board_size = position[0]
+        if algorithm not in CACHEABLE:
+            return
+        key, symmetry = self.key(position, algorithm, depth, threat_search)
+        forward, _ = symmetry_tables(board_size)
+        entry = (forward[symmetry][move[0] * board_size + move[1]], score, searched_depth)
+        with self.lock:
+            self._remember(key, entry)
+            self._count(board_size, 'stores')
+            if self.db is not None:
+                self.db.execute("INSERT OR REPLACE INTO analysis VALUES (?, ?, ?, ?, ?, ?)",
+                                (key, board_size) + entry + (time.time(),))
+                self.stores += 1
+                if self.stores >= TRIM_INTERVAL:
+                    self.stores = 0
+                    # Drop the least recently used results beyond the file's budget
+                    self.db.execute("DELETE FROM analysis WHERE key IN (SELECT key FROM analysis "
+                                    "ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (self.max_disk_entries,))
+                self.db.commit()
+
+    def _remember(self, key, entry):
+        """Keep an entry in memory as the most recently used (called with the lock held)."""
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries)
+
+    def close(self):
+        """Close the SQLite file."""
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+
+    def stats(self):
+        """Return the number of cached results and the hit rate per board size."""
+        with self.lock:
+            boards = {}
+            for board_size, counts in sorted(self.counts.items()):
+                lookups = counts['hits'] + counts['misses']
+                boards[str(board_size)] = dict(counts, hitRate=counts['hits'] / lookups if lookups else 0.0)
+            return {'entries': len(self.entries), 'maxEntries': self.max_entries, 'path': self.path,
+                    'boardSizes': boards}
@@ -1,17 +1,156 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory, g
 from flask_cors import CORS
+import json
 import os
 import sys
+import threading
+import time
+import weakref
+from concurrent.futures import CancelledError
 
 # Import the game module - use explicit import with full path
 import gomoku
-from gomoku import Gomoku
+from gomoku import Gomoku, Human_Player
+from move_jobs import MoveJobQueue, QueueFullError, LatencyStats
+from game_store import GameStore
+from engine_pool import EnginePool
+from analysis_cache import AnalysisCache
 
 app = Flask(__name__, static_folder='static')
 CORS(app)
 
-# Store active games
-games = {}
+# Completed searches are shared by all games: ANALYSIS_CACHE_ENTRIES kept in
+# memory, and in the ANALYSIS_CACHE_DB SQLite file (if set) across restarts
+analysis_cache = AnalysisCache(max_entries=int(os.environ.get('ANALYSIS_CACHE_ENTRIES', 100000)),
+                               path=os.environ.get('ANALYSIS_CACHE_DB'))
+
+# AI moves are searched by AI_WORKERS engine processes (default: one per core)
+# shared by all games, each with an AI_TT_MB transposition table. The workers
+# start with the first AI move, not at import, so the debug reloader's
+# watcher process never starts a pool of its own
+pool = EnginePool(workers=int(os.environ.get('AI_WORKERS', 0)) or None,
+                  tt_size_mb=int(os.environ.get('AI_TT_MB', 64)), cache=analysis_cache)
+
+# At most AI_MAX_PENDING AI moves are queued or running; their job threads only
+# wait for the pool, so every pending move gets one
+max_pending = int(os.environ.get('AI_MAX_PENDING', 32))
+jobs = MoveJobQueue(max_workers=max_pending, max_pending=max_pending)
+
+# Store active games: at most MAX_GAMES, evicted after GAME_TTL idle seconds, and
+# together reserving at most MAX_TT_MB of transposition tables (web games hold
+# none: their AI's tables are the pool's)
+games = GameStore(max_games=int(os.environ.get('MAX_GAMES', 1000)),
+                  ttl=float(os.environ.get('GAME_TTL', 3600)),
+                  max_tt_mb=float(os.environ.get('MAX_TT_MB', 1024)),
+                  on_evict=lambda game_id, game, reason: jobs.cancel_game(game_id))
+
+# One lock per game: a move request holds it from its checks until its AI move
+# is queued, and the AI move job holds it while it changes the board
+game_locks = weakref.WeakKeyDictionary()
+game_locks_lock = threading.Lock()
+
+# When set, /api/admin/* requires this token in the X-Admin-Token header
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# Response times of each endpoint
+endpoint_latencies = {}
+
+@app.before_request
+def start_timer():
+    g.start_time = time.time()
+
+@app.after_request
+def record_latency(response):
+    if request.endpoint is not None and 'start_time' in g:
+        stats = endpoint_latencies.setdefault(request.endpoint, LatencyStats())
+        stats.record(time.time() - g.start_time)
+    return response
+
+def game_state(game):
+    """Return the board, whether the game is over and the winner (if any)."""
+    game_over = game.is_over()
+    # Determine the winner (if any)
+    winner = None
+    if game_over and game.lose():  # If the game is over and the current player lost
+        winner = 3 - game.current_player  # The winner is the other player
+    return {
+        'board': [[cell for cell in row] for row in game.board],  # Board is a 2D array of integers
+        'gameOver': game_over,
+        'winner': winner
+    }
+
+def create_game(board_size, difficulty):
+    """Create a web game; its AI moves are searched by the pool, so it holds no engine."""
+    return Gomoku(board_size=board_size, difficulty=difficulty, players=[Human_Player(), Human_Player()])
+
+def game_lock(game):
+    """Return the lock that serialises the changes to a game (moves and AI moves)."""
+    with game_locks_lock:
+        lock = game_locks.get(game)
+        if lock is None:
+            lock = game_locks[game] = threading.Lock()
+        return lock
+
+def ai_move_work(game, human_move):
+    """Return the job function that searches and plays the AI's move (player 2 is to move).
+
+    If the search fails or is cancelled, the human move is taken back, so that
+    player 1 is to move again on the board they had. The board is only changed
+    with the game's lock held.
+    """
+    lock = game_lock(game)
+    def work(job):
+        try:
+            with lock:
+                task = pool.submit(game, algorithm=game.ai_algorithm, depth=game.difficulty, timeout=10,
+                                   progress=job.publish)
+            # Accepting a queued move still needs a move: only a cancelled job cancels its task
+            job.stop = lambda: pool.stop(task, cancel=job.cancelled.is_set())
+            if job.cancelled.is_set():
+                # Cancelled before the job could stop the search
+                pool.stop(task)
+            try:
+                search = task.result()
+            except CancelledError:
+                if job.cancelled.is_set():
+                    raise
+                search = None
+            with lock:
+                if search is None:
+                    # Never searched: play the first candidate, as a search stopped at once would
+                    search = {'move': game.candidate_moves()[0], 'depth': 0, 'score': None, 'nodes': 0,
+                              'worker': None, 'cached': False, 'started': time.time(), 'elapsed': 0.0}
+                if job.cancelled.is_set():
+                    game.unmake_move(human_move)
+                    return None
+                ai_row, ai_col = ai_move = search['move']
+                # Make the AI move
+                game.make_move(ai_move)
+        except Exception:
+            with lock:
+                game.unmake_move(human_move)
+            raise
+        with lock:
+            result = game_state(game)
+            # Switch back to player 1 for the next move
+            game.current_player = 1
+        result['aiMove'] = {'row': ai_row, 'col': ai_col}
+        result['search'] = {
+            'depth': search['depth'],
+            'nodes': search['nodes'],
+            'worker': search['worker'],
+            'cached': search['cached'],
+            'queueWait': search['started'] - task.submitted,
+            'elapsed': search['elapsed']
+        }
+        return result
+    return work
+
+def job_response(job):
+    """Return a job's state, with the fields of a synchronous move once it is done."""
+    response = job.to_dict()
+    response.update(response.pop('result', None) or {})
+    return response
 
 @app.route('/')
 def index():
@@ -27,8 +166,7 @@ def new_game():
     board_size = data.get('boardSize', 15)
     difficulty = data.get('difficulty', 3)
     
-    game_id = str(len(games) + 1)
-    games[game_id] = Gomoku(board_size=board_size, difficulty=difficulty)
+    game_id = games.add(create_game(board_size, difficulty))
     
     return jsonify({
         'gameId': game_id,
@@ -43,59 +181,111 @@ def make_move():
     row = data.get('row')
     col = data.get('col')
     
-    if game_id not in games:
+    game = games.get(game_id)
+    if game is None:
         return jsonify({'error': 'Game not found'}), 404
     
-    game = games[game_id]
-    
-    # Make the player's move
-    try:
-        # In gomoku.py, make_move expects a tuple (row, col)
-        game.make_move((row, col))
-        
-        # Check if the game is over after the player's move
-        game_over = game.is_over()
-        # Determine the winner (if any)
-        winner = None
-        if game_over and game.lose():  # If the game is over and the current player lost
-            winner = 3 - game.current_player  # The winner is the other player
+    against_ai = data.get('opponent') == 'ai'
+    with game_lock(game):
+        # No move, against the AI or not, while the AI's move is being searched
+        if jobs.active(game_id) is not None:
+            return jsonify({'valid': False, 'message': 'The AI is still thinking'}), 409
+        if against_ai and jobs.is_full():
+            return jsonify({'valid': False, 'message': 'The server is busy, try again shortly'}), 503
         
-        response = {
-            'valid': True,
-            'board': [[cell for cell in row] for row in game.board],  # Board is a 2D array of integers
-            'gameOver': game_over,
-            'winner': winner,
-            'message': 'Move successful'
-        }
-        
-        # If playing against AI and the game is not over, make AI move
-        if data.get('opponent') == 'ai' and not game_over:
-            # Switch to AI player (player 2)
-            game.current_player = 2
-            # Get AI move using the AI player's ask_move method
-            ai_move = game.players[1].ask_move(game)
-            ai_row, ai_col = ai_move
-            # Make the AI move
-            game.make_move(ai_move)
+        # Make the player's move
+        try:
+            # In gomoku.py, make_move expects a tuple (row, col)
+            game.make_move((row, col))
             
-            # Check if the game is over after the AI's move
-            game_over = game.is_over()
-            # Determine the winner (if any)
-            winner = None
-            if game_over and game.lose():  # If the game is over and the current player lost
-                winner = 3 - game.current_player  # The winner is the other player
+            # Check if the game is over after the player's move
+            response = game_state(game)
+            response['valid'] = True
+            response['message'] = 'Move successful'
             
-            response['aiMove'] = {'row': ai_row, 'col': ai_col}
-            response['board'] = [[cell for cell in row] for row in game.board]
-            response['gameOver'] = game_over
-            response['winner'] = winner
+            # If playing against AI and the game is not over, queue the AI move;
+            # the client polls /api/move_job/<jobId> for it
+            if against_ai and not response['gameOver']:
+                # Switch to AI player (player 2)
+                game.current_player = 2
+                try:
+                    job = jobs.submit(game_id, ai_move_work(game, (row, col)))
+                except QueueFullError:
+                    game.unmake_move((row, col))  # Player 1 is to move again
+                    return jsonify({'valid': False, 'message': 'The server is busy, try again shortly'}), 503
+                response['jobId'] = job.id
             
-            # Switch back to player 1 for the next move
-            game.current_player = 1
-        
-        return jsonify(response)
-    except Exception as e:
-        return jsonify({'valid': False, 'message': str(e)}), 400
+            return jsonify(response)
+        except Exception as e:
+            return jsonify({'valid': False, 'message': str(e)}), 400
+
+@app.route('/api/move_job/<job_id>', methods=['GET'])
+def move_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    # Long polling: wait up to ?wait= seconds (at most 30) for the result
+    wait = min(request.args.get('wait', 0, type=float), 30.0)
+    if wait > 0:
+        job.wait(wait)
+    
+    return jsonify(job_response(job))
+
+# Server-Sent Events: a "depth" event (depth, move, score, pv, nodes, nps) follows
+# every completed search depth, and the stream ends with a "done", "cancelled" or
+# "failed" event carrying the job's final state
+@app.route('/api/move_job/<job_id>/events', methods=['GET'])
+def move_job_events(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    def stream():
+        sent = 0
+        while True:
+            events = job.wait_events(sent, timeout=15)
+            for event in events:
+                yield f"event: depth\ndata: {json.dumps(event)}\n\n"
+            sent += len(events)
+            if job.done.is_set() and sent == len(job.events):
+                yield f"event: {job.status}\ndata: {json.dumps(job_response(job))}\n\n"
+                return
+            if not events:
+                yield ": keep-alive\n\n"
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Stop the job's search now: the AI plays the best move found so far
+@app.route('/api/move_job/<job_id>/accept', methods=['POST'])
+def accept_move_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    accepted = jobs.accept(job)
+    return jsonify({'jobId': job.id, 'accepted': accepted, 'status': job.status})
+
+@app.route('/api/stats', methods=['GET'])
+def stats():
+    return jsonify({
+        'jobs': jobs.stats(),
+        'pool': pool.stats(),
+        'analysisCache': analysis_cache.stats(),
+        'endpoints': {name: latencies.summary() for name, latencies in endpoint_latencies.items()}
+    })
+
+@app.route('/api/admin/games', methods=['GET'])
+def admin_games():
+    if ADMIN_TOKEN and request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    # Evict the idle games first, so that the report only counts live ones
+    games.evict_idle()
+    report = games.stats()
+    # The AI's tables are held by the engine pool's workers, not by the games
+    report['poolTtBytes'] = pool.stats()['ttBytes']
+    return jsonify(report)
 
 @app.route('/api/reset', methods=['POST'])
 def reset_game():
@@ -108,9 +298,12 @@ def reset_game():
     board_size = data.get('boardSize', 15)
     difficulty = data.get('difficulty', 3)
     
-    games[game_id] = Gomoku(board_size=board_size, difficulty=difficulty)
+    # The old game's AI move is no longer wanted
+    cancelled = jobs.cancel_game(game_id)
+    games.replace(game_id, create_game(board_size, difficulty))
     
     return jsonify({
+        'cancelledJobs': cancelled,
         'message': 'Game reset successfully',
         'boardSize': board_size
     })
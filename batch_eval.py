@@ -0,0 +1,115 @@
+"""
+Vectorised batch evaluation of Gomoku boards.
+
+``Gomoku._evaluate_board`` scores one board by walking its 5-cell windows in
+Python. ``evaluate_boards`` scores a whole stack of boards (an N x S x S
+NumPy array) at once: the windows of every direction are strided views of
+the stack (no copies), each window's stones are summed into a single code
+(own stones + 6 * opponent stones) and the codes are scored with a lookup
+table equivalent to ``Gomoku._evaluate_line``.
+
+``evaluate_children`` uses this to score every child of a position in one
+call, which is what ``Negamax(batch_leaves=True)`` does at the last ply.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided, sliding_window_view
+
+# Score of a 5-cell window holding 0..5 stones of a single player (as in gomoku.LINE_SCORES)
+LINE_SCORES = (0, 1, 10, 100, 1000, 10000)
+
+# WINDOW_SCORES[own + 6 * opponent]: the score of a window for the player (see _evaluate_line)
+WINDOW_SCORES = np.zeros(36, dtype=np.int64)
+for _count in range(1, 6):
+    WINDOW_SCORES[_count] = LINE_SCORES[_count]
+    WINDOW_SCORES[6 * _count] = -LINE_SCORES[_count]
+
+# The code of a window filled by the opponent
+OPPONENT_FIVE = 30
+
+
+def board_windows(boards):
+    """Return strided views of the 5-cell windows of a stack of boards.
+
+    Args:
+        boards: An (N, S, S) array.
+
+    Returns:
+        tuple: The row, column, diagonal and anti-diagonal windows, each an
+        (N, a, b, 5) view of ``boards`` (the last axis walks the window).
+    """
+    n, size, _ = boards.shape
+    board_stride, row_stride, col_stride = boards.strides
+    rows = sliding_window_view(boards, 5, axis=2)
+    cols = sliding_window_view(boards, 5, axis=1)
+    diagonals = as_strided(boards, shape=(n, size - 4, size - 4, 5),
+                           strides=(board_stride, row_stride, col_stride, row_stride + col_stride),
+                           writeable=False)
+    # Window (i, j) of the anti-diagonals starts at column j + 4 and walks down-left
+    anti_diagonals = as_strided(boards[:, :, 4:], shape=(n, size - 4, size - 4, 5),
+                                strides=(board_stride, row_stride, col_stride, row_stride - col_stride),
+                                writeable=False)
+    return rows, cols, diagonals, anti_diagonals
+
+
+def _window_codes(boards, player):
+    """Yield the window codes (own stones + 6 * opponent stones) of every direction."""
+    player = np.asarray(player, dtype=np.int8).reshape(-1, 1, 1)
+    codes = (boards == player).astype(np.int8) + 6 * (boards == 3 - player).astype(np.int8)
+    for windows in board_windows(codes):
+        yield windows.sum(axis=-1, dtype=np.int8)
+
+
+def evaluate_boards(boards, player):
+    """Score a stack of boards like ``Gomoku._evaluate_board``.
+
+    Args:
+        boards: An (N, S, S) array (or a single S x S board) of 0, 1 and 2.
+        player: The player to evaluate for, one for all boards or one per board.
+
+    Returns:
+        numpy.ndarray: The N scores.
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    if boards.ndim == 2:
+        boards = boards[np.newaxis]
+    total = np.zeros(len(boards), dtype=np.int64)
+    for codes in _window_codes(boards, player):
+        total += WINDOW_SCORES[codes].sum(axis=(1, 2))
+    return total
+
+
+def score_boards(boards, player):
+    """Score a stack of boards like ``Gomoku.scoring`` for the player to move.
+
+    Returns:
+        numpy.ndarray: The N scores (-10000 where the opponent has a five).
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    if boards.ndim == 2:
+        boards = boards[np.newaxis]
+    total = np.zeros(len(boards), dtype=np.int64)
+    lost = np.zeros(len(boards), dtype=bool)
+    for codes in _window_codes(boards, player):
+        total += WINDOW_SCORES[codes].sum(axis=(1, 2))
+        lost |= (codes == OPPONENT_FIVE).any(axis=(1, 2))
+    # scoring() is evaluate(player) - evaluate(opponent), i.e. twice the player's evaluation
+    return np.where(lost, -10000, 2 * total)
+
+
+def child_boards(game, moves):
+    """Return an (N, S, S) stack of the boards after each move of the player to move."""
+    boards = np.repeat(np.asarray(game.board, dtype=np.int8)[np.newaxis], len(moves), axis=0)
+    rows, cols = np.array(moves, dtype=np.intp).reshape(-1, 2).T
+    boards[np.arange(len(moves)), rows, cols] = game.current_player
+    return boards
+
+
+def evaluate_children(game, moves):
+    """Score the position after each move, for the opponent (who is then to move).
+
+    Returns:
+        numpy.ndarray: ``scoring()`` of every child, as the children would
+        report it.
+    """
+    return score_boards(child_boards(game, moves), 3 - game.current_player)
@@ -5,11 +5,31 @@ This script measures the performance of different AI algorithms for the Gomoku g
 It generates graphs and reports to visualize the performance data.
 """
 
+import sys
 import time
+import gc
+import random
+import threading
+import tracemalloc
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-from gomoku import Gomoku, Negamax, AI_Player, Human_Player
+from gomoku import Gomoku, Negamax, PVS, AI_Player, Human_Player
+from bitboard import BitboardGomoku
+from position import Position
+from sss_algorithm import SSS
+from proof_number import ProofNumberSearch
+from parallel_search import ParallelNegamax
+from lazy_smp import LazySMP
+from mcts import MCTS
+from move_jobs import MoveJobQueue, percentiles
+from engine_pool import EnginePool
+from analysis_cache import AnalysisCache, canonical_position
+from parallel_search import encode_position
+from game_store import GameStore
+from batch_eval import evaluate_children
+from patterns import evaluate_patterns, pattern_scoring
+from transposition_table import BoundedTranspositionTable
 from easyAI import TranspositionTable
 
 def benchmark_algorithm(algorithm_name, algorithm, board_size=9, num_moves=10, num_runs=3):
@@ -189,7 +209,943 @@ def generate_graphs(df):
     # Show the figure
     plt.show()
 
+def counting_game(game_class):
+    """Return a subclass of a game class that counts the nodes it visits.
+
+    Every ``make_move`` call made by the search is one node.
+    """
+    class CountingGame(game_class):
+        nodes = 0
+
+        def make_move(self, move):
+            self.nodes += 1
+            super().make_move(move)
+
+    CountingGame.__name__ = f"Counting{game_class.__name__}"
+    return CountingGame
+
+def random_position(game, num_stones, seed):
+    """Play ``num_stones`` reproducible random moves near the centre of the board."""
+    rng = random.Random(seed)
+    center = game.board_size // 2
+    for _ in range(num_stones):
+        moves = [(r, c) for r, c in game.possible_moves()
+                 if abs(r - center) <= 3 and abs(c - center) <= 3]
+        game.make_move(rng.choice(moves))
+        game.current_player = 3 - game.current_player
+    return game
+
+def benchmark_board_backends(board_sizes=(15, 19), depth=3, num_positions=8, num_stones=8):
+    """
+    Compare search speed of the list-of-lists and bitboard board backends.
+
+    Both backends are searched with the same fixed-depth Negamax from the same
+    random positions, so they visit the same nodes and only the time differs.
+    One untimed search per backend first warms up the per-board-size tables.
+
+    Args:
+        board_sizes: The board sizes to benchmark.
+        depth: The Negamax search depth.
+        num_positions: The number of random positions per board size.
+        num_stones: The number of stones on each random position.
+
+    Returns:
+        list: A list of dictionaries containing the benchmark results.
+    """
+    backends = [('list-of-lists', Gomoku), ('bitboard', BitboardGomoku)]
+    results = []
+    for board_size in board_sizes:
+        for backend_name, backend in backends:
+            print(f"Benchmarking {backend_name} board ({board_size}x{board_size}, depth={depth})...")
+            game_class = counting_game(backend)
+            # Warm-up: build the layouts and tables outside the timed searches
+            Negamax(depth=depth, tt=TranspositionTable())(random_position(game_class(board_size=board_size),
+                                                                           num_stones, num_positions))
+            nodes = 0
+            elapsed = 0.0
+            for seed in range(num_positions):
+                game = random_position(game_class(board_size=board_size), num_stones, seed)
+                algorithm = Negamax(depth=depth, tt=TranspositionTable())
+                start_time = time.time()
+                algorithm(game)
+                elapsed += time.time() - start_time
+                nodes += game.nodes
+            results.append({
+                'backend': backend_name,
+                'board_size': board_size,
+                'depth': depth,
+                'nodes': nodes,
+                'time': elapsed,
+                'nodes_per_sec': nodes / elapsed if elapsed > 0 else 0,
+            })
+    return results
+
+def report_board_backends(results):
+    """Print the board backend benchmark results."""
+    df = pd.DataFrame(results)
+    print("\nBoard Backend Results:")
+    print(df[['backend', 'board_size', 'depth', 'nodes', 'time', 'nodes_per_sec']])
+
+def position_suite(board_size=15, num_positions=4, num_stones=8):
+    """Return a fixed suite of reproducible positions (player 1 to move)."""
+    return [random_position(Position(board_size=board_size), num_stones, seed) for seed in range(num_positions)]
+
+def benchmark_move_ordering(board_size=15, depth=4, num_positions=4):
+    """
+    Compare Negamax with and without threat-aware move ordering.
+
+    Args:
+        board_size: The size of the board.
+        depth: The Negamax search depth.
+        num_positions: The number of positions in the suite.
+
+    Returns:
+        list: A list of dictionaries containing the benchmark results.
+    """
+    results = []
+    for name, ordering in [('tt move only', False), ('threat ordering', True)]:
+        print(f"Benchmarking {name} (depth={depth})...")
+        nodes = cutoffs = first_move_cutoffs = 0
+        elapsed = 0.0
+        for game in position_suite(board_size, num_positions):
+            algorithm = Negamax(depth=depth, ordering=ordering)
+            start_time = time.time()
+            algorithm(game)
+            elapsed += time.time() - start_time
+            nodes += algorithm.stats['nodes']
+            cutoffs += algorithm.stats['cutoffs']
+            first_move_cutoffs += algorithm.stats['first_move_cutoffs']
+        results.append({
+            'ordering': name,
+            'depth': depth,
+            'nodes': nodes,
+            'time': elapsed,
+            'first_move_cutoff_rate': first_move_cutoffs / cutoffs if cutoffs else 0,
+        })
+    return results
+
+def benchmark_tt_sizes(sizes_mb=(0.0625, 1, 16), board_size=15, depth=4, num_positions=4):
+    """
+    Measure hit rate, fill ratio and collisions of the bounded transposition table.
+
+    One table is shared by all positions of the suite, as it would be over a
+    game, so small tables show the effect of replacement.
+
+    Args:
+        sizes_mb: The table sizes to try, in megabytes.
+        board_size: The size of the board.
+        depth: The Negamax search depth.
+        num_positions: The number of positions in the suite.
+
+    Returns:
+        list: A list of dictionaries containing the benchmark results.
+    """
+    results = []
+    for size_mb in sizes_mb:
+        print(f"Benchmarking a {size_mb} MB transposition table (depth={depth})...")
+        table = BoundedTranspositionTable(size_mb=size_mb)
+        nodes = 0
+        start_time = time.time()
+        for game in position_suite(board_size, num_positions):
+            algorithm = Negamax(depth=depth, tt=table)
+            algorithm(game)
+            nodes += algorithm.stats['nodes']
+        result = {'size_mb': size_mb, 'nodes': nodes, 'time': time.time() - start_time}
+        result.update(table.report())
+        results.append(result)
+    return results
+
+def benchmark_iterative_deepening(board_size=15, depth=5, num_positions=4):
+    """
+    Compare ways of running iterative deepening up to the same depth.
+
+    - 'restart per depth': a fresh engine and table for every depth, as the
+      old ``IterativeDeepening`` did;
+    - 'shared table': one engine calling ``search`` for every depth;
+    - 'driver': the ``IterativeDeepening`` driver (shared table plus
+      principal variation ordering and early stop on forced results).
+
+    Args:
+        board_size: The size of the board.
+        depth: The depth every mode searches to.
+        num_positions: The number of positions in the suite.
+
+    Returns:
+        list: A list of dictionaries containing the benchmark results.
+    """
+    def restart_per_depth(game):
+        nodes = 0
+        for d in range(1, depth + 1):
+            algorithm = Negamax(depth=d)
+            algorithm.start_search()
+            algorithm.search(game, d, -algorithm.win_score, algorithm.win_score)
+            nodes += algorithm.stats['nodes']
+        return nodes
+
+    def shared_table(game):
+        algorithm = Negamax(depth=depth)
+        algorithm.start_search()
+        for d in range(1, depth + 1):
+            algorithm.search(game, d, -algorithm.win_score, algorithm.win_score)
+        return algorithm.stats['nodes']
+
+    def driver(game):
+        algorithm = Negamax(depth=depth)
+        algorithm(game)
+        return algorithm.stats['nodes']
+
+    results = []
+    for name, run in [('restart per depth', restart_per_depth), ('shared table', shared_table), ('driver', driver)]:
+        print(f"Benchmarking {name} (depth={depth})...")
+        nodes = 0
+        elapsed = 0.0
+        for game in position_suite(board_size, num_positions):
+            start_time = time.time()
+            nodes += run(game)
+            elapsed += time.time() - start_time
+        results.append({'mode': name, 'depth': depth, 'nodes': nodes, 'time': elapsed})
+    return results
+
+def benchmark_pvs(board_size=15, depth=5, num_positions=4):
+    """
+    Compare plain alpha-beta with principal variation search and aspiration windows.
+
+    Every engine runs the same iterative deepening to the same depth on the
+    same positions, so the node counts are directly comparable.
+
+    Args:
+        board_size: The size of the board.
+        depth: The search depth.
+        num_positions: The number of positions in the suite.
+
+    Returns:
+        list: A list of dictionaries containing the benchmark results.
+    """
+    engines = [
+        ('alpha-beta', lambda: Negamax(depth=depth)),
+        ('pvs', lambda: PVS(depth=depth, window=None)),
+        ('pvs + aspiration', lambda: PVS(depth=depth)),
+    ]
+    results = []
+    for name, make_engine in engines:
+        print(f"Benchmarking {name} (depth={depth})...")
+        totals = {'nodes': 0, 'researches': 0, 'fail_highs': 0, 'fail_lows': 0}
+        elapsed = 0.0
+        for game in position_suite(board_size, num_positions):
+            algorithm = make_engine()
+            start_time = time.time()
+            algorithm(game)
+            elapsed += time.time() - start_time
+            for key in totals:
+                totals[key] += algorithm.stats.get(key, 0)
+        result = {'engine': name, 'depth': depth, 'time': elapsed}
+        result.update(totals)
+        results.append(result)
+    return results
+
+def benchmark_sss(board_size=15, depths=(3, 4, 5), num_positions=4):
+    """
+    Compare Negamax with the MTD(f) engine behind ``SSS``, head to head.
+
+    Args:
+        board_size: The size of the board.
+        depths: The search depths to compare.
+        num_positions: The number of positions in the suite.
+
+    Returns:
+        list: A list of dictionaries containing the benchmark results.
+    """
+    results = []
+    for depth in depths:
+        for name, engine_class in [('Negamax', Negamax), ('SSS* (MTD(f))', SSS)]:
+            print(f"Benchmarking {name} (depth={depth})...")
+            nodes = 0
+            elapsed = 0.0
+            for game in position_suite(board_size, num_positions):
+                algorithm = engine_class(depth=depth, timeout=None)
+                start_time = time.time()
+                algorithm(game)
+                elapsed += time.time() - start_time
+                nodes += algorithm.stats['nodes']
+            results.append({
+                'engine': name,
+                'depth': depth,
+                'nodes': nodes,
+                'time': elapsed,
+                'nodes_per_sec': nodes / elapsed if elapsed > 0 else 0,
+            })
+    return results
+
+def benchmark_proof_number(board_size=15, num_positions=4, num_stones=10, timeout=5):
+    """
+    Run the proof-number search on the position suite, full width and by threats only.
+
+    Args:
+        board_size: The size of the board.
+        num_positions: The number of positions in the suite.
+        num_stones: The number of stones on each position.
+        timeout: The time limit of each solve, in seconds.
+
+    Returns:
+        list: A list of dictionaries containing the benchmark results.
+    """
+    results = []
+    for name, threats_only in [('full width', False), ('threats only', True)]:
+        print(f"Benchmarking proof-number search ({name})...")
+        for seed, game in enumerate(position_suite(board_size, num_positions, num_stones)):
+            result = ProofNumberSearch(timeout=timeout, threats_only=threats_only).solve(game)
+            results.append({
+                'mode': name,
+                'position': seed,
+                'status': result['status'],
+                'proof': result['proof'],
+                'disproof': result['disproof'],
+                'line_length': len(result['line']) if result['line'] else 0,
+                'nodes': result['nodes'],
+                'time': result['time'],
+                'nodes_per_sec': result['nps'],
+            })
+    return results
+
+def benchmark_parallel(worker_counts=(1, 4, 8, 16), board_size=15, depth=4, num_positions=4):
+    """
+    Measure how the root-split parallel search scales with the number of workers.
+
+    Each worker count gets a fresh pool, which is started on an empty board
+    before the clock starts. The speedup is relative to
+    the single-process Negamax on the same positions.
+
+    Args:
+        worker_counts: The numbers of worker processes to try.
+        board_size: The size of the board.
+        depth: The search depth.
+        num_positions: The number of positions in the suite.
+
+    Returns:
+        list: A list of dictionaries containing the benchmark results.
+    """
+    positions = position_suite(board_size, num_positions)
+    print(f"Benchmarking serial Negamax (depth={depth})...")
+    nodes = 0
+    start_time = time.time()
+    for game in positions:
+        algorithm = Negamax(depth=depth)
+        algorithm(game)
+        nodes += algorithm.stats['nodes']
+    serial_time = time.time() - start_time
+    results = [{'workers': 0, 'engine': 'Negamax', 'nodes': nodes, 'time': serial_time, 'speedup': 1.0}]
+    for workers in worker_counts:
+        print(f"Benchmarking {workers} workers (depth={depth})...")
+        algorithm = ParallelNegamax(depth=depth, workers=workers)
+        algorithm(Gomoku(board_size=board_size))  # Start the processes
+        nodes = 0
+        start_time = time.time()
+        for game in positions:
+            algorithm(game)
+            nodes += algorithm.stats['nodes']
+        elapsed = time.time() - start_time
+        algorithm.close()
+        results.append({'workers': workers, 'engine': 'ParallelNegamax', 'nodes': nodes, 'time': elapsed,
+                        'speedup': serial_time / elapsed if elapsed > 0 else 0})
+    return results
+
+def benchmark_lazy_smp(worker_counts=(1, 4, 8, 16), board_size=15, depth=4, num_positions=4):
+    """
+    Measure the time-to-depth of Lazy SMP and the contention on its shared table.
+
+    The speedup is relative to the single-process Negamax reaching the same
+    depth on the same positions. The table columns sum the workers'
+    probes, hits, collisions (stores over another position) and torn reads
+    (entries changed by another process while being read).
+
+    Args:
+        worker_counts: The numbers of worker processes to try.
+        board_size: The size of the board.
+        depth: The search depth.
+        num_positions: The number of positions in the suite.
+
+    Returns:
+        list: A list of dictionaries containing the benchmark results.
+    """
+    positions = position_suite(board_size, num_positions)
+    print(f"Benchmarking serial Negamax (depth={depth})...")
+    nodes = 0
+    start_time = time.time()
+    for game in positions:
+        algorithm = Negamax(depth=depth)
+        algorithm(game)
+        nodes += algorithm.stats['nodes']
+    serial_time = time.time() - start_time
+    results = [{'workers': 0, 'nodes': nodes, 'time': serial_time, 'speedup': 1.0,
+                'hit_rate': None, 'collisions': None, 'torn_reads': None}]
+    for workers in worker_counts:
+        print(f"Benchmarking Lazy SMP with {workers} workers (depth={depth})...")
+        algorithm = LazySMP(depth=depth, workers=workers)
+        algorithm(Gomoku(board_size=board_size))  # Start the processes
+        nodes = probes = hits = collisions = torn_reads = 0
+        start_time = time.time()
+        for game in positions:
+            algorithm(game)
+            nodes += algorithm.stats['nodes']
+            for report in algorithm.reports:
+                probes += report['tt']['probes']
+                hits += report['tt']['hits']
+                collisions += report['tt']['collisions']
+                torn_reads += report['tt']['torn_reads']
+        elapsed = time.time() - start_time
+        algorithm.close()
+        results.append({'workers': workers, 'nodes': nodes, 'time': elapsed,
+                        'speedup': serial_time / elapsed if elapsed > 0 else 0,
+                        'hit_rate': hits / probes if probes else 0.0,
+                        'collisions': collisions, 'torn_reads': torn_reads})
+    return results
+
+def benchmark_mcts(batch_sizes=(1, 4, 16), board_size=15, num_positions=4, timeout=2):
+    """
+    Measure the playout rate of MCTS for several playout batch sizes.
+
+    Args:
+        batch_sizes: The numbers of playouts run from each new leaf.
+        board_size: The size of the board.
+        num_positions: The number of positions in the suite.
+        timeout: The search time per position, in seconds.
+
+    Returns:
+        list: A list of dictionaries containing the benchmark results.
+    """
+    results = []
+    positions = position_suite(board_size, num_positions)
+    for batch in batch_sizes:
+        print(f"Benchmarking MCTS (batch={batch})...")
+        playouts = nodes = 0
+        elapsed = 0.0
+        for game in positions:
+            algorithm = MCTS(timeout=timeout, batch=batch, seed=0)
+            algorithm(game)
+            playouts += algorithm.stats['playouts']
+            nodes += algorithm.stats['nodes']
+            elapsed += algorithm.stats['elapsed']
+        results.append({'batch': batch, 'playouts': playouts, 'tree_nodes': nodes, 'time': elapsed,
+                        'playouts_per_sec': playouts / elapsed if elapsed > 0 else 0})
+    return results
+
+def follow_line(game, pv):
+    """Play the first two moves of a principal variation (or a candidate reply) and return them."""
+    moves = list(pv[:2])
+    game.make_move(moves[0])
+    game.switch_player()
+    if len(moves) < 2:
+        moves.append(game.candidate_moves()[0])
+    game.make_move(moves[1])
+    game.switch_player()
+    return moves
+
+def benchmark_reuse(board_size=15, num_positions=4, depth=4):
+    """
+    Measure the time to reach each depth on move N+1, with and without reuse.
+
+    An engine searches move N, the game follows its principal variation for
+    two plies, and the same engine (keeping its aged table, history and
+    line) searches move N+1; a cold engine searches the same position.
+
+    Args:
+        board_size: The size of the board.
+        num_positions: The number of positions in the suite.
+        depth: The Negamax search depth.
+
+    Returns:
+        list: A list of dictionaries containing the benchmark results.
+    """
+    times = {True: [0.0] * depth, False: [0.0] * depth}
+    nodes = {True: [0] * depth, False: [0] * depth}
+    for game in position_suite(board_size, num_positions):
+        warm = Negamax(depth=depth)
+        warm(game)
+        moves = follow_line(game, warm.result.pv)
+        print(f"Benchmarking move N+1 after {moves}...")
+        for reuse, algorithm in [(True, warm), (False, Negamax(depth=depth, reuse=False))]:
+            algorithm(game)
+            for result in algorithm.driver.iterations:
+                times[reuse][result.depth - 1] += result.elapsed
+                nodes[reuse][result.depth - 1] += result.nodes
+        for move in reversed(moves):
+            game.unmake_move(move)
+    results = []
+    for index in range(depth):
+        results.append({'depth': index + 1,
+                        'time_cold': times[False][index] / num_positions,
+                        'time_reuse': times[True][index] / num_positions,
+                        'nodes_cold': nodes[False][index] / num_positions,
+                        'nodes_reuse': nodes[True][index] / num_positions})
+    return results
+
+def benchmark_mcts_reuse(board_size=15, num_positions=4, playouts=4000):
+    """
+    Measure how many playouts MCTS carries over to move N+1 with tree reuse.
+
+    Args:
+        board_size: The size of the board.
+        num_positions: The number of positions in the suite.
+        playouts: The number of playouts per move.
+
+    Returns:
+        list: A list of dictionaries containing the benchmark results.
+    """
+    results = []
+    for reuse in (False, True):
+        print(f"Benchmarking MCTS (reuse={reuse})...")
+        reused = root_visits = 0
+        elapsed = 0.0
+        for seed, game in enumerate(position_suite(board_size, num_positions)):
+            algorithm = MCTS(timeout=None, max_playouts=playouts, seed=seed, reuse=reuse)
+            move = algorithm(game)
+            reply = divmod(algorithm.moves[algorithm.best_child(algorithm.best_child(0))], board_size)
+            moves = follow_line(game, [move, reply])
+            algorithm(game)
+            reused += algorithm.stats['reused_visits']
+            root_visits += algorithm.visits[0]
+            elapsed += algorithm.stats['elapsed']
+            for move in reversed(moves):
+                game.unmake_move(move)
+        results.append({'reuse': reuse, 'reused_visits': reused / num_positions,
+                        'root_visits': root_visits / num_positions, 'time': elapsed / num_positions})
+    return results
+
+def benchmark_move_jobs(board_size=15, num_clients=8, difficulty=3, worker_counts=(1, 2)):
+    """
+    Measure the web server's AI move latency under load, with and without jobs.
+
+    ``num_clients`` games ask for an AI move at the same time. Run in the
+    request (the old ``/api/make_move``), a response takes as long as the
+    searches sharing the server; with a ``MoveJobQueue`` the response returns
+    at once, the first completed depth is streamed as soon as it is found,
+    and the move is ready after its queue wait and search.
+
+    Args:
+        board_size: The size of the board.
+        num_clients: The number of games asking for a move at once.
+        difficulty: The AI difficulty (search depth).
+        worker_counts: The job queue sizes to measure.
+
+    Returns:
+        list: A list of dictionaries containing the benchmark results.
+    """
+    def client_games():
+        # Without the threat search, whose wall-clock budget would shrink under load
+        return [random_position(Gomoku(board_size=board_size, players=[
+            Human_Player(), AI_Player(Negamax(depth=difficulty), threat_search=False)]), 8, seed)
+            for seed in range(num_clients)]
+
+    def search_with_progress(game, job):
+        engine = game.players[1].AI_algo
+        engine.driver.progress = lambda result: job.publish(time.time())
+        return game.players[1].ask_move(game)
+
+    results = []
+    print(f"Benchmarking synchronous moves ({num_clients} clients)...")
+    responses = []
+    def request(game):
+        start_time = time.time()
+        game.players[1].ask_move(game)
+        responses.append(time.time() - start_time)
+    threads = [threading.Thread(target=request, args=(game,)) for game in client_games()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.append(dict(mode='synchronous', **{f'response_{key}': value for key, value in
+                                               percentiles(responses).items()},
+                        **{f'move_{key}': value for key, value in percentiles(responses).items()}))
+
+    for workers in worker_counts:
+        print(f"Benchmarking move jobs ({num_clients} clients, {workers} workers)...")
+        queue = MoveJobQueue(max_workers=workers, max_pending=num_clients)
+        responses = []
+        jobs = []
+        for game in client_games():
+            start_time = time.time()
+            jobs.append(queue.submit(None, lambda job, game=game: search_with_progress(game, job)))
+            responses.append(time.time() - start_time)
+        for job in jobs:
+            job.wait()
+        moves = [job.finished - job.submitted for job in jobs]
+        # The first streamed depth gives the client a move to show
+        first_depths = [job.events[0] - job.submitted for job in jobs if job.events]
+        queue.shutdown()
+        results.append(dict(mode=f'jobs ({workers} workers)',
+                            **{f'response_{key}': value for key, value in percentiles(responses).items()},
+                            **{f'move_{key}': value for key, value in percentiles(moves).items()},
+                            **{f'first_depth_{key}': value for key, value in percentiles(first_depths).items()}))
+    return results
+
+def benchmark_engine_pool(board_size=15, num_clients=8, difficulty=3, worker_counts=(1, 2, 4)):
+    """
+    Measure AI move throughput in the web process and in an ``EnginePool``.
+
+    ``num_clients`` games ask for an AI move at the same time. Searched by
+    threads of the web process, the moves share one core under the GIL; the
+    pool spreads them over its worker processes. Every pool is measured
+    twice on the same positions: cold, then with its workers' tables warm.
+
+    Args:
+        board_size: The size of the board.
+        num_clients: The number of games asking for a move at once.
+        difficulty: The AI difficulty (search depth).
+        worker_counts: The pool sizes to measure.
+
+    Returns:
+        list: A list of dictionaries containing the benchmark results.
+    """
+    positions = [random_position(Gomoku(board_size=board_size), 8, seed) for seed in range(num_clients)]
+    results = []
+
+    print(f"Benchmarking in-process searches ({num_clients} clients)...")
+    engines = [Negamax(depth=difficulty) for _ in positions]
+    moves = []
+    def request(game, engine):
+        start_time = time.time()
+        engine(game)
+        moves.append(time.time() - start_time)
+    start_time = time.time()
+    threads = [threading.Thread(target=request, args=(game, engine)) for game, engine in zip(positions, engines)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start_time
+    results.append(dict(mode='in-process threads', moves_per_s=num_clients / elapsed,
+                        **{f'move_{key}': value for key, value in percentiles(moves).items()}))
+
+    for workers in worker_counts:
+        print(f"Benchmarking the engine pool ({num_clients} clients, {workers} workers)...")
+        pool = EnginePool(workers=workers, tt_size_mb=16, board_sizes=(board_size,))
+        pool.start()
+        for run in ('cold', 'warm'):
+            start_time = time.time()
+            tasks = [pool.submit(game, depth=difficulty, threat_search=False) for game in positions]
+            searches = [task.result() for task in tasks]
+            elapsed = time.time() - start_time
+            moves = [search['started'] + search['elapsed'] - task.submitted
+                     for task, search in zip(tasks, searches)]
+            waits = [search['started'] - task.submitted for task, search in zip(tasks, searches)]
+            results.append(dict(mode=f'pool ({workers} workers, {run})', moves_per_s=num_clients / elapsed,
+                                **{f'move_{key}': value for key, value in percentiles(moves).items()},
+                                wait_p90=percentiles(waits)['p90'],
+                                nodes=sum(search['nodes'] for search in searches) / num_clients,
+                                utilisation=pool.stats()['utilisation']))
+        pool.close()
+    return results
+
+def benchmark_analysis_cache(board_sizes=(15, 19), num_games=20, num_moves=3, difficulty=3):
+    """
+    Measure how often web games reach positions already searched by another game.
+
+    Every game opens in the centre, and its human moves are picked at random
+    next to the stones already played, as players tend to do. The AI replies
+    through an ``EnginePool``, first without a cache, then with an
+    ``AnalysisCache`` shared by all the games.
+
+    Args:
+        board_sizes: The board sizes to measure.
+        num_games: The number of games per board size.
+        num_moves: The number of AI moves per game.
+        difficulty: The AI difficulty (search depth).
+
+    Returns:
+        list: A list of dictionaries containing the benchmark results.
+    """
+    def play(pool, board_size):
+        positions = []
+        start_time = time.time()
+        for seed in range(num_games):
+            rng = random.Random(seed)
+            game = Gomoku(board_size=board_size, difficulty=difficulty)
+            game.make_move((board_size // 2, board_size // 2))
+            for _ in range(num_moves):
+                game.current_player = 2
+                positions.append(encode_position(game))
+                game.make_move(pool.submit(game, depth=difficulty).result()['move'])
+                if game.is_over():
+                    break
+                game.current_player = 1
+                stones = [divmod(cell, board_size) for cell in game.move_history]
+                near = [move for move in game.candidate_moves()
+                        if any(abs(move[0] - row) <= 1 and abs(move[1] - col) <= 1 for row, col in stones)]
+                game.make_move(rng.choice(sorted(near)))
+        return positions, (time.time() - start_time) / len(positions)
+
+    results = []
+    for board_size in board_sizes:
+        for cached in (False, True):
+            print(f"Benchmarking the analysis cache ({board_size}x{board_size}, cache: {cached})...")
+            cache = AnalysisCache() if cached else None
+            pool = EnginePool(workers=1, tt_size_mb=16, board_sizes=(board_size,), cache=cache)
+            pool.start()
+            positions, move_time = play(pool, board_size)
+            pool.close()
+            result = {'board_size': board_size, 'cache': cached, 'ai_moves': len(positions),
+                      'distinct': len({(position[2], tuple(sorted(position[1]))) for position in positions}),
+                      'distinct_symmetric': len({(position[2], canonical_position(position)[0])
+                                                 for position in positions}),
+                      'move_time': move_time}
+            if cache is not None:
+                result['hit_rate'] = cache.stats()['boardSizes'][str(board_size)]['hitRate']
+            results.append(result)
+    return results
+
+def benchmark_batch_eval(board_size=15, num_positions=8, depth=3, repeat=5):
+    """
+    Compare the leaf evaluation rate of the scalar and vectorised evaluators.
+
+    Every child of every suite position is scored: by ``_evaluate_board``
+    (the full scan), by ``make_move``/``scoring``/``unmake_move`` (the
+    incremental score used by the search), and by one ``evaluate_children``
+    call per position. The search rows compare Negamax with and without
+    ``batch_leaves``; they find the same moves, but the batch evaluates every
+    child where alpha-beta would stop after a few.
+
+    Args:
+        board_size: The size of the board.
+        num_positions: The number of positions in the suite.
+        depth: The search depth of the search rows.
+        repeat: The number of times the children are scored.
+
+    Returns:
+        list: A list of dictionaries containing the benchmark results.
+    """
+    positions = position_suite(board_size, num_positions)
+    children = [(game, game.candidate_moves()) for game in positions]
+    leaves = repeat * sum(len(moves) for _, moves in children)
+
+    def scan(game, moves):
+        for move in moves:
+            game.make_move(move)
+            game._evaluate_board(1)
+            game._evaluate_board(2)
+            game.unmake_move(move)
+
+    def incremental(game, moves):
+        for move in moves:
+            game.make_move(move)
+            game.switch_player()
+            game.scoring()
+            game.switch_player()
+            game.unmake_move(move)
+
+    results = []
+    for name, evaluate in [('_evaluate_board', scan), ('incremental', incremental),
+                           ('evaluate_children', evaluate_children)]:
+        print(f"Benchmarking {name}...")
+        start_time = time.time()
+        for _ in range(repeat):
+            for game, moves in children:
+                evaluate(game, moves)
+        elapsed = time.time() - start_time
+        results.append({'evaluator': name, 'leaves': leaves, 'time': elapsed,
+                        'leaves_per_sec': leaves / elapsed if elapsed > 0 else 0})
+    for batch_leaves in (False, True):
+        print(f"Benchmarking Negamax (depth={depth}, batch_leaves={batch_leaves})...")
+        nodes = 0
+        start_time = time.time()
+        for game in positions:
+            algorithm = Negamax(depth=depth, batch_leaves=batch_leaves)
+            algorithm(game)
+            nodes += algorithm.stats['nodes']
+        elapsed = time.time() - start_time
+        results.append({'evaluator': f'Negamax(batch_leaves={batch_leaves})', 'leaves': nodes, 'time': elapsed,
+                        'leaves_per_sec': nodes / elapsed if elapsed > 0 else 0})
+    return results
+
+def benchmark_patterns(board_size=15, num_positions=8, depth=2, repeat=20):
+    """
+    Measure the board evaluators and a search that scores positions by patterns.
+
+    Args:
+        board_size: The size of the board.
+        num_positions: The number of positions in the suite.
+        depth: The search depth of the search rows.
+        repeat: The number of times every position is evaluated.
+
+    Returns:
+        list: A list of dictionaries containing the benchmark results.
+    """
+    positions = position_suite(board_size, num_positions)
+    evaluations = repeat * len(positions)
+    results = []
+    for name, evaluate in [('_evaluate_board', lambda game: game._evaluate_board(1)),
+                           ('evaluate_patterns', lambda game: evaluate_patterns(game, 1)),
+                           ('incremental scoring', lambda game: game.scoring())]:
+        print(f"Benchmarking {name}...")
+        start_time = time.time()
+        for _ in range(repeat):
+            for game in positions:
+                evaluate(game)
+        elapsed = time.time() - start_time
+        results.append({'evaluator': name, 'evaluations': evaluations, 'time': elapsed,
+                        'evals_per_sec': evaluations / elapsed if elapsed > 0 else 0})
+    for name, scoring in [('Negamax (window scoring)', None), ('Negamax (pattern_scoring)', pattern_scoring)]:
+        print(f"Benchmarking {name} (depth={depth})...")
+        nodes = 0
+        start_time = time.time()
+        for game in positions:
+            algorithm = Negamax(depth=depth, scoring=scoring)
+            algorithm(game)
+            nodes += algorithm.stats['nodes']
+        elapsed = time.time() - start_time
+        results.append({'evaluator': name, 'evaluations': nodes, 'time': elapsed,
+                        'evals_per_sec': nodes / elapsed if elapsed > 0 else 0})
+    return results
+
+def memory_per_game(create, count):
+    """Return the average bytes allocated by ``create()``, over ``count`` live instances."""
+    create()  # Build the shared per-board-size tables first
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    games = [create() for _ in range(count)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del games
+    return used / count
+
+def benchmark_memory(board_sizes=(15, 19), num_games=200, num_stones=8):
+    """
+    Measure the memory held by one game object, with and without players.
+
+    ``Gomoku`` used to build its default players (and their transposition
+    table) in the constructor; they are now created on first use, and
+    ``Position`` holds the board state alone.
+
+    Args:
+        board_sizes: The board sizes to measure.
+        num_games: The number of instances to average over.
+        num_stones: The number of stones on each position.
+
+    Returns:
+        list: A list of dictionaries containing the benchmark results.
+    """
+    def default_players(board_size):
+        game = Gomoku(board_size=board_size)
+        game.players  # Create the default players, as the constructor used to
+        return game
+
+    kinds = [
+        ('Gomoku (default players)', default_players, 20),
+        ('Gomoku (players unused)', lambda board_size: Gomoku(board_size=board_size), num_games),
+        ('Gomoku (human players)',
+         lambda board_size: Gomoku(board_size=board_size, players=[Human_Player(), Human_Player()]), num_games),
+        ('Position', lambda board_size: Position(board_size=board_size), num_games),
+    ]
+    results = []
+    for board_size in board_sizes:
+        for name, create, count in kinds:
+            print(f"Benchmarking {name} ({board_size}x{board_size})...")
+            empty = memory_per_game(lambda: create(board_size), count)
+            played = memory_per_game(lambda: random_position(create(board_size), num_stones, 0), count)
+            results.append({'board_size': board_size, 'game': name, 'bytes_empty': round(empty),
+                            f'bytes_{num_stones}_stones': round(played)})
+    return results
+
+def benchmark_game_store(num_games=200, max_games=50, tt_size_mb=1):
+    """
+    Measure the memory held by the web server's games as they accumulate.
+
+    Every game plays one AI move (which allocates its transposition table).
+    The old plain dictionary keeps them all; ``GameStore`` keeps at most
+    ``max_games`` of them.
+
+    Args:
+        num_games: The number of games created.
+        max_games: The store's game limit.
+        tt_size_mb: Each game's transposition table budget.
+
+    Returns:
+        list: A list of dictionaries containing the benchmark results.
+    """
+    results = []
+    for name in ('dict', f'GameStore(max_games={max_games})'):
+        print(f"Benchmarking {name}...")
+        games = {} if name == 'dict' else GameStore(max_games=max_games)
+        tracemalloc.start()
+        for index in range(num_games):
+            game = Gomoku(board_size=15, difficulty=1, tt_size_mb=tt_size_mb)
+            if name == 'dict':
+                games[str(len(games) + 1)] = game
+            else:
+                games.add(game)
+            game.make_move((7, 7))
+            game.players  # The first AI move creates the AI and its table
+        gc.collect()  # Evicted engines are freed by the cycle collector
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        results.append({'store': name, 'games_created': num_games, 'games_kept': len(games),
+                        'traced_mb': used / (1024 * 1024)})
+        del games
+    return results
+
+def print_results(title, results):
+    """Print a list of result dictionaries as a table."""
+    print(f"\n{title}:")
+    print(pd.DataFrame(results).to_string(index=False))
+
 if __name__ == "__main__":
-    print("Running Gomoku AI Algorithm Benchmarks...")
-    results = run_benchmarks()
-    generate_report(results)
+    # Usage: python benchmark.py [algorithms|boards|ordering|tt|deepening|pvs|sss|pns|parallel|lazysmp|mcts|batch|patterns|memory|reuse|jobs|store|pool|cache]
+    suite = sys.argv[1] if len(sys.argv) > 1 else 'algorithms'
+    if suite == 'boards':
+        print("Running Gomoku board backend benchmarks...")
+        report_board_backends(benchmark_board_backends())
+    elif suite == 'ordering':
+        print("Running move ordering benchmarks...")
+        print_results("Move Ordering Results", benchmark_move_ordering())
+    elif suite == 'tt':
+        print("Running transposition table benchmarks...")
+        print_results("Transposition Table Results", benchmark_tt_sizes())
+    elif suite == 'deepening':
+        print("Running iterative deepening benchmarks...")
+        print_results("Iterative Deepening Results", benchmark_iterative_deepening())
+    elif suite == 'pvs':
+        print("Running principal variation search benchmarks...")
+        print_results("Principal Variation Search Results", benchmark_pvs())
+    elif suite == 'sss':
+        print("Running SSS* benchmarks...")
+        print_results("SSS* Results", benchmark_sss())
+    elif suite == 'pns':
+        print("Running proof-number search benchmarks...")
+        print_results("Proof-Number Search Results", benchmark_proof_number())
+    elif suite == 'parallel':
+        print("Running parallel search benchmarks...")
+        print_results("Parallel Search Results", benchmark_parallel())
+    elif suite == 'lazysmp':
+        print("Running Lazy SMP benchmarks...")
+        print_results("Lazy SMP Results", benchmark_lazy_smp())
+    elif suite == 'mcts':
+        print("Running Monte Carlo Tree Search benchmarks...")
+        print_results("MCTS Results", benchmark_mcts())
+    elif suite == 'batch':
+        print("Running batch evaluation benchmarks...")
+        print_results("Batch Evaluation Results", benchmark_batch_eval())
+    elif suite == 'patterns':
+        print("Running pattern evaluation benchmarks...")
+        print_results("Pattern Evaluation Results", benchmark_patterns())
+    elif suite == 'memory':
+        print("Running memory per game benchmarks...")
+        print_results("Memory Per Game Results", benchmark_memory())
+    elif suite == 'reuse':
+        print("Running search reuse benchmarks...")
+        print_results("Time to Depth on Move N+1", benchmark_reuse())
+        print_results("MCTS Tree Reuse Results", benchmark_mcts_reuse())
+    elif suite == 'store':
+        print("Running game store benchmarks...")
+        print_results("Game Store Memory Results", benchmark_game_store())
+    elif suite == 'pool':
+        print("Running engine pool benchmarks...")
+        print_results("AI Moves In-Process and in the Engine Pool (seconds)", benchmark_engine_pool())
+    elif suite == 'cache':
+        print("Running analysis cache benchmarks...")
+        print_results("Analysis Cache Results", benchmark_analysis_cache())
+    elif suite == 'jobs':
+        print("Running AI move job benchmarks...")
+        print_results("AI Move Latency Under Load (seconds)", benchmark_move_jobs())
+    else:
+        print("Running Gomoku AI Algorithm Benchmarks...")
+        results = run_benchmarks()
+        generate_report(results)
@@ -0,0 +1,231 @@
+"""
+Bitboard board representation for the Gomoku game.
+
+This module provides ``BitboardGomoku``, a drop-in alternative to the
+list-of-lists board used by ``Gomoku``. Each player's stones are stored as a
+single Python integer, so occupancy tests, five-in-a-row detection and the
+window counting behind the evaluation become a handful of shifts and ANDs
+instead of cell-by-cell loops.
+
+Layout: cell (row, col) maps to bit ``row * (board_size + 1) + col``. The
+extra column on the right of every row is always empty and acts as a guard,
+so shifting a board by 1 (horizontal), width (vertical), width + 1 (diagonal)
+or width - 1 (anti-diagonal) never lets a line wrap around the edge.
+
+The backend gives no search speedup. The engines read the incremental state
+that both backends inherit from ``Position`` (window counts, five counts,
+candidate cells and the Zobrist hash), not the board, so a search costs the
+same on either (compare with ``python benchmark.py boards``). Only the
+methods that scan the whole board (``possible_moves``, ``five_in_a_row`` and
+``_evaluate_board``) are faster here.
+"""
+
+from gomoku import Gomoku, LINE_SCORES
+from transposition_table import DEFAULT_SIZE_MB
+
+# Precomputed masks, keyed by board size
+_LAYOUTS = {}
+
+
+def popcount(x):
+    """Return the number of set bits in a non-negative integer."""
+    return bin(x).count("1")
+
+
+def _layout(board_size):
+    """Return the cached (width, full_mask, directions) layout for a board size.
+
+    ``directions`` is a list of (shift, starts) pairs, one per direction, where
+    ``starts`` has a bit set for every cell at which a 5-cell window in that
+    direction begins and stays on the board.
+    """
+    layout = _LAYOUTS.get(board_size)
+    if layout is None:
+        width = board_size + 1
+        full = 0
+        for row in range(board_size):
+            full |= ((1 << board_size) - 1) << (row * width)
+
+        directions = []
+        for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            starts = 0
+            for row in range(board_size):
+                for col in range(board_size):
+                    end_row, end_col = row + 4 * d_row, col + 4 * d_col
+                    if 0 <= end_row < board_size and 0 <= end_col < board_size:
+                        starts |= 1 << (row * width + col)
+            directions.append((d_row * width + d_col, starts))
+
+        layout = (width, full, directions)
+        _LAYOUTS[board_size] = layout
+    return layout
+
+
+def _count_planes(planes):
+    """Bit-sliced addition of up to seven bitboards.
+
+    Returns:
+        tuple: (ones, twos, fours) bitboards holding, for every bit position,
+        the binary digits of how many of the planes have that bit set.
+    """
+    ones = twos = fours = 0
+    for plane in planes:
+        carry = ones & plane
+        ones ^= plane
+        fours |= twos & carry
+        twos ^= carry
+    return ones, twos, fours
+
+
+class BitboardGomoku(Gomoku):
+    """Gomoku with each player's stones stored as an integer bitboard.
+
+    The public contract (``possible_moves``, ``make_move``, ``unmake_move``,
+    ``ttentry``, ``board``) is the same as ``Gomoku``, so instances can be used
+    with ``Negamax``, ``SSS`` and the web API unchanged.
+    """
+
+    def __init__(self, board_size=15, difficulty=3, players=None, ai_algorithm="negamax", candidate_radius=2,
+                 tt_size_mb=DEFAULT_SIZE_MB):
+        """Initialize the game.
+
+        Args:
+            board_size: The size of the board (default: 15x15).
+            difficulty: The difficulty level of the AI (1-5, default: 3).
+            players: A list of two players.
+            ai_algorithm: The AI algorithm to use ("negamax" or "sss").
+            candidate_radius: How far from existing stones ``candidate_moves``
+                looks for moves (default: 2).
+            tt_size_mb: The memory budget of the AI's transposition table.
+        """
+        self.width, self.full_mask, self.directions = _layout(board_size)
+        self.bitboards = [0, 0, 0]  # Indexed by player (index 0 is unused)
+        super().__init__(board_size=board_size, difficulty=difficulty, players=players,
+                         ai_algorithm=ai_algorithm, candidate_radius=candidate_radius,
+                         tt_size_mb=tt_size_mb)
+
+    @property
+    def board(self):
+        """The board as a list of lists (0 = empty, 1 or 2 = player's stone).
+
+        The list is kept in step with the bitboards by ``make_move`` and
+        ``unmake_move`` rather than rebuilt on every access. Writing into it
+        does not change the bitboards; use ``make_move`` or assign a whole
+        board instead.
+        """
+        return self.rows
+
+    @board.setter
+    def board(self, rows):
+        """Load the bitboards from a list of lists and rebuild the tracked state."""
+        width = self.width
+        bitboards = [0, 0, 0]
+        for row, cells in enumerate(rows):
+            for col, cell in enumerate(cells):
+                if cell:
+                    bitboards[cell] |= 1 << (row * width + col)
+        self.bitboards = bitboards
+        self.rows = [list(cells) for cells in rows]
+        # The window counts, hash and candidates the search uses (see Position)
+        self.reset_tracking()
+
+    def _bit(self, move):
+        """Return the bit for a (row, col) move, validating the coordinates."""
+        row, col = move
+        if not (0 <= row < self.board_size and 0 <= col < self.board_size):
+            raise ValueError(f"Move {move} is outside the board")
+        return 1 << (row * self.width + col)
+
+    def possible_moves(self):
+        """Return a list of possible moves (empty cells) as (row, col) tuples."""
+        width = self.width
+        empty = self.full_mask & ~(self.bitboards[1] | self.bitboards[2])
+        moves = []
+        while empty:
+            low = empty & -empty
+            moves.append(divmod(low.bit_length() - 1, width))
+            empty ^= low
+        return moves
+
+    def make_move(self, move):
+        """Apply a move to the board.
+
+        Args:
+            move: A tuple (row, col) representing the position to place the stone.
+        """
+        bit = self._bit(move)
+        if (self.bitboards[1] | self.bitboards[2]) & bit:
+            raise ValueError(f"Cell {move} is already occupied")
+        self.bitboards[self.current_player] |= bit
+        self.rows[move[0]][move[1]] = self.current_player
+        self._add_stone(move[0] * self.board_size + move[1], self.current_player)
+
+    def unmake_move(self, move):
+        """Undo a move from the board.
+
+        Args:
+            move: A tuple (row, col) representing the position to remove the stone from.
+        """
+        bit = self._bit(move)
+        for player in (1, 2):
+            if self.bitboards[player] & bit:
+                self.bitboards[player] &= ~bit
+                self.rows[move[0]][move[1]] = 0
+                self._remove_stone(move[0] * self.board_size + move[1], player)
+                self.current_player = player
+
+    def five_in_a_row(self, opponent):
+        """Check if the opponent has five in a row.
+
+        Args:
+            opponent: The player to check for five in a row (1 or 2).
+
+        Returns:
+            bool: True if the opponent has five in a row, False otherwise.
+        """
+        stones = self.bitboards[opponent]
+        for shift, _ in self.directions:
+            # Keep bits that start a run of 2, then 4, then 5 stones
+            run = stones & (stones >> shift)
+            run &= run >> (2 * shift)
+            if run & (stones >> (4 * shift)):
+                return True
+        return False
+
+    def _evaluate_board(self, player):
+        """Evaluate the board for a specific player.
+
+        Produces the same value as the list-of-lists implementation: every
+        5-cell window holding stones of only one player scores
+        ``LINE_SCORES[count]`` for that player (negated for the opponent).
+
+        Args:
+            player: The player to evaluate the board for (1 or 2).
+
+        Returns:
+            int: The score for the player.
+        """
+        own, other = self.bitboards[player], self.bitboards[3 - player]
+        score = 0
+        for shift, starts in self.directions:
+            own_planes = [own >> (k * shift) for k in range(5)]
+            other_planes = [other >> (k * shift) for k in range(5)]
+            own_any = own_planes[0] | own_planes[1] | own_planes[2] | own_planes[3] | own_planes[4]
+            other_any = other_planes[0] | other_planes[1] | other_planes[2] | other_planes[3] | other_planes[4]
+
+            for planes, pure, sign in ((own_planes, starts & own_any & ~other_any, 1),
+                                       (other_planes, starts & other_any & ~own_any, -1)):
+                if not pure:
+                    continue
+                ones, twos, fours = _count_planes(planes)
+                ones &= pure
+                twos &= pure
+                fours &= pure
+                score += sign * (
+                    LINE_SCORES[1] * popcount(ones & ~twos & ~fours)
+                    + LINE_SCORES[2] * popcount(twos & ~ones & ~fours)
+                    + LINE_SCORES[3] * popcount(ones & twos)
+                    + LINE_SCORES[4] * popcount(fours & ~ones)
+                    + LINE_SCORES[5] * popcount(fours & ones)
+                )
+        return score
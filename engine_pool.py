@@ -0,0 +1,409 @@
+"""
+A pool of long-lived AI engine processes shared by all the web games.
+
+Every web game used to build its own engine, and every search ran in the
+web server's process: under the GIL, two AI moves searched at the same time
+simply took turns. ``EnginePool`` starts its worker processes once (one per
+core by default) and sends each search to a free worker as a compact
+position (``parallel_search.encode_position``) plus the search parameters;
+the worker returns the move. The web process only keeps the games.
+
+Every worker keeps its engines between searches, keyed by algorithm and
+depth, and all its alpha-beta engines share one transposition table of
+``tt_size_mb``: the tables and move ordering stay warm from one move (and
+one game) to the next, and the memory of the AI is bounded by the number of
+workers rather than the number of games.
+
+A search reports every completed depth through a queue back to the web
+process, and can be stopped early (it then returns its best move so far)
+through a shared array holding, for every worker, the id of the task to
+stop. The pool records how long searches wait for a free worker and how
+busy the workers are. Given an ``analysis_cache.AnalysisCache``, it answers
+the positions already searched (by any game) without a worker.
+"""
+
+import os
+import time
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from gomoku import Negamax, PVS, SSS, MCTS, ProofNumberSearch, ThreatSearch
+from proof_number import PROVED
+from move_jobs import LatencyStats
+from parallel_search import encode_position, decode_position
+from transposition_table import BoundedTranspositionTable, table_capacity, ENTRY_BYTES
+
+# The algorithms a worker can run; the others ("parallel", "lazysmp") would start
+# processes of their own, so they run as Negamax (the pool is the parallelism)
+ALGORITHMS = ('negamax', 'pvs', 'sss', 'pns', 'mcts')
+
+# Per-process state of a worker (set by _init_worker)
+_worker = {}
+
+
+def progress_event(result):
+    """Describe a completed search depth (a SearchResult) for the client."""
+    return {
+        'depth': result.depth,
+        'move': {'row': result.move[0], 'col': result.move[1]},
+        'score': result.score,
+        'pv': [{'row': row, 'col': col} for row, col in result.pv],
+        'nodes': result.nodes,
+        'nps': int(result.nodes / result.elapsed) if result.elapsed > 0 else 0,
+        'elapsed': result.elapsed
+    }
+
+
+def _init_worker(events, stop, counter, tt_size_mb, board_sizes):
+    """Take a worker index and build the worker's table and board tables."""
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    _worker.update(events=events, stop=stop, index=index, task=None, engines={},
+                   tt=BoundedTranspositionTable(size_mb=tt_size_mb))
+    _worker['threats'] = _stoppable(ThreatSearch())
+    # Building a position builds (and caches) the neighbour, hash and window tables
+    for board_size in board_sizes:
+        decode_position((board_size, (), 1))
+
+
+def _ready():
+    """Return the worker's index (used to start every worker up front)."""
+    return _worker['index']
+
+
+def _stopped():
+    """Return True if the pool asked to stop the worker's current task."""
+    return _worker['task'] is not None and _worker['stop'][_worker['index']] == _worker['task']
+
+
+def _stoppable(engine):
+    """Make an engine also time out when the pool stops the current task."""
+    is_timeout = engine.is_timeout
+    engine.is_timeout = lambda: _stopped() or is_timeout()
+    return engine
+
+
+def _engine(algorithm, depth):
+    """Return the worker's engine for an algorithm and depth, creating it on first use."""
+    if algorithm not in ALGORITHMS:
+        algorithm = 'negamax'
+    key = (algorithm, depth)
+    engine = _worker['engines'].get(key)
+    if engine is None:
+        tt = _worker['tt']
+        if algorithm == 'sss':
+            engine = SSS(depth=depth, tt=tt)
+        elif algorithm == 'pns':
+            # Prove forced wins by threats, otherwise play the Negamax move
+            fallback = _stoppable(Negamax(depth=depth, tt=tt))
+            engine = ProofNumberSearch(timeout=2, threats_only=True, fallback=fallback)
+        elif algorithm == 'mcts':
+            engine = MCTS(max_playouts=depth * 2000)
+        elif algorithm == 'pvs':
+            engine = PVS(depth=depth, tt=tt)
+        else:
+            engine = Negamax(depth=depth, tt=tt)
+        _worker['engines'][key] = engine = _stoppable(engine)
+    return engine
+
+
+def _search_move(task_id, position, algorithm, depth, timeout, threat_search):
+    """Search a move in a worker.
+
+    Args:
+        task_id: The pool's id of the search.
+        position: The position (see ``parallel_search.encode_position``).
+        algorithm: The algorithm (one of ``ALGORITHMS``).
+        depth: The maximum depth (for MCTS: thousands of playouts).
+        timeout: The maximum time (in seconds) to spend on the move.
+        threat_search: Look for a forced win by continuous threats first.
+
+    Returns:
+        dict: The move, the depth (for a proven win: the length of its
+        line), score and node count of the search, whether it ran to its end
+        (and was not answered from the cache), the worker's index, and when
+        the search started and how long it took.
+    """
+    events, index = _worker['events'], _worker['index']
+    started = time.time()
+    _worker['task'] = task_id
+    events.put((task_id, 'started', (index, started)))
+    engine = _engine(algorithm, depth)
+    # The proof-number search has its own (short) timeout; its fallback gets the move's
+    searcher = getattr(engine, 'fallback', None) or engine
+    searcher.timeout = timeout
+    driver = getattr(searcher, 'driver', None)
+    if driver is not None:
+        driver.progress = lambda result: events.put((task_id, 'depth', progress_event(result)))
+    try:
+        game = decode_position(position)
+        threats = _worker['threats']
+        move = threats(game) if threat_search else None
+        if move is not None:
+            # A forced win found by the threat search is final
+            depth, score, nodes, complete = 0, None, threats.stats['nodes'], True
+        else:
+            if driver is not None:
+                # A proof-number win never asks the fallback: don't report its previous search
+                driver.result = None
+            move = engine(game)
+            proof = engine.result if engine is not searcher else None
+            result = driver.result if driver is not None else None
+            if proof is not None and proof['status'] == PROVED and proof['line']:
+                depth, score, nodes, complete = len(proof['line']), None, proof['nodes'], True
+            else:
+                depth = result.depth if result is not None else 0
+                score = result.score if result is not None else None
+                nodes = getattr(searcher, 'stats', {}).get('nodes', 0)
+                complete = result is not None and not getattr(searcher, 'timed_out', True)
+                if proof is not None:
+                    nodes += proof['nodes']
+        return {
+            'move': move,
+            'depth': depth,
+            'score': score,
+            'nodes': nodes,
+            'complete': complete,
+            'cached': False,
+            'worker': index,
+            'started': started,
+            'elapsed': time.time() - started,
+        }
+    finally:
+        if driver is not None:
+            driver.progress = None
+        _worker['task'] = None
+        # Sent after every progress event of the task, so the pool knows they all arrived
+        events.put((task_id, 'done', None))
+
+
+class PoolTask:
+    """One search sent to an ``EnginePool``."""
+
+    def __init__(self, task_id, progress=None):
+        """Initialize the task.
+
+        Args:
+            task_id: The pool's id of the task.
+            progress: A function called with the event of every completed depth.
+        """
+        self.id = task_id
+        self.progress = progress
+        self.submitted = time.time()
+        self.started = None
+        self.worker = None
+        self.stop_requested = False
+        self.future = None
+        self.search = None  # (position, algorithm, depth, threat_search)
+        self.drained = threading.Event()  # Set once all the task's events were handled
+        self.recorded = threading.Event()  # Set once the pool counted the finished task
+
+    def result(self, timeout=None):
+        """Wait for the search and return its result (see ``_search_move``).
+
+        Raises:
+            concurrent.futures.CancelledError: If the task was stopped before it started.
+        """
+        result = self.future.result(timeout)
+        # The last progress events may still be on their way, and the future's
+        # callbacks run after it wakes its waiters
+        self.drained.wait(5)
+        self.recorded.wait(5)
+        return result
+
+
+class EnginePool:
+    """A pool of engine processes, searching the moves of every game."""
+
+    def __init__(self, workers=None, tt_size_mb=64, board_sizes=(15,), cache=None):
+        """Initialize the pool.
+
+        Args:
+            workers: The number of worker processes (default: one per core).
+            tt_size_mb: The memory budget of each worker's transposition table.
+            board_sizes: The board sizes whose tables the workers build up front.
+            cache: An ``analysis_cache.AnalysisCache`` answering the searches
+                it already holds and keeping the completed ones (or None).
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.tt_size_mb = tt_size_mb
+        self.board_sizes = tuple(board_sizes)
+        self.cache = cache
+        self.executor = None
+        self.events = None
+        self.stop_flags = None
+        self.listener = None
+        self.ids = itertools.count(1)
+        self.tasks = {}  # task id -> unfinished PoolTask
+        self.lock = threading.Lock()
+        self.start_lock = threading.Lock()  # Held while the workers start or shut down
+        self.started = None
+        self.busy_seconds = [0.0] * self.workers
+        self.task_counts = [0] * self.workers
+        self.counts = {'completed': 0, 'stopped': 0, 'cancelled': 0, 'failed': 0, 'cached': 0}
+        self.wait_times = LatencyStats()  # Submission to the start of the search
+        self.search_times = LatencyStats()
+
+    def start(self):
+        """Start the worker processes (done on the first search) and wait until they are ready."""
+        with self.start_lock:
+            if self.executor is not None:
+                return
+            self.events = multiprocessing.Queue()
+            self.stop_flags = multiprocessing.Array('q', self.workers, lock=False)
+            counter = multiprocessing.Value('i', 0)
+            executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                           initargs=(self.events, self.stop_flags, counter,
+                                                     self.tt_size_mb, self.board_sizes))
+            self.listener = threading.Thread(target=self._listen, name='engine-pool-events', daemon=True)
+            self.listener.start()
+            for future in [executor.submit(_ready) for _ in range(self.workers)]:
+                future.result()
+            self.started = time.time()
+            # Published last: a concurrent first search waits on the lock until the workers are ready
+            self.executor = executor
+
+    def close(self):
+        """Stop the running searches and shut the workers down."""
+        with self.start_lock:
+            if self.executor is None:
+                return
+            with self.lock:
+                tasks = list(self.tasks.values())
+            for task in tasks:
+                self.stop(task)
+            self.executor.shutdown(cancel_futures=True)
+            self.events.put(None)
+            self.listener.join()
+            self.executor = None
+
+    def submit(self, game, algorithm='negamax', depth=3, timeout=10, threat_search=True, progress=None):
+        """Queue the search of a game's move.
+
+        Args:
+            game: The game (or position), with the AI to move.
+            algorithm: The algorithm (see ``ALGORITHMS``).
+            depth: The maximum depth.
+            timeout: The maximum time (in seconds) to spend on the move.
+            threat_search: Look for a forced win by continuous threats first.
+            progress: A function called with the event of every completed depth.
+
+        Returns:
+            PoolTask: The task; ``task.result()`` waits for the move.
+        """
+        self.start()
+        task = PoolTask(next(self.ids), progress)
+        position = encode_position(game)
+        task.search = (position, algorithm, depth, threat_search)
+        cached = self.cache.get(*task.search) if self.cache is not None else None
+        if cached is not None:
+            # Answered without a worker
+            task.future = Future()
+            task.future.set_result(dict(cached, nodes=0, complete=True, cached=True, worker=None,
+                                        started=task.submitted, elapsed=0.0))
+            task.drained.set()
+            task.recorded.set()
+            with self.lock:
+                self.counts['cached'] += 1
+            return task
+        with self.lock:
+            self.tasks[task.id] = task
+            task.future = self.executor.submit(_search_move, task.id, position, algorithm, depth, timeout,
+                                               threat_search)
+        task.future.add_done_callback(lambda future: self._finish(task))
+        return task
+
+    def stop(self, task, cancel=True):
+        """Stop a task: a running one returns its best move so far.
+
+        Args:
+            task: The task.
+            cancel: Cancel the task if it has not started (its ``result()``
+                then raises ``CancelledError``). Otherwise a queued task still
+                starts, and stops at once with the first move it tries.
+
+        Returns:
+            bool: True if the task had not finished.
+        """
+        if cancel and task.future.cancel():
+            return True
+        with self.lock:
+            if task.future.done():
+                return False
+            task.stop_requested = True
+            if task.worker is not None:
+                self.stop_flags[task.worker] = task.id
+        return True
+
+    def _listen(self):
+        """Handle the workers' events (in a thread of the web process)."""
+        while True:
+            message = self.events.get()
+            if message is None:
+                return
+            task_id, kind, data = message
+            with self.lock:
+                task = self.tasks.get(task_id)
+                if task is not None and kind == 'started':
+                    task.worker, task.started = data
+                    # Stopped while it was queued, but too late to cancel it
+                    if task.stop_requested:
+                        self.stop_flags[task.worker] = task.id
+            if task is None:
+                continue
+            if kind == 'depth' and task.progress is not None:
+                task.progress(data)
+            elif kind == 'done':
+                with self.lock:
+                    task.drained.set()
+                    if task.future.done():
+                        self.tasks.pop(task_id, None)
+
+    def _finish(self, task):
+        """Record the end of a task."""
+        future = task.future
+        with self.lock:
+            if future.cancelled() or future.exception() is not None:
+                self.counts['cancelled' if future.cancelled() else 'failed'] += 1
+                task.drained.set()
+                self.tasks.pop(task.id, None)
+                task.recorded.set()
+                return
+            # The task is forgotten once its last event arrived too (see _listen)
+            if task.drained.is_set():
+                self.tasks.pop(task.id, None)
+            result = future.result()
+            self.counts['stopped' if task.stop_requested else 'completed'] += 1
+            self.busy_seconds[result['worker']] += result['elapsed']
+            self.task_counts[result['worker']] += 1
+        self.wait_times.record(max(result['started'] - task.submitted, 0.0))
+        self.search_times.record(result['elapsed'])
+        if self.cache is not None and result['complete'] and not task.stop_requested:
+            self.cache.put(*task.search, result['move'], result['score'], result['depth'])
+        task.recorded.set()
+
+    def stats(self):
+        """Return the pool's load, task counts, utilisation and queue wait percentiles."""
+        with self.lock:
+            unfinished = [task for task in self.tasks.values() if not task.future.done()]
+            running = sum(task.worker is not None for task in unfinished)
+            # The tables allocate their budget rounded down to a power-of-two bucket count
+            stats = {'workers': self.workers, 'ttMbPerWorker': self.tt_size_mb,
+                     'ttBytes': self.workers * table_capacity(self.tt_size_mb) * ENTRY_BYTES,
+                     'queued': len(unfinished) - running, 'running': running}
+            stats.update(self.counts)
+            busy = list(self.busy_seconds)
+            tasks = list(self.task_counts)
+        uptime = time.time() - self.started if self.started is not None else 0.0
+        stats['uptime'] = uptime
+        # The share of the workers' time spent searching since the pool started
+        stats['utilisation'] = sum(busy) / (uptime * self.workers) if uptime > 0 else 0.0
+        stats['perWorker'] = [{'tasks': count, 'busySeconds': seconds,
+                               'utilisation': seconds / uptime if uptime > 0 else 0.0}
+                              for count, seconds in zip(tasks, busy)]
+        stats['queueWait'] = self.wait_times.summary()
+        stats['searchTime'] = self.search_times.summary()
+        return stats
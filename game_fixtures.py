@@ -0,0 +1,42 @@
+"""
+Helpers shared by the test scripts.
+"""
+
+from gomoku import Gomoku
+
+def setup(board_size, black, white, to_move=1, game_class=Gomoku, **kwargs):
+    """Create a game with the given stones and player to move.
+
+    Args:
+        board_size: The size of the board.
+        black: The moves of player 1.
+        white: The moves of player 2.
+        to_move: The player to move.
+        game_class: The class to create (``Gomoku``, or ``Position`` for a
+            bare position).
+        **kwargs: Passed on to ``game_class`` (e.g. ``difficulty``).
+    """
+    game = game_class(board_size=board_size, **kwargs)
+    for player, stones in ((1, black), (2, white)):
+        game.current_player = player
+        for move in stones:
+            game.make_move(move)
+    game.current_player = to_move
+    return game
+
+def play(board_size, moves):
+    """Create a game by playing moves alternately, player 1 first."""
+    game = Gomoku(board_size=board_size)
+    for move in moves:
+        game.make_move(move)
+        game.switch_player()
+    return game
+
+def replay_wins(game, line):
+    """Play a winning line and check that it ends with the attacker's five."""
+    attacker = game.current_player
+    for move in line:
+        assert move in game.possible_moves()
+        game.make_move(move)
+        game.switch_player()
+    return game.is_over() and game.lose() and game.current_player == 3 - attacker
@@ -0,0 +1,205 @@
+"""
+A bounded store for the web server's games.
+
+Every game of the web API used to live in a dictionary that only grew, so a
+long-running server kept every game (and its AI's transposition table)
+until it was restarted. ``GameStore`` bounds it:
+
+- ids are random (``uuid4``), so they never collide and cannot be guessed
+  from the number of games;
+- a game idle for longer than ``ttl`` seconds is evicted;
+- beyond ``max_games`` games, the least recently used ones are evicted;
+- every game reserves its AI's transposition table budget
+  (``Gomoku.tt_size_mb``, or nothing for a game created with its own
+  players and no table) when it is added, and the least recently used
+  games are evicted to keep the reserved total under ``max_tt_mb``.
+
+The AI players (and their table) are only allocated at the first AI move,
+so ``stats`` reports both the reserved and the allocated table memory.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+MB = 1024 * 1024
+
+
+def ai_engine(game):
+    """Return the search engine of a game's AI player, or None (no AI player, or not created yet)."""
+    if not getattr(game, 'has_players', True):
+        return None
+    ai_player = game.players[1]
+    return getattr(ai_player, 'AI_algo', None) or getattr(ai_player, 'SSS_algo', None)
+
+
+def tt_memory(game):
+    """Return the bytes allocated by the transposition table of a game's AI (0 before its first move)."""
+    engine = ai_engine(game)
+    # The proof-number search keeps its table in the fallback engine
+    engine = getattr(engine, 'fallback', None) or engine
+    tt = getattr(engine, 'tt', None)
+    if tt is not None and hasattr(tt, 'memory_bytes'):
+        return tt.memory_bytes()
+    return 0
+
+
+class GameStore:
+    """Games by id, with least-recently-used and idle-time eviction."""
+
+    def __init__(self, max_games=1000, ttl=3600, max_tt_mb=512, on_evict=None, clock=time.monotonic):
+        """Initialize the store.
+
+        Args:
+            max_games: The maximum number of games kept.
+            ttl: The number of seconds a game may stay idle (None: no limit).
+            max_tt_mb: The maximum transposition table memory reserved by
+                all the games together, in megabytes.
+            on_evict: A function called with ``(game_id, game, reason)`` for
+                every evicted game (e.g. to cancel its pending AI move).
+            clock: The time function (seconds).
+        """
+        self.max_games = max_games
+        self.ttl = ttl
+        self.max_tt_mb = max_tt_mb
+        self.on_evict = on_evict
+        self.clock = clock
+        self.games = OrderedDict()  # game id -> game, least recently used first
+        self.last_used = {}  # game id -> clock() of the last access
+        self.reservations = {}  # game id -> transposition table bytes reserved
+        self.reserved = 0  # Their total
+        self.evictions = {'idle': 0, 'games': 0, 'memory': 0}
+        self.lock = threading.Lock()
+
+    def reservation(self, game):
+        """Return the transposition table bytes a game reserves."""
+        if getattr(game, 'has_players', False):
+            return tt_memory(game)
+        return int(getattr(game, 'tt_size_mb', 0) * MB)
+
+    def add(self, game):
+        """Store a new game and return its id, evicting other games to make room.
+
+        Raises:
+            ValueError: If the game alone needs more table memory than ``max_tt_mb``.
+        """
+        reservation = self.reservation(game)
+        if reservation > self.max_tt_mb * MB:
+            raise ValueError(f"A game needs {reservation / MB:.1f} MB of transposition table, "
+                             f"more than the {self.max_tt_mb} MB of the store")
+        game_id = uuid.uuid4().hex
+        with self.lock:
+            evicted = self._evict_idle()
+            evicted += self._make_room(reservation)
+            self._put(game_id, game, reservation)
+        self._notify(evicted)
+        return game_id
+
+    def get(self, game_id):
+        """Return a game (marking it as used), or None if it is unknown or was evicted."""
+        with self.lock:
+            evicted = self._evict_idle()
+            game = self.games.get(game_id)
+            if game is not None:
+                self.games.move_to_end(game_id)
+                self.last_used[game_id] = self.clock()
+        self._notify(evicted)
+        return game
+
+    def replace(self, game_id, game):
+        """Put a new game under an existing id (e.g. on reset).
+
+        Returns:
+            bool: False if the id is unknown.
+        """
+        reservation = self.reservation(game)
+        with self.lock:
+            if game_id not in self.games:
+                return False
+            self._pop(game_id)
+            evicted = self._make_room(reservation)
+            self._put(game_id, game, reservation)
+        self._notify(evicted)
+        return True
+
+    def remove(self, game_id):
+        """Remove a game; return it, or None if it was unknown."""
+        with self.lock:
+            if game_id not in self.games:
+                return None
+            return self._pop(game_id)
+
+    def __contains__(self, game_id):
+        with self.lock:
+            return game_id in self.games
+
+    def __len__(self):
+        with self.lock:
+            return len(self.games)
+
+    def evict_idle(self):
+        """Evict the games idle for longer than ``ttl``; return how many were evicted."""
+        with self.lock:
+            evicted = self._evict_idle()
+        self._notify(evicted)
+        return len(evicted)
+
+    def _evict_idle(self):
+        """Pop the idle games (called with the lock held)."""
+        evicted = []
+        if self.ttl is None:
+            return evicted
+        now = self.clock()
+        # The least recently used games come first, so the idle ones are at the front
+        while self.games:
+            game_id = next(iter(self.games))
+            if now - self.last_used[game_id] <= self.ttl:
+                break
+            evicted.append(self._evict(game_id, 'idle'))
+        return evicted
+
+    def _make_room(self, reservation):
+        """Pop the least recently used games until a new one fits (called with the lock held)."""
+        evicted = []
+        while self.games and len(self.games) >= self.max_games:
+            evicted.append(self._evict(next(iter(self.games)), 'games'))
+        while self.games and self.reserved + reservation > self.max_tt_mb * MB:
+            evicted.append(self._evict(next(iter(self.games)), 'memory'))
+        return evicted
+
+    def _put(self, game_id, game, reservation):
+        """Store a game as the most recently used (called with the lock held)."""
+        self.games[game_id] = game
+        self.last_used[game_id] = self.clock()
+        self.reservations[game_id] = reservation
+        self.reserved += reservation
+
+    def _pop(self, game_id):
+        """Remove a game and release its reservation (called with the lock held)."""
+        del self.last_used[game_id]
+        self.reserved -= self.reservations.pop(game_id)
+        return self.games.pop(game_id)
+
+    def _evict(self, game_id, reason):
+        """Remove a game for eviction (called with the lock held)."""
+        self.evictions[reason] += 1
+        return game_id, self._pop(game_id), reason
+
+    def _notify(self, evicted):
+        """Call ``on_evict`` for the evicted games (outside the lock)."""
+        if self.on_evict is not None:
+            for game_id, game, reason in evicted:
+                self.on_evict(game_id, game, reason)
+
+    def stats(self):
+        """Return the number of games, their memory and the eviction counts."""
+        with self.lock:
+            games = list(self.games.values())
+            stats = {'games': len(games), 'maxGames': self.max_games, 'ttlSeconds': self.ttl,
+                     'ttReservedBytes': self.reserved, 'maxTtBytes': int(self.max_tt_mb * MB),
+                     'evictions': dict(self.evictions)}
+        stats['ttAllocatedBytes'] = sum(tt_memory(game) for game in games)
+        # Games whose AI engine lives in this process (web games search in the engine pool)
+        stats['gamesWithAi'] = sum(ai_engine(game) is not None for game in games)
+        return stats
@@ -1,27 +1,71 @@
 from easyAI import TwoPlayerGame, Negamax as EasyAI_Negamax, Human_Player as EasyAI_Human_Player, AI_Player as EasyAI_AI_Player
-from easyAI.AI.TranspositionTable import TranspositionTable
+from easyAI.AI.Negamax import LOWERBOUND, EXACT, UPPERBOUND
 import time
 import random
 
 # Import SSS* algorithm
 from sss_algorithm import SSS
+from move_ordering import MoveOrdering
+from transposition_table import BoundedTranspositionTable, DEFAULT_SIZE_MB
+from iterative_deepening import IterativeDeepening
+from threat_search import ThreatSearch
+from proof_number import ProofNumberSearch
+from mcts import MCTS
+from batch_eval import evaluate_children
+from position import Position, LINE_SCORES, LINE_TABLES, neighbour_table, zobrist_keys, window_tables
 
 class Negamax(EasyAI_Negamax):
     """Negamax algorithm with alpha-beta pruning, transposition tables, and iterative deepening."""
 
-    def __init__(self, depth, scoring=None, win_score=100000, tt=None, timeout=None):
+    # Search the moves after the first with a null window (see PVS)
+    null_window = False
+
+    def __init__(self, depth, scoring=None, win_score=100000, tt=None, timeout=None, neighbourhood=True,
+                 ordering=True, batch_leaves=False, reuse=True):
         """Initialize the Negamax algorithm.
 
         Args:
             depth: The maximum depth of the search tree.
             scoring: A function that returns a score for a given game state.
             win_score: The score for a winning position.
-            tt: A transposition table.
+            tt: A transposition table (default: a ``BoundedTranspositionTable``).
             timeout: The maximum time (in seconds) to spend on a move.
+            neighbourhood: Search only the empty cells near existing stones
+                (``game.candidate_moves()``) instead of every empty cell.
+            ordering: Order moves by tactical value, killers and history
+                (True, or a ``MoveOrdering`` instance). With False only the
+                transposition table move is tried first.
+            batch_leaves: Score all the children of a node at depth 1 in one
+                vectorised call (see ``batch_eval``) instead of one by one.
+                Ignored with a custom ``scoring`` function.
+            reuse: Carry the search state over to the next move: the
+                transposition table and history scores are aged rather than
+                cleared, and the last principal variation seeds the next
+                search. With False every search starts cold.
         """
-        super().__init__(depth, scoring, win_score, tt if tt is not None else TranspositionTable())
+        super().__init__(depth, scoring, win_score, tt if tt is not None else BoundedTranspositionTable())
         self.timeout = timeout
+        self.neighbourhood = neighbourhood
+        if ordering is True:
+            ordering = MoveOrdering()
+        self.ordering = ordering or None
+        self.batch_leaves = batch_leaves and scoring is None
+        self.reuse = reuse
         self.start_time = None
+        self.timed_out = False
+        self.pv_hints = {}  # position key -> move, from the previous iteration's PV
+        self.driver = IterativeDeepening(self)
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the per-search statistics."""
+        self.stats = {'nodes': 0, 'cutoffs': 0, 'first_move_cutoffs': 0, 'researches': 0}
+
+    def first_move_cutoff_rate(self):
+        """Return the fraction of beta cutoffs caused by the first move searched."""
+        if not self.stats['cutoffs']:
+            return 0.0
+        return self.stats['first_move_cutoffs'] / self.stats['cutoffs']
 
     def is_timeout(self):
         """Check if the timeout has been reached."""
@@ -29,9 +73,73 @@ class Negamax(EasyAI_Negamax):
             return False
         return time.time() - self.start_time > self.timeout
 
+    def start_search(self):
+        """Prepare for a new search: start the clock and reset the per-search state.
+
+        With ``reuse`` the transposition table and history scores are kept
+        (they only age), so results from earlier moves of the game can still
+        be used; otherwise they are cleared.
+        """
+        self.start_time = time.time()
+        self.timed_out = False
+        self.reset_stats()
+        if not self.reuse:
+            if self.ordering is not None:
+                self.ordering.clear()
+            if hasattr(self.tt, 'clear'):
+                self.tt.clear()
+            return
+        if self.ordering is not None:
+            self.ordering.age()
+        if hasattr(self.tt, 'new_search'):
+            self.tt.new_search()
+
+    def iteration(self, game, depth, previous=None):
+        """Run one iteration of iterative deepening with a full window.
+
+        Args:
+            game: The game instance.
+            depth: The depth of this iteration.
+            previous: The score of the previous iteration (unused here).
+
+        Returns:
+            tuple: A tuple (score, move).
+        """
+        return self.search(game, depth, -self.win_score, self.win_score)
+
+    def moves(self, game):
+        """Return the moves to search in the current position."""
+        if self.neighbourhood:
+            return game.candidate_moves()
+        return game.possible_moves()
+
+    def ordered_moves(self, game, moves, depth, tt_move=None):
+        """Yield the moves in search order.
+
+        The transposition table move comes first; the remaining moves are only
+        ordered if it does not cause a cutoff, which saves most of the
+        ordering work at well-ordered nodes.
+        """
+        if tt_move in moves:
+            yield tt_move
+            moves.remove(tt_move)
+        if self.ordering is not None:
+            moves = self.ordering.order(game, moves, depth)
+        yield from moves
+
+    def leaf_values(self, game, moves):
+        """Return the best (value, move) of a depth-1 node from one batch evaluation of its children."""
+        self.stats['nodes'] += len(moves)
+        values = -evaluate_children(game, moves)
+        index = int(values.argmax())
+        return float(values[index]), moves[index]
+
     def search(self, game, depth, alpha, beta):
         """Search the game tree using the Negamax algorithm with alpha-beta pruning.
 
+        The search follows easyAI's negamax (same transposition table entries
+        and depth bonus for quicker wins) but draws its moves from ``moves``.
+
         Args:
             game: The game instance.
             depth: The current depth in the search tree.
@@ -43,54 +151,190 @@ class Negamax(EasyAI_Negamax):
         """
         # Check if timeout has been reached
         if self.is_timeout():
+            self.timed_out = True
             return -self.win_score, None
 
-        return super().search(game, depth, alpha, beta)
+        self.stats['nodes'] += 1
+        alpha_orig = alpha
+        lookup = None if self.tt is None else self.tt.lookup(game)
+        if lookup is not None and lookup['depth'] >= depth:
+            flag, value = lookup['flag'], lookup['value']
+            if flag == EXACT:
+                return value, lookup['move']
+            elif flag == LOWERBOUND:
+                alpha = max(alpha, value)
+            elif flag == UPPERBOUND:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value, lookup['move']
+
+        if depth == 0 or game.is_over():
+            score = self.scoring(game) if self.scoring else game.scoring()
+            # Quicker wins (and slower defeats) are worth more
+            return score * (1 + 0.001 * depth), None
+
+        moves = self.moves(game)
+        if lookup is not None:
+            tt_move = lookup['move']
+        else:
+            tt_move = self.pv_hints.get(game.ttentry()) if self.pv_hints else None
+
+        if depth == 1 and self.batch_leaves:
+            # The children are leaves: score them all at once
+            best_value, best_move = self.leaf_values(game, moves)
+            ordered = ()
+        else:
+            best_value, best_move = -float('inf'), moves[0]
+            ordered = self.ordered_moves(game, moves, depth, tt_move)
+        for index, move in enumerate(ordered):
+            game.make_move(move)
+            game.switch_player()
+            if index and self.null_window:
+                # Principal variation search: first try to show the move is no better than alpha
+                value = -self.search(game, depth - 1, -alpha - 1, -alpha)[0]
+                if alpha < value < beta:
+                    self.stats['researches'] += 1
+                    value = -self.search(game, depth - 1, -beta, -alpha)[0]
+            else:
+                value = -self.search(game, depth - 1, -beta, -alpha)[0]
+            game.unmake_move(move)
+
+            if value > best_value:
+                best_value, best_move = value, move
+            if value > alpha:
+                alpha = value
+                if alpha >= beta:
+                    self.stats['cutoffs'] += 1
+                    if index == 0:
+                        self.stats['first_move_cutoffs'] += 1
+                    if self.ordering is not None:
+                        self.ordering.record_cutoff(move, depth)
+                    break
+
+        # Results from an interrupted search are not reliable
+        if self.tt is not None and not self.timed_out:
+            if best_value <= alpha_orig:
+                flag = UPPERBOUND
+            elif best_value >= beta:
+                flag = LOWERBOUND
+            else:
+                flag = EXACT
+            self.tt.store(game=game, depth=depth, value=best_value, move=best_move, flag=flag)
+        return best_value, best_move
 
     def __call__(self, game):
         """Call the Negamax algorithm to get the best move using iterative deepening.
 
+        Each iteration reuses the transposition table and tries the previous
+        iteration's principal variation first. The result of the deepest
+        completed iteration (including its PV) is kept in ``self.result``.
+
         Args:
             game: The game instance.
 
         Returns:
             The best move.
         """
-        self.start_time = time.time()
-        best_move = None
-        best_score = float('-inf')
-        timed_out = False
-        # Iterative deepening: try increasing depths until timeout or max depth
-        for d in range(1, self.depth + 1):
-            if self.is_timeout():
-                timed_out = True
-                break
-            # Temporarily set self.depth for parent's __call__
-            old_depth = self.depth
-            self.depth = d
-            move = super().__call__(game)
-            self.depth = old_depth
-            if not self.is_timeout() and move is not None:
-                best_move = move
-            elif self.is_timeout():
-                timed_out = True
-                break
-        if timed_out:
+        best_move = self.driver(game)
+        if self.timed_out:
             print("\033[1;35m[AI Notice] AI timed out and played the best move found so far.\033[0m")
+        if self.result is not None:
+            self.alpha = self.result.score
         return best_move
 
+    @property
+    def result(self):
+        """The SearchResult (move, score, depth, pv, nodes, elapsed) of the last search."""
+        return self.driver.result
+
+class PVS(Negamax):
+    """Principal variation search with aspiration windows.
+
+    Every move after the first is searched with a null window, which only
+    proves that it is no better than the best move so far; the rare move that
+    fails high is searched again with the full window. Each iteration of the
+    iterative deepening starts from a narrow window around the previous
+    iteration's score and widens it when the score falls outside.
+    """
+
+    null_window = True
+
+    def __init__(self, depth, scoring=None, win_score=100000, tt=None, timeout=None, neighbourhood=True,
+                 ordering=True, window=50, batch_leaves=False, reuse=True):
+        """Initialize the search.
+
+        Args:
+            depth: The maximum depth of the search tree.
+            scoring: A function that returns a score for a given game state.
+            win_score: The score for a winning position.
+            tt: A transposition table (default: a ``BoundedTranspositionTable``).
+            timeout: The maximum time (in seconds) to spend on a move.
+            neighbourhood: Search only the empty cells near existing stones.
+            ordering: Order moves by tactical value, killers and history.
+            window: The half-width of the first aspiration window (None
+                searches every iteration with the full window).
+            batch_leaves: Score the children of depth-1 nodes in one call.
+            reuse: Carry the table, history scores and principal variation
+                over to the next move (False: every search starts cold).
+        """
+        super().__init__(depth, scoring, win_score, tt, timeout, neighbourhood, ordering, batch_leaves, reuse)
+        self.window = window
+
+    def reset_stats(self):
+        """Reset the per-search statistics."""
+        super().reset_stats()
+        self.stats.update({'fail_highs': 0, 'fail_lows': 0})
+
+    def iteration(self, game, depth, previous=None):
+        """Run one iteration of iterative deepening inside an aspiration window.
+
+        Args:
+            game: The game instance.
+            depth: The depth of this iteration.
+            previous: The score of the previous iteration (None for the first).
+
+        Returns:
+            tuple: A tuple (score, move).
+        """
+        full_alpha, full_beta = -self.win_score, self.win_score
+        if previous is None or not self.window:
+            return self.search(game, depth, full_alpha, full_beta)
+        delta = self.window
+        alpha, beta = max(previous - delta, full_alpha), min(previous + delta, full_beta)
+        while True:
+            score, move = self.search(game, depth, alpha, beta)
+            if self.timed_out:
+                return score, move
+            if score <= alpha and alpha > full_alpha:
+                self.stats['fail_lows'] += 1
+            elif score >= beta and beta < full_beta:
+                self.stats['fail_highs'] += 1
+            else:
+                return score, move
+            # Widen the window on the side that failed, four times as far each time
+            delta *= 4
+            if score <= alpha:
+                alpha = max(score - delta, full_alpha)
+            else:
+                beta = min(score + delta, full_beta)
+
 class AI_Player(EasyAI_AI_Player):
     """AI player for Gomoku game."""
     
-    def __init__(self, AI_algo, name="AI Gomoku Master"):
+    def __init__(self, AI_algo, name="AI Gomoku Master", threat_search=True):
         """Initialize the AI player.
         
         Args:
             AI_algo: The AI algorithm to use.
             name: The name of the AI player (default: "AI Gomoku Master").
+            threat_search: Look for a forced win by continuous threats before
+                the main search (True, a ``ThreatSearch`` instance, or False).
         """
         super().__init__(AI_algo)
         self.name = name
+        if threat_search is True:
+            threat_search = ThreatSearch()
+        self.threat_search = threat_search or None
     
     def ask_move(self, game):
         """Ask the AI player for a move.
@@ -101,8 +345,14 @@ class AI_Player(EasyAI_AI_Player):
         Returns:
             tuple: A tuple (row, col) representing the position to place the stone.
         """
-        # Get the move from the AI algorithm
-        return self.AI_algo(game)
+        with game.unchanged():
+            # A forced win found by the threat-space search needs no further search
+            if self.threat_search is not None:
+                move = self.threat_search(game)
+                if move is not None:
+                    return move
+            # Get the move from the AI algorithm
+            return self.AI_algo(game)
 
 class Human_Player(EasyAI_Human_Player):
     """Human player for Gomoku game."""
@@ -152,330 +402,127 @@ class Human_Player(EasyAI_Human_Player):
 
 class SSS_AI_Player:
     """AI player for Gomoku using the SSS* algorithm."""
-    def __init__(self, SSS_algo, name="SSS* AI Gomoku Master"):
+    def __init__(self, SSS_algo, name="SSS* AI Gomoku Master", threat_search=True):
+        """Initialize the AI player.
+
+        Args:
+            SSS_algo: The SSS* search to use.
+            name: The name of the AI player (default: "SSS* AI Gomoku Master").
+            threat_search: Look for a forced win by continuous threats before
+                the main search (True, a ``ThreatSearch`` instance, or False).
+        """
         self.SSS_algo = SSS_algo
         self.name = name
+        if threat_search is True:
+            threat_search = ThreatSearch()
+        self.threat_search = threat_search or None
 
     def ask_move(self, game):
         """Ask the SSS* AI player for a move."""
-        return self.SSS_algo(game)
-
-class Gomoku(TwoPlayerGame):
-    """The game of Gomoku, also known as Five in a Row."""
-
-    def __init__(self, board_size=15, difficulty=3, players=None, ai_algorithm="negamax"):
+        with game.unchanged():
+            # A forced win found by the threat-space search needs no further search
+            if self.threat_search is not None:
+                move = self.threat_search(game)
+                if move is not None:
+                    return move
+            return self.SSS_algo(game)
+
+class Gomoku(Position, TwoPlayerGame):
+    """The game of Gomoku, also known as Five in a Row.
+
+    A ``Position`` with two players. The default players (a human and an
+    AI with its transposition table) are only created when ``players`` is
+    first read, so games used as search nodes or server sessions stay small.
+    """
+
+    def __init__(self, board_size=15, difficulty=3, players=None, ai_algorithm="negamax", candidate_radius=2,
+                 tt_size_mb=DEFAULT_SIZE_MB):
         """Initialize the game.
         
         Args:
             board_size: The size of the board (default: 15x15).
             difficulty: The difficulty level of the AI (1-5, default: 3).
             players: A list of two players (default: [Human_Player(), AI_Player(Negamax(difficulty))]).
-            ai_algorithm: The AI algorithm to use ("negamax" or "sss").
+            ai_algorithm: The AI algorithm to use ("negamax", "pvs", "sss", "pns",
+                "parallel", "lazysmp" or "mcts").
+            candidate_radius: How far from existing stones ``candidate_moves``
+                looks for moves (default: 2).
+            tt_size_mb: The memory budget of the AI's transposition table.
         """
-        self.board_size = board_size
-        self.board = [[0 for _ in range(self.board_size)] for _ in range(self.board_size)]
+        Position.__init__(self, board_size=board_size, candidate_radius=candidate_radius)
         
         # Set the difficulty level
         if difficulty < 1:
             difficulty = 1
         elif difficulty > 5:
             difficulty = 5
-
-        # Select AI algorithm
+        self.difficulty = difficulty
+        self.ai_algorithm = ai_algorithm
+        self.tt_size_mb = tt_size_mb
+        self._players = players or None
+
+    @property
+    def players(self):
+        """The two players, creating the default players on first use."""
+        if self._players is None:
+            self._players = self._default_players()
+        return self._players
+
+    @players.setter
+    def players(self, players):
+        self._players = players
+
+    @property
+    def has_players(self):
+        """Whether the players exist yet (reading ``players`` creates the default ones)."""
+        return self._players is not None
+
+    def close(self):
+        """Shut down the worker processes of the AI's search, if it has any.
+
+        The "parallel" and "lazysmp" searches keep a process pool for the
+        game's lifetime; it is also shut down when the game is garbage
+        collected.
+        """
+        if not self.has_players:
+            return
+        for player in self.players:
+            engine = getattr(player, 'AI_algo', None)
+            if hasattr(engine, 'close'):
+                engine.close()
+
+    def _default_players(self):
+        """Create ``[Human_Player(), <AI player>]`` for the game's AI algorithm and difficulty."""
+        difficulty, ai_algorithm, tt_size_mb = self.difficulty, self.ai_algorithm, self.tt_size_mb
+        tt = BoundedTranspositionTable(size_mb=tt_size_mb)
         if ai_algorithm == "sss":
-            ai_algo = SSS(depth=difficulty, timeout=10)
+            ai_algo = SSS(depth=difficulty, timeout=10, tt=tt)
             ai_player = SSS_AI_Player(ai_algo)
+        elif ai_algorithm == "pns":
+            # Prove forced wins by threats, otherwise play the Negamax move
+            fallback = Negamax(depth=difficulty, timeout=10, tt=tt)
+            ai_algo = ProofNumberSearch(timeout=2, threats_only=True, fallback=fallback)
+            ai_player = AI_Player(ai_algo)
+        elif ai_algorithm == "parallel":
+            # Imported here because parallel_search imports this module
+            from parallel_search import ParallelNegamax
+            ai_algo = ParallelNegamax(depth=difficulty, timeout=10, tt_size_mb=tt_size_mb)
+            ai_player = AI_Player(ai_algo)
+        elif ai_algorithm == "lazysmp":
+            # Imported here because lazy_smp imports this module
+            from lazy_smp import LazySMP
+            ai_algo = LazySMP(depth=difficulty, timeout=10, tt_size_mb=tt_size_mb)
+            ai_player = AI_Player(ai_algo)
+        elif ai_algorithm == "mcts":
+            ai_algo = MCTS(timeout=10, max_playouts=difficulty * 2000)
+            ai_player = AI_Player(ai_algo)
+        elif ai_algorithm == "pvs":
+            ai_algo = PVS(depth=difficulty, timeout=10, tt=tt)
+            ai_player = AI_Player(ai_algo)
         else:
-            ai_algo = Negamax(depth=difficulty, timeout=10)
+            ai_algo = Negamax(depth=difficulty, timeout=10, tt=tt)
             ai_player = AI_Player(ai_algo)
-        
-        self.players = players or [Human_Player(), ai_player]
-        self.current_player = 1  # Player 1 starts
-
-    def possible_moves(self):
-        """Return a list of possible moves (empty cells) as (row, col) tuples."""
-        moves = []
-        for i in range(self.board_size):
-            for j in range(self.board_size):
-                if self.board[i][j] == 0:
-                    moves.append((i, j))
-        return moves
-
-    def make_move(self, move):
-        """Apply a move to the board.
-        
-        Args:
-            move: A tuple (row, col) representing the position to place the stone.
-        """
-        row, col = move
-        self.board[row][col] = self.current_player
-
-    def unmake_move(self, move):
-        """Undo a move from the board.
-        
-        Args:
-            move: A tuple (row, col) representing the position to remove the stone from.
-        """
-        row, col = move
-        self.board[row][col] = 0
-
-    def lose(self):
-        """Has the opponent formed a five-in-a-row?"""
-        # Check if opponent has five in a row
-        opponent = 3 - self.current_player
-        return self.five_in_a_row(opponent)
-
-    def is_over(self):
-        """Is the game over?"""
-        # Check if current player lost (opponent won)
-        if self.five_in_a_row(3 - self.current_player):
-            return True
-        # Check if board is full
-        if not self.possible_moves():
-            return True
-        return False
-
-    def show(self):
-        """Print the board.
-        
-        This method uses the __str__ method for consistency, ensuring that
-        the board is displayed with 1-based indexing and proper alignment
-        regardless of which method is used to show the board.
-        """
-        # Use the __str__ method for consistent display
-        print(self)
-
-    def scoring(self):
-        """Return a score for the current player.
-        
-        The score is based on the number of stones in a row:
-        - 5 in a row: 10000 points
-        - 4 in a row (open): 1000 points
-        - 4 in a row (closed): 100 points
-        - 3 in a row (open): 100 points
-        - 3 in a row (closed): 10 points
-        - 2 in a row (open): 10 points
-        - 2 in a row (closed): 1 point
-        
-        Returns:
-            int: The score for the current player.
-        """
-        if self.lose():
-            return -10000
-        
-        # Get the player's stones and opponent's stones
-        player = self.current_player
-        opponent = 3 - player
-        
-        # Calculate the score for the player
-        player_score = self._evaluate_board(player)
-        
-        # Calculate the score for the opponent
-        opponent_score = self._evaluate_board(opponent)
-        
-        # Return the difference between the player's score and the opponent's score
-        return player_score - opponent_score
-    
-    def _evaluate_board(self, player):
-        """Evaluate the board for a specific player.
-        
-        Args:
-            player: The player to evaluate the board for (1 or 2).
-            
-        Returns:
-            int: The score for the player.
-        """
-        score = 0
-        size = self.board_size
-        board = self.board
-        
-        # Check rows
-        for i in range(size):
-            for j in range(size - 4):
-                # Count the number of player's stones in this row
-                row = [board[i][j + k] for k in range(5)]
-                score += self._evaluate_line(row, player)
-        
-        # Check columns
-        for i in range(size - 4):
-            for j in range(size):
-                # Count the number of player's stones in this column
-                col = [board[i + k][j] for k in range(5)]
-                score += self._evaluate_line(col, player)
-        
-        # Check diagonals (top-left to bottom-right)
-        for i in range(size - 4):
-            for j in range(size - 4):
-                # Count the number of player's stones in this diagonal
-                diag = [board[i + k][j + k] for k in range(5)]
-                score += self._evaluate_line(diag, player)
-        
-        # Check diagonals (top-right to bottom-left)
-        for i in range(size - 4):
-            for j in range(4, size):
-                # Count the number of player's stones in this diagonal
-                diag = [board[i + k][j - k] for k in range(5)]
-                score += self._evaluate_line(diag, player)
-        
-        return score
-    
-    def _evaluate_line(self, line, player):
-        """Evaluate a line of 5 cells for a specific player.
-        
-        Args:
-            line: A list of 5 cells.
-            player: The player to evaluate the line for (1 or 2).
-            
-        Returns:
-            int: The score for the line.
-        """
-        opponent = 3 - player
-        
-        # Count the number of player's stones and empty cells in the line
-        player_count = line.count(player)
-        empty_count = line.count(0)
-        opponent_count = line.count(opponent)
-        
-        # If there are both player's stones and opponent's stones in the line,
-        # then this line is not useful for either player
-        if player_count > 0 and opponent_count > 0:
-            return 0
-        
-        # If there are only player's stones and empty cells in the line
-        if player_count > 0 and opponent_count == 0:
-            # 5 in a row
-            if player_count == 5:
-                return 10000
-            # 4 in a row
-            elif player_count == 4:
-                return 1000
-            # 3 in a row
-            elif player_count == 3:
-                return 100
-            # 2 in a row
-            elif player_count == 2:
-                return 10
-            # 1 in a row
-            elif player_count == 1:
-                return 1
-        
-        # If there are only opponent's stones and empty cells in the line
-        if opponent_count > 0 and player_count == 0:
-            # 5 in a row
-            if opponent_count == 5:
-                return -10000
-            # 4 in a row
-            elif opponent_count == 4:
-                return -1000
-            # 3 in a row
-            elif opponent_count == 3:
-                return -100
-            # 2 in a row
-            elif opponent_count == 2:
-                return -10
-            # 1 in a row
-            elif opponent_count == 1:
-                return -1
-        
-        return 0
-
-    def five_in_a_row(self, opponent):
-        """Check if the opponent has five in a row.
-        
-        Args:
-            opponent: The player to check for five in a row (1 or 2).
-            
-        Returns:
-            bool: True if the opponent has five in a row, False otherwise.
-        """
-        size = self.board_size
-        board = self.board
-        
-        # Check if the board size is at least 5x5
-        if size < 5:
-            return False
-
-        # Check rows
-        for i in range(size):
-            for j in range(size - 4):
-                if all(board[i][j + k] == opponent for k in range(5)):
-                    return True
-
-        # Check columns
-        for i in range(size - 4):
-            for j in range(size):
-                if all(board[i + k][j] == opponent for k in range(5)):
-                    return True
-
-        # Check diagonals (top-left to bottom-right)
-        for i in range(size - 4):
-            for j in range(size - 4):
-                if all(board[i + k][j + k] == opponent for k in range(5)):
-                    return True
-
-        # Check diagonals (top-right to bottom-left)
-        for i in range(size - 4):
-            for j in range(4, size):
-                if all(board[i + k][j - k] == opponent for k in range(5)):
-                    return True
-
-        return False
-
-    def __str__(self):
-        """Return a string representation of the board with 1-based indexing.
-        
-        This method creates a visually appealing board display with:
-        - Row and column numbers starting from 1 (not 0)
-        - Proper alignment for all board sizes (9x9, 13x13, 15x15, 19x19)
-        - Consistent borders and spacing
-        - Colored pieces (blue O for player 1, red X for player 2)
-        """
-        # Calculate width needed for the largest index (for proper alignment)
-        cell_width = len(str(self.board_size))
-        
-        # Add column numbers (1-based indexing for user-friendly display)
-        header = " " * (cell_width + 3)
-        for i in range(self.board_size):
-            header += f"{i+1:>{cell_width}} "
-        s = header + "\n"
-        
-        # Calculate total width for the horizontal line
-        # Each cell takes 2 characters (the piece and a space)
-        total_width = self.board_size * 2
-        
-        # Add a horizontal line at the top of the board
-        s += " " * (cell_width + 1) + "+" + "-" * total_width + "+\n"
-        
-        # Add row numbers (1-based) and board content
-        for i, row in enumerate(self.board):
-            # Start the row with the row number and left border
-            row_str = f"{i+1:>{cell_width}} | "
-            
-            # Add each cell with proper formatting
-            for cell in row:
-                if cell == 0:
-                    # Empty cell
-                    row_str += "· "
-                elif cell == 1:
-                    # Player 1 (blue O)
-                    row_str += "\033[1;34mO\033[0m "
-                else:
-                    # Player 2 (red X)
-                    row_str += "\033[1;31mX\033[0m "
-            
-            # Add the right border (aligned consistently for all board sizes)
-            row_str += "|"
-            s += row_str + "\n"
-        
-        # Add a horizontal line at the bottom of the board
-        s += " " * (cell_width + 1) + "+" + "-" * total_width + "+\n"
-        
-        return s
-
-    def ttentry(self):
-        """Return a hashable representation of the board and current player for the transposition table."""
-        # Flatten the board and add the current player to the tuple
-        return tuple(tuple(row) for row in self.board), self.current_player
+        return [Human_Player(), ai_player]
 
     def play(self, verbose=True):
         """Play the game."""
@@ -528,7 +575,7 @@ class Gomoku(TwoPlayerGame):
             if self.lose():
                 winner_name = self.players[2 - self.current_player].name
                 print(f"\n\033[1;32m{winner_name} wins!\033[0m")  # Green color for win message
-            elif not self.possible_moves():
+            elif self.stone_count == self.board_size * self.board_size:
                 print("\n\033[1;33mIt's a draw!\033[0m")  # Yellow color for draw message
 
 if __name__ == "__main__":
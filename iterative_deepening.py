@@ -1,96 +1,168 @@
 """
 Iterative Deepening implementation for the Negamax algorithm.
 
-This module provides an implementation of the Iterative Deepening algorithm
-for the Negamax algorithm used in the Gomoku game.
+This module provides the iterative deepening driver used by the Gomoku search
+engines. One driver runs the whole sequence of searches (depth 1, 2, ...) on a
+single engine, so the transposition table, the killer/history tables and the
+principal variation found by one iteration are all available to the next.
+Engines with ``reuse`` set also start each move from the principal
+variation of their previous move.
 """
 
 import time
-from easyAI import Negamax as EasyAI_Negamax
+from collections import namedtuple
+
+# The score of a lost position (see ``Position.scoring``): a search score at
+# least this large in absolute value is a forced win or loss
+WIN_THRESHOLD = 10000
+
+# The result of the deepest completed iteration
+SearchResult = namedtuple('SearchResult', ['move', 'score', 'depth', 'pv', 'nodes', 'elapsed'])
+
+
+def principal_variation(engine, game, move, max_length):
+    """Follow the transposition table from the root to recover the principal variation.
+
+    Args:
+        engine: The search engine (its ``tt`` is read).
+        game: The game instance (restored before returning).
+        move: The best move at the root.
+        max_length: The maximum number of moves to follow.
+
+    Returns:
+        tuple: (pv, terminal) where ``pv`` is the list of moves and
+        ``terminal`` is True if the line ends with the game over.
+    """
+    pv = []
+    terminal = False
+    while move is not None and len(pv) < max_length and move in game.possible_moves():
+        game.make_move(move)
+        game.switch_player()
+        pv.append(move)
+        if game.is_over():
+            terminal = True
+            break
+        entry = engine.tt.lookup(game) if engine.tt is not None else None
+        move = entry['move'] if entry is not None else None
+    for move in reversed(pv):
+        game.unmake_move(move)
+    return pv, terminal
+
+
+def pv_hints(game, pv):
+    """Map each position along a principal variation to the move played from it.
+
+    The engine tries these moves first when the transposition table has no
+    move for the position (for example because the entry was overwritten).
+    """
+    hints = {}
+    for move in pv:
+        hints[game.ttentry()] = move
+        game.make_move(move)
+        game.switch_player()
+    for move in reversed(pv):
+        game.unmake_move(move)
+    return hints
+
 
 class IterativeDeepening:
-    """Iterative Deepening algorithm for the Negamax algorithm."""
-    
-    def __init__(self, max_depth=10, scoring=None, win_score=100000, tt=None, timeout=10):
+    """Iterative Deepening driver for a depth-limited search engine.
+
+    The engine must provide ``start_search()``, ``iteration(game, depth,
+    previous)`` returning (score, move), ``moves(game)``, ``timed_out``,
+    ``tt`` and ``pv_hints`` (see ``gomoku.Negamax``). If the engine's
+    ``reuse`` is set, the first iteration of a search is seeded with the
+    last principal variation of the previous one, which still applies when
+    the game followed it.
+    """
+
+    def __init__(self, engine, max_depth=None, verbose=False, progress=None):
         """Initialize the Iterative Deepening algorithm.
-        
+
         Args:
-            max_depth: The maximum depth of the search tree.
-            scoring: A function that returns a score for a given game state.
-            win_score: The score for a winning position.
-            tt: A transposition table.
-            timeout: The maximum time (in seconds) to spend on a move.
+            engine: The search engine.
+            max_depth: The maximum depth of the search tree (default: the
+                engine's ``depth``).
+            verbose: Print the result of every completed iteration.
+            progress: A function called with the ``SearchResult`` of every
+                completed iteration, e.g. to stream the search to a client.
         """
+        self.engine = engine
         self.max_depth = max_depth
-        self.scoring = scoring
-        self.win_score = win_score
-        self.tt = tt
-        self.timeout = timeout
-        self.start_time = None
-        self.best_move = None
-        self.best_score = -win_score
-    
-    def is_timeout(self):
-        """Check if the timeout has been reached."""
-        if self.timeout is None:
-            return False
-        return time.time() - self.start_time > self.timeout
-    
+        self.verbose = verbose
+        self.progress = progress
+        self.result = None
+        self.iterations = []  # The result of every completed iteration of the last search
+        self.previous_hints = {}  # The hints of the previous search's final principal variation
+
+    def run(self, game):
+        """Search increasing depths until the timeout, the maximum depth or a forced result.
+
+        Args:
+            game: The game instance.
+
+        Returns:
+            SearchResult: The result of the deepest completed iteration, or
+            None if not even depth 1 finished.
+        """
+        engine = self.engine
+        engine.start_search()
+        max_depth = self.max_depth if self.max_depth is not None else engine.depth
+        self.result = None
+        self.iterations = []
+        if not getattr(engine, 'reuse', False):
+            self.previous_hints = {}
+        pv = []
+        for depth in range(1, max_depth + 1):
+            # Seed the move ordering with the previous principal variation
+            engine.pv_hints = pv_hints(game, pv) if pv else self.previous_hints
+            previous = self.result.score if self.result is not None else None
+            with game.unchanged():
+                score, move = engine.iteration(game, depth, previous)
+            if engine.timed_out or move is None:
+                if self.verbose and engine.timed_out:
+                    print(f"Timeout reached at depth {depth}")
+                break
+            # Only reported: the table entries it follows may be bounds, so a line
+            # that ends the game does not make the result forced
+            pv, _ = principal_variation(engine, game, move, depth)
+            self.result = SearchResult(move=move, score=score, depth=depth, pv=pv,
+                                       nodes=engine.stats['nodes'], elapsed=time.time() - engine.start_time)
+            self.iterations.append(self.result)
+            if self.verbose:
+                print(f"Depth {depth}: Move {move}, Score {score}, PV {pv}")
+            if self.progress is not None:
+                self.progress(self.result)
+            # A forced win or loss: searching deeper cannot change it
+            if score is not None and abs(score) >= WIN_THRESHOLD:
+                break
+        self.previous_hints = pv_hints(game, pv)
+        engine.pv_hints = {}
+        return self.result
+
     def __call__(self, game):
         """Call the Iterative Deepening algorithm to get the best move.
-        
+
         Args:
             game: The game instance.
-            
+
         Returns:
             The best move.
         """
-        self.start_time = time.time()
-        self.best_move = None
-        self.best_score = -self.win_score
-        
-        # Start with depth 1 and increase until timeout or max_depth
-        for depth in range(1, self.max_depth + 1):
-            # Create a Negamax instance with the current depth
-            negamax = EasyAI_Negamax(
-                depth=depth,
-                scoring=self.scoring,
-                win_score=self.win_score,
-                tt=self.tt
-            )
-            
-            # Get the best move for the current depth
-            try:
-                move = negamax(game)
-                score = negamax.alpha
-                
-                # Update the best move and score
-                self.best_move = move
-                self.best_score = score
-                
-                # Print the current depth and score
-                print(f"Depth {depth}: Move {move}, Score {score}")
-                
-                # Check if we've found a winning move
-                if score >= self.win_score or score <= -self.win_score:
-                    break
-                
-                # Check if we've reached the timeout
-                if self.is_timeout():
-                    print(f"Timeout reached at depth {depth}")
-                    break
-            except Exception as e:
-                print(f"Error at depth {depth}: {e}")
-                break
-        
-        return self.best_move
+        result = self.run(game)
+        if result is not None:
+            return result.move
+        # Not even depth 1 finished: fall back to the first candidate
+        moves = self.engine.moves(game)
+        return moves[0] if moves else None
 
-class NegamaxID(EasyAI_Negamax):
+
+class NegamaxID:
     """Negamax algorithm with Iterative Deepening."""
-    
+
     def __init__(self, max_depth=10, scoring=None, win_score=100000, tt=None, timeout=10):
         """Initialize the Negamax algorithm with Iterative Deepening.
-        
+
         Args:
             max_depth: The maximum depth of the search tree.
             scoring: A function that returns a score for a given game state.
@@ -98,21 +170,22 @@ class NegamaxID(EasyAI_Negamax):
             tt: A transposition table.
             timeout: The maximum time (in seconds) to spend on a move.
         """
-        super().__init__(depth=max_depth, scoring=scoring, win_score=win_score, tt=tt)
-        self.iterative_deepening = IterativeDeepening(
-            max_depth=max_depth,
-            scoring=scoring,
-            win_score=win_score,
-            tt=tt,
-            timeout=timeout
-        )
-    
+        # Imported here because gomoku imports this module for its own driver
+        from gomoku import Negamax
+        self.negamax = Negamax(depth=max_depth, scoring=scoring, win_score=win_score, tt=tt, timeout=timeout)
+        self.iterative_deepening = IterativeDeepening(self.negamax, verbose=True)
+
+    @property
+    def result(self):
+        """The result (move, score, depth, PV) of the last search."""
+        return self.iterative_deepening.result
+
     def __call__(self, game):
         """Call the Negamax algorithm with Iterative Deepening to get the best move.
-        
+
         Args:
             game: The game instance.
-            
+
         Returns:
             The best move.
         """
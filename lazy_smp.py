@@ -0,0 +1,186 @@
+"""
+Lazy SMP search for the Gomoku AI.
+
+Lazy SMP is the simplest way to use several cores: N worker processes run
+the same iterative deepening on the same position, all probing one
+transposition table. There is no explicit work splitting; the workers
+share results only through the table. To keep them from searching the same
+tree in lockstep, every helper perturbs its search a little:
+
+- odd helpers search one ply deeper than asked;
+- every helper seeds the history heuristic with random noise, which
+  reorders the quiet moves.
+
+The main worker (index 0) searches unperturbed. As soon as it finishes (or
+the time runs out) the helpers are told to stop, and the deepest completed
+result is played. The table is a ``SharedTranspositionTable`` in a
+``multiprocessing.shared_memory`` block.
+"""
+
+import os
+import time
+import random
+import weakref
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from gomoku import Negamax
+from parallel_search import encode_position, decode_position
+from transposition_table import SharedTranspositionTable
+
+# Per-process state of a worker (set by _init_worker)
+_worker = {}
+
+
+class HelperNegamax(Negamax):
+    """Negamax that also stops on a shared flag and can perturb its move ordering."""
+
+    def __init__(self, depth, tt, stop, win_score=100000):
+        """Initialize the engine.
+
+        Args:
+            depth: The maximum depth of the search tree.
+            tt: The shared transposition table.
+            stop: A shared flag; the search stops when it is set.
+            win_score: The score for a winning position.
+        """
+        super().__init__(depth, win_score=win_score, tt=tt)
+        self.stop = stop
+        self.search_age = 0
+        self.noise = None  # A random.Random for helpers, None for the main worker
+        self.board_size = None
+
+    def is_timeout(self):
+        """Check if the timeout has been reached or the search was stopped."""
+        return self.stop.value or super().is_timeout()
+
+    def start_search(self):
+        """Start a new search, in step with the other workers' table age."""
+        super().start_search()
+        self.tt.age = self.search_age
+        if self.noise is not None:
+            size = self.board_size
+            self.ordering.history = {(row, col): self.noise.randint(0, 3)
+                                     for row in range(size) for col in range(size)}
+
+
+def _shutdown(executor, stop, tt):
+    """Shut the workers down and free the shared table (the search's ``close`` and its finalizer)."""
+    stop.value = 1
+    executor.shutdown(cancel_futures=True)
+    tt.close()
+
+
+def _init_worker(tt, stop):
+    """Attach the worker to the shared table and stop flag."""
+    _worker['engine'] = HelperNegamax(depth=1, tt=tt, stop=stop)
+
+
+def _lazy_search(position, depth, deadline, helper, age):
+    """Run one worker's iterative deepening.
+
+    Args:
+        position: The root position (see ``parallel_search.encode_position``).
+        depth: The depth asked for.
+        deadline: The wall-clock time (``time.time()``) to stop at.
+        helper: The worker index (0 is the unperturbed main worker).
+        age: The transposition table age of this move.
+
+    Returns:
+        dict: The worker's index, deepest completed result, node count and
+        table statistics.
+    """
+    engine = _worker['engine']
+    game = decode_position(position)
+    engine.depth = depth + (helper % 2)
+    engine.timeout = None if deadline is None else max(deadline - time.time(), 0.0)
+    engine.search_age = age
+    engine.board_size = game.board_size
+    engine.noise = random.Random(helper * 7919 + age) if helper else None
+    engine.tt.reset_stats()
+    result = engine.driver.run(game)
+    return {
+        'helper': helper,
+        'result': result,
+        'nodes': engine.stats['nodes'],
+        'tt': engine.tt.report(),
+    }
+
+
+class LazySMP:
+    """Lazy SMP: N workers run the same search over one shared transposition table."""
+
+    def __init__(self, depth, timeout=None, workers=None, tt_size_mb=16):
+        """Initialize the search.
+
+        Args:
+            depth: The maximum depth of the main worker's search.
+            timeout: The maximum time (in seconds) to spend on a move.
+            workers: The number of worker processes (default: one per core).
+            tt_size_mb: The memory budget of the shared transposition table.
+        """
+        self.depth = depth
+        self.timeout = timeout
+        self.workers = workers or os.cpu_count() or 1
+        self.tt_size_mb = tt_size_mb
+        self.tt = None
+        self.stop = None
+        self.executor = None
+        self.finalizer = None  # Shuts the workers down once the search is garbage collected
+        self.age = 0
+        self.result = None
+        self.reports = []
+        self.stats = {'nodes': 0, 'depth': 0}
+
+    def start(self):
+        """Create the shared table and start the worker processes (done on the first search)."""
+        if self.executor is None:
+            self.tt = SharedTranspositionTable(size_mb=self.tt_size_mb)
+            self.stop = multiprocessing.Value('b', 0, lock=False)
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                initargs=(self.tt, self.stop))
+            self.finalizer = weakref.finalize(self, _shutdown, self.executor, self.stop, self.tt)
+
+    def close(self):
+        """Shut the workers down and free the shared table."""
+        if self.executor is not None:
+            self.finalizer()
+            self.executor = None
+            self.tt = None
+
+    def __call__(self, game):
+        """Search the position with every worker and play the deepest completed result.
+
+        Args:
+            game: The game instance.
+
+        Returns:
+            The best move.
+        """
+        self.start()
+        start_time = time.time()
+        deadline = start_time + self.timeout if self.timeout is not None else None
+        self.age = (self.age + 1) & 0xFF
+        self.stop.value = 0
+        position = encode_position(game)
+        futures = [self.executor.submit(_lazy_search, position, self.depth, deadline, helper, self.age)
+                   for helper in range(self.workers)]
+        # The main worker decides when the move is over; then the helpers stop
+        wait([futures[0]], timeout=None if deadline is None else max(deadline - time.time(), 0) + 1)
+        self.stop.value = 1
+        done, _ = wait(futures, timeout=1)
+        self.reports = [future.result() for future in futures if future in done]
+
+        self.result = None
+        for report in self.reports:
+            result = report['result']
+            if result is not None and (self.result is None or result.depth > self.result.depth):
+                self.result = result
+        self.stats = {
+            'nodes': sum(report['nodes'] for report in self.reports),
+            'depth': self.result.depth if self.result is not None else 0,
+            'elapsed': time.time() - start_time,
+        }
+        if self.result is not None:
+            return self.result.move
+        return game.candidate_moves()[0]
@@ -0,0 +1,356 @@
+"""
+Monte Carlo Tree Search for the Gomoku AI.
+
+Instead of scoring positions with the evaluation function, MCTS estimates
+the value of a move from the results of random games ("playouts") played
+from it, and grows a search tree towards the moves that win most often
+(UCT: the child maximising win rate + C * sqrt(ln N / n) is followed).
+
+The tree is stored in parallel arrays rather than one Python object per
+node: node ``i`` has a move, a parent, the index of its first child and a
+child count (the children of a node are stored next to each other), a visit
+count and a win total. A leaf is expanded (all its children appended
+to the arrays at once) the second time it is reached, and the tree's size
+is capped by ``max_nodes``.
+
+The tree walk uses ``make_move``/``unmake_move`` on the game. Playouts do
+not: they only need the board and the game's per-window stone counts, so
+they run on flat copies of those, made once per leaf and cheaply copied for
+each playout. Moves are drawn near the stones already on the board, and a
+five is detected from the window counts as soon as it is made. Running
+several playouts from each new leaf (``batch``) shares that set-up and the
+tree walk between them.
+
+With ``reuse``, the tree outlives the move: the next search finds the node
+reached by the moves played since (its own and the opponent's), keeps that
+subtree, compacted to the front of the arrays, and drops the rest.
+"""
+
+import math
+import time
+import random
+from array import array
+
+from threat_search import five_cells
+
+NO_CHILDREN = -1
+
+
+class MCTS:
+    """UCT Monte Carlo Tree Search over an array-backed tree."""
+
+    def __init__(self, timeout=1, max_playouts=None, exploration=1.4, batch=4, playout_length=None,
+                 max_nodes=1 << 20, seed=None, reuse=True):
+        """Initialize the search.
+
+        Args:
+            timeout: The maximum time (in seconds) to spend on a move (None:
+                bounded by ``max_playouts`` only).
+            max_playouts: The maximum number of playouts per move (None: no limit).
+            exploration: The UCT exploration constant C.
+            batch: The number of playouts run from each new leaf.
+            playout_length: The maximum number of moves of a playout (None:
+                until the board is full); a playout cut short is a draw.
+            max_nodes: The maximum number of tree nodes; once reached, the
+                tree stops growing and playouts start from its leaves.
+            seed: The seed of the playouts' random number generator.
+            reuse: Keep the subtree of the position reached since the last
+                search instead of starting from an empty tree.
+        """
+        self.timeout = timeout
+        self.max_playouts = max_playouts
+        self.exploration = exploration
+        self.batch = batch
+        self.playout_length = playout_length
+        self.max_nodes = max_nodes
+        self.rng = random.Random(seed)
+        self.reuse = reuse
+        self.root_position = None  # (board size, move history, player to move) at the root
+        self.start_time = None
+        self.board_size = None
+        self.clear()
+        self.reset_stats()
+
+    def clear(self):
+        """Empty the tree, leaving only the root."""
+        self.moves = array('i', [NO_CHILDREN])  # The cell played to reach the node
+        self.parents = array('i', [NO_CHILDREN])
+        self.first_child = array('i', [NO_CHILDREN])  # NO_CHILDREN until expanded
+        self.child_count = array('H', [0])
+        self.visits = array('L', [0])
+        self.wins = array('d', [0.0])  # For the player who moved into the node (draws count 0.5)
+
+    def reset_stats(self):
+        """Reset the per-search statistics."""
+        self.stats = {'playouts': 0, 'nodes': 1, 'elapsed': 0.0, 'reused_visits': 0}
+
+    def playouts_per_second(self):
+        """Return the playout rate of the last search."""
+        elapsed = self.stats['elapsed']
+        return self.stats['playouts'] / elapsed if elapsed > 0 else 0.0
+
+    def is_timeout(self):
+        """Check if the time or playout budget is used up."""
+        if self.max_playouts is not None and self.stats['playouts'] >= self.max_playouts:
+            return True
+        if self.timeout is None:
+            return False
+        return time.time() - self.start_time > self.timeout
+
+    def __call__(self, game):
+        """Search until the timeout and return the most visited move.
+
+        Args:
+            game: The game instance (restored before returning).
+
+        Returns:
+            tuple: A tuple (row, col).
+        """
+        self.start_time = time.time()
+        self.reset_stats()
+        root = self.find_root(game) if self.reuse else None
+        if root is None:
+            self.clear()
+        elif root:
+            self.keep_subtree(root)
+        self.stats['reused_visits'] = self.visits[0]
+        self.board_size = game.board_size
+        self.root_position = (game.board_size, tuple(game.move_history), game.current_player)
+        with game.unchanged():
+            while True:
+                self.iteration(game)
+                if self.is_timeout():
+                    break
+        self.stats['nodes'] = len(self.visits)
+        self.stats['elapsed'] = time.time() - self.start_time
+        best = self.best_child(0)
+        return divmod(self.moves[best], game.board_size)
+
+    def find_root(self, game):
+        """Return the node of the current position in the last search's tree, or None.
+
+        The position must follow from the last root by the moves played
+        since, all of them in the tree.
+        """
+        if self.root_position is None:
+            return None
+        board_size, history, player = self.root_position
+        played = game.move_history[len(history):]
+        if (board_size != game.board_size or tuple(game.move_history[:len(history)]) != history
+                or player != (game.current_player if len(played) % 2 == 0 else 3 - game.current_player)):
+            return None
+        node = 0
+        for cell in played:
+            first = self.first_child[node]
+            if first == NO_CHILDREN:
+                return None
+            for child in range(first, first + self.child_count[node]):
+                if self.moves[child] == cell:
+                    node = child
+                    break
+            else:
+                return None
+        return node
+
+    def keep_subtree(self, root):
+        """Make ``root`` the root of the tree, dropping every node outside its subtree."""
+        moves, parents, first_child = self.moves, self.parents, self.first_child
+        child_count, visits, wins = self.child_count, self.visits, self.wins
+        self.clear()
+        self.visits[0], self.wins[0] = visits[root], wins[root]
+        # Breadth first, so the children of every kept node stay contiguous
+        queue = [root]
+        for index, node in enumerate(queue):
+            first = first_child[node]
+            if first == NO_CHILDREN:
+                continue
+            count = child_count[node]
+            self.first_child[index] = len(self.moves)
+            self.child_count[index] = count
+            self.moves.extend(moves[first:first + count])
+            self.parents.extend([index] * count)
+            self.first_child.extend([NO_CHILDREN] * count)
+            self.child_count.extend([0] * count)
+            self.visits.extend(visits[first:first + count])
+            self.wins.extend(wins[first:first + count])
+            queue.extend(range(first, first + count))
+
+    def iteration(self, game):
+        """Select a leaf, expand it, run a batch of playouts and back up the results."""
+        size = game.board_size
+        first_child, moves = self.first_child, self.moves
+        path = [0]
+        played = []
+        node = 0
+        # Selection
+        while first_child[node] != NO_CHILDREN:
+            node = self.select_child(node)
+            move = divmod(moves[node], size)
+            game.make_move(move)
+            game.switch_player()
+            played.append(move)
+            path.append(node)
+
+        # Expansion, once the leaf has had its own playouts (its first child is searched now)
+        if (self.visits[node] or not node) and not game.is_over() and len(self.visits) < self.max_nodes:
+            self.expand(node, game)
+            node = first_child[node]
+            move = divmod(moves[node], size)
+            game.make_move(move)
+            game.switch_player()
+            played.append(move)
+            path.append(node)
+
+        # Simulation: the results are counted for the player who moved into the leaf
+        count = self.batch
+        if game.is_over():
+            wins = count if game.lose() else count / 2
+            self.stats['playouts'] += count
+        else:
+            wins = self.simulate(game, count)
+        for move in reversed(played):
+            game.unmake_move(move)
+
+        # Backpropagation: each level sees the results from the other side
+        visits, win_totals = self.visits, self.wins
+        for node in reversed(path):
+            visits[node] += count
+            win_totals[node] += wins
+            wins = count - wins
+
+    def children(self, game):
+        """Return the cells of the moves to expand.
+
+        A five is played at once and the opponent's five must be blocked;
+        otherwise every candidate move is a child.
+        """
+        player = game.current_player
+        fives = five_cells(game, player)
+        if fives:
+            return [min(fives)]
+        blocks = five_cells(game, 3 - player)
+        if blocks:
+            return sorted(blocks)
+        size = game.board_size
+        return [row * size + col for row, col in game.candidate_moves()]
+
+    def expand(self, node, game):
+        """Append the children of a leaf to the tree."""
+        cells = self.children(game)
+        self.rng.shuffle(cells)
+        first = len(self.visits)
+        count = len(cells)
+        self.first_child[node] = first
+        self.child_count[node] = count
+        self.moves.extend(cells)
+        self.parents.extend([node] * count)
+        self.first_child.extend([NO_CHILDREN] * count)
+        self.child_count.extend([0] * count)
+        self.visits.extend([0] * count)
+        self.wins.extend([0.0] * count)
+
+    def select_child(self, node):
+        """Return the child with the highest UCT value (unvisited children first)."""
+        visits, wins = self.visits, self.wins
+        first = self.first_child[node]
+        log_visits = math.log(visits[node])
+        exploration = self.exploration
+        best, best_value = first, -1.0
+        for child in range(first, first + self.child_count[node]):
+            child_visits = visits[child]
+            if not child_visits:
+                return child
+            value = wins[child] / child_visits + exploration * math.sqrt(log_visits / child_visits)
+            if value > best_value:
+                best, best_value = child, value
+        return best
+
+    def best_child(self, node):
+        """Return the most visited child of a node."""
+        first = self.first_child[node]
+        return max(range(first, first + self.child_count[node]), key=self.visits.__getitem__)
+
+    def simulate(self, game, count):
+        """Run ``count`` random playouts from the current position.
+
+        The playouts share one set-up: the board and window counts are
+        flattened once and each playout runs on a cheap copy of them.
+
+        Args:
+            game: The game instance (left unchanged).
+            count: The number of playouts.
+
+        Returns:
+            float: The number of playouts won by the player who made the last
+            move (draws count half).
+        """
+        board = bytearray(cell for row in game.board for cell in row)
+        first_counts, second_counts = game.window_counts[1], game.window_counts[2]
+        history = game.move_history
+        to_move = game.current_player
+        mover = 3 - to_move
+        wins = 0.0
+        for _ in range(count):
+            winner = self.playout(game, bytearray(board), [None, first_counts[:], second_counts[:]],
+                                  history[:], to_move)
+            if winner == mover:
+                wins += 1
+            elif not winner:
+                wins += 0.5
+        self.stats['playouts'] += count
+        return wins
+
+    def playout(self, game, board, counts, history, player):
+        """Play random moves near the stones until a five or a full board.
+
+        Args:
+            game: The game instance (only its tables are used).
+            board: A flat copy of the board, updated in place.
+            counts: Copies of the game's window counts, updated in place.
+            history: A copy of the occupied cells, updated in place.
+            player: The player to move.
+
+        Returns:
+            int: The winner (1 or 2), or 0 for a draw.
+        """
+        cell_windows = game.cell_windows
+        limit = len(board) - len(history)
+        if self.playout_length is not None:
+            limit = min(limit, self.playout_length)
+        for _ in range(limit):
+            cell = self.random_cell(game, board, history)
+            board[cell] = player
+            history.append(cell)
+            # A window holding five of the player's stones is a five
+            own = counts[player]
+            for w in cell_windows[cell]:
+                own[w] += 1
+                if own[w] == 5:
+                    return player
+            player = 3 - player
+        return 0
+
+    def random_cell(self, game, board, history):
+        """Return a random empty cell near the stones of a playout board."""
+        rng = self.rng
+        if not history:
+            return len(board) // 2  # The centre cell
+        neighbours = game.neighbours
+        # A random neighbour of a random stone is usually empty
+        for _ in range(8):
+            cell = rng.choice(neighbours[history[rng.randrange(len(history))]])
+            if not board[cell]:
+                return cell
+        cells = {cell for stone in history for cell in neighbours[stone] if not board[cell]}
+        if cells:
+            return rng.choice(sorted(cells))
+        return rng.choice([cell for cell, stone in enumerate(board) if not stone])
+
+    @property
+    def result(self):
+        """The (move, win rate, visits) of the most visited root move, or None."""
+        if self.first_child[0] == NO_CHILDREN:
+            return None
+        best = self.best_child(0)
+        visits = self.visits[best]
+        return divmod(self.moves[best], self.board_size), self.wins[best] / visits if visits else 0.0, visits
@@ -0,0 +1,308 @@
+"""
+Background AI move jobs for the web server.
+
+A search can take seconds, so the server does not run it inside the request
+that asked for it. ``MoveJobQueue`` runs each search as a job on a bounded
+pool of threads: submitting returns a ``MoveJob`` at once, and the client
+polls the job (by its id) for the result.
+
+The queue refuses new jobs once ``max_pending`` jobs are queued or running
+(``QueueFullError``), so a burst of requests cannot pile up unbounded work.
+A job can be cancelled: a queued job never runs, and a running job calls
+its ``stop`` function (which makes the engine time out) and its result is
+dropped. The queue records how long jobs wait and take, as percentiles.
+
+While it runs, a job can publish progress events (for example one per
+completed search depth); ``wait_events`` lets a client follow them as they
+come. A running job can also be accepted early: its search is stopped and
+the job finishes with the best move found so far.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Job states
+QUEUED, RUNNING, DONE, CANCELLED, FAILED = 'queued', 'running', 'done', 'cancelled', 'failed'
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a job is submitted to a queue that already holds ``max_pending`` jobs."""
+
+
+def percentiles(samples, points=(50, 90, 99)):
+    """Return the given percentiles of a list of samples (nearest rank).
+
+    Returns:
+        dict: ``{'p50': ..., 'p90': ..., 'p99': ...}``, None for no samples.
+    """
+    ordered = sorted(samples)
+    result = {}
+    for point in points:
+        if ordered:
+            rank = max(0, -(-point * len(ordered) // 100) - 1)
+            result[f'p{point}'] = ordered[rank]
+        else:
+            result[f'p{point}'] = None
+    return result
+
+
+class LatencyStats:
+    """The most recent durations of some operation, summarised as percentiles."""
+
+    def __init__(self, size=1000):
+        """Initialize the statistics.
+
+        Args:
+            size: The number of most recent samples kept.
+        """
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        """Add a duration, in seconds."""
+        with self.lock:
+            self.samples.append(seconds)
+            self.count += 1
+
+    def summary(self):
+        """Return the sample count and the p50, p90 and p99 durations."""
+        with self.lock:
+            samples = list(self.samples)
+            count = self.count
+        return dict(count=count, **percentiles(samples))
+
+
+class MoveJob:
+    """One AI move search, run in the background."""
+
+    def __init__(self, game_id, work, stop=None):
+        """Initialize the job.
+
+        Args:
+            game_id: The game the job belongs to.
+            work: The function to run, called with the job; its return value
+                is the job's result.
+            stop: A function that makes the running search stop early (or None).
+        """
+        self.id = uuid.uuid4().hex
+        self.game_id = game_id
+        self.work = work
+        self.stop = stop
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+        self.future = None
+        self.events = []  # Progress events, in the order they were published
+        self.changed = threading.Condition()
+
+    def wait(self, timeout=None):
+        """Wait for the job to finish; return True if it did."""
+        return self.done.wait(timeout)
+
+    def publish(self, event):
+        """Add a progress event and wake up the clients following the job."""
+        with self.changed:
+            self.events.append(event)
+            self.changed.notify_all()
+
+    def wait_events(self, start, timeout=None):
+        """Wait for progress events after the first ``start`` ones, or the end of the job.
+
+        Returns:
+            list: The new events (empty on timeout or if the job finished
+            without any).
+        """
+        with self.changed:
+            self.changed.wait_for(lambda: len(self.events) > start or self.done.is_set(), timeout)
+            return self.events[start:]
+
+    def to_dict(self):
+        """Return the job's state as a JSON-friendly dictionary."""
+        data = {'jobId': self.id, 'gameId': self.game_id, 'status': self.status}
+        if self.status == DONE:
+            data['result'] = self.result
+        elif self.status == FAILED:
+            data['error'] = self.error
+        return data
+
+
+class MoveJobQueue:
+    """A bounded pool of threads running ``MoveJob``s."""
+
+    def __init__(self, max_workers=2, max_pending=32, max_finished=1024):
+        """Initialize the queue.
+
+        Args:
+            max_workers: The number of searches run at the same time.
+            max_pending: The maximum number of jobs queued or running.
+            max_finished: The number of finished jobs kept for polling.
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ai-move')
+        self.jobs = OrderedDict()  # job id -> MoveJob, oldest first
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.counts = dict.fromkeys((DONE, CANCELLED, FAILED, 'rejected'), 0)
+        self.wait_times = LatencyStats()  # Submission to start
+        self.latencies = LatencyStats()  # Submission to result
+
+    def submit(self, game_id, work, stop=None):
+        """Queue a job.
+
+        Args:
+            game_id: The game the job belongs to.
+            work: The function to run, called with the job.
+            stop: A function that makes the running search stop early.
+
+        Returns:
+            MoveJob: The queued job.
+
+        Raises:
+            QueueFullError: If ``max_pending`` jobs are already queued or running.
+        """
+        job = MoveJob(game_id, work, stop)
+        with self.lock:
+            if self.pending >= self.max_pending:
+                self.counts['rejected'] += 1
+                raise QueueFullError(f"{self.pending} AI moves are already pending")
+            self.pending += 1
+            self.jobs[job.id] = job
+            self._prune()
+            # Under the lock, so that a cancel always finds the future
+            job.future = self.executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        """Return a job by its id, or None."""
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def active(self, game_id):
+        """Return the game's queued or running job, or None."""
+        with self.lock:
+            for job in self.jobs.values():
+                if job.game_id == game_id and job.status in (QUEUED, RUNNING):
+                    return job
+        return None
+
+    def is_full(self):
+        """Return True if a new job would be refused."""
+        with self.lock:
+            return self.pending >= self.max_pending
+
+    def cancel(self, job):
+        """Cancel a job: a queued job never runs, a running one is told to stop.
+
+        Returns:
+            bool: True if the job had not finished.
+        """
+        with self.lock:
+            if job.status not in (QUEUED, RUNNING):
+                return False
+            job.cancelled.set()
+            running = job.status == RUNNING
+        if not running and job.future.cancel():
+            self._finish(job, CANCELLED)
+        elif job.stop is not None:
+            job.stop()
+        return True
+
+    def accept(self, job):
+        """Stop a running job's search early, so that it finishes with its best move so far.
+
+        Returns:
+            bool: True if the job was running and could be stopped.
+        """
+        with self.lock:
+            if job.status != RUNNING or job.stop is None:
+                return False
+        job.stop()
+        return True
+
+    def cancel_game(self, game_id):
+        """Cancel every unfinished job of a game; return how many were cancelled."""
+        with self.lock:
+            jobs = [job for job in self.jobs.values() if job.game_id == game_id]
+        return sum(self.cancel(job) for job in jobs)
+
+    def _run(self, job):
+        """Run a job in a worker thread."""
+        with self.lock:
+            cancelled = job.cancelled.is_set()
+            if not cancelled:
+                job.status = RUNNING
+                job.started = time.time()
+        if cancelled:
+            # Cancelled after the worker had taken the job off the queue
+            self._finish(job, CANCELLED)
+            return
+        self.wait_times.record(job.started - job.submitted)
+        try:
+            result = job.work(job)
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, CANCELLED if job.cancelled.is_set() else FAILED)
+            return
+        if job.cancelled.is_set():
+            self._finish(job, CANCELLED)
+        else:
+            job.result = result
+            self._finish(job, DONE)
+
+    def _finish(self, job, status):
+        """Record the end of a job."""
+        with self.lock:
+            if job.done.is_set():
+                return
+            job.status = status
+            job.finished = time.time()
+            self.pending -= 1
+            self.counts[status] += 1
+        if status == DONE:
+            self.latencies.record(job.finished - job.submitted)
+        with job.changed:
+            job.done.set()
+            job.changed.notify_all()
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond ``max_finished`` (called with the lock held)."""
+        finished = len(self.jobs) - self.pending
+        if finished <= self.max_finished:
+            return
+        for job_id in list(self.jobs):
+            job = self.jobs[job_id]
+            if job.done.is_set():
+                del self.jobs[job_id]
+                finished -= 1
+                if finished <= self.max_finished:
+                    break
+
+    def stats(self):
+        """Return the queue's load, job counts and wait and latency percentiles."""
+        with self.lock:
+            running = sum(job.status == RUNNING for job in self.jobs.values())
+            stats = {'workers': self.max_workers, 'maxPending': self.max_pending,
+                     'queued': self.pending - running, 'running': running}
+            stats.update(self.counts)
+        stats['wait'] = self.wait_times.summary()
+        stats['latency'] = self.latencies.summary()
+        return stats
+
+    def shutdown(self):
+        """Cancel the queued jobs and stop the worker threads."""
+        with self.lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            self.cancel(job)
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,180 @@
+"""
+Move ordering for the Negamax search.
+
+Alpha-beta pruning only cuts off well when the best move is searched first.
+This module ranks candidate moves by their immediate tactical value, read from
+the game's incremental 5-cell window counts, and breaks ties with the killer
+and history heuristics.
+"""
+
+# Tactical classes, from least to most urgent
+QUIET, THREE, BLOCK_FOUR, DOUBLE_THREE, FOUR, BLOCK_OPEN_FOUR, OPEN_FOUR, BLOCK_FIVE, FIVE = range(9)
+
+# Weight of extending or blocking a window that already holds 0..4 stones
+WINDOW_WEIGHTS = (1, 10, 100, 1000, 10000)
+
+# Every window through a move adds a packed code to a running total, so one
+# table lookup per window replaces a chain of comparisons. Bit fields:
+_WEIGHT_BITS = 20       # weight of the windows extended or blocked
+_FOURS = 1 << 20        # number of own fours made (6 bits)
+_BLOCK_FOURS = 1 << 26  # number of opponent fours prevented (6 bits)
+_THREES = 1 << 32       # own threes made, 3 bits per direction (12 bits)
+_BLOCK_FIVE = 1 << 44   # opponent fives prevented
+_FIVE = 1 << 50         # own fives made
+
+
+def _build_window_codes():
+    """Build the code of a window, indexed by ``direction * 36 + mine * 6 + theirs``."""
+    codes = []
+    for direction in range(4):
+        for mine in range(6):
+            for theirs in range(6):
+                code = 0
+                if mine < 5 and theirs < 5:
+                    if not theirs:
+                        code = WINDOW_WEIGHTS[mine]
+                        if mine == 4:
+                            code += _FIVE
+                        elif mine == 3:
+                            code += _FOURS
+                        elif mine == 2:
+                            code += _THREES << (3 * direction)
+                    elif not mine:
+                        code = WINDOW_WEIGHTS[theirs]
+                        if theirs == 4:
+                            code += _BLOCK_FIVE
+                        elif theirs == 3:
+                            code += _BLOCK_FOURS
+                codes.append(code)
+    return tuple(codes)
+
+
+_WINDOW_CODES = _build_window_codes()
+
+# Per board size: for every cell, the (window, direction * 36) pairs through it
+_CELL_WINDOW_BASES = {}
+
+
+def cell_window_bases(game):
+    """Return, for every cell, the windows through it with their code offsets."""
+    bases = _CELL_WINDOW_BASES.get(game.board_size)
+    if bases is None:
+        size = game.board_size
+        steps = {1: 0, size: 1, size + 1: 2, size - 1: 3}
+        directions = [steps[cells[1] - cells[0]] for cells in game.window_cells]
+        bases = tuple(tuple((w, directions[w] * 36) for w in windows) for windows in game.cell_windows)
+        _CELL_WINDOW_BASES[game.board_size] = bases
+    return bases
+
+
+def _classify(total):
+    """Turn a sum of window codes into (tactical class, positional weight)."""
+    weight = total & (_FOURS - 1)
+    if total >= _FIVE:
+        return FIVE, weight
+    if total >= _BLOCK_FIVE:
+        return BLOCK_FIVE, weight
+    fours = (total >> 20) & 63
+    block_fours = (total >> 26) & 63
+    threes = (total >> 32) & 0xFFF
+    if fours >= 2:
+        return OPEN_FOUR, weight
+    if block_fours >= 2:
+        return BLOCK_OPEN_FOUR, weight
+    if fours:
+        return FOUR, weight
+    directions = bool(threes & 0o7) + bool(threes & 0o70) + bool(threes & 0o700) + bool(threes & 0o7000)
+    if directions >= 2:
+        return DOUBLE_THREE, weight
+    if block_fours:
+        return BLOCK_FOUR, weight
+    if directions:
+        return THREE, weight
+    return QUIET, weight
+
+
+def tactical_value(game, cell):
+    """Classify a move for the player to move.
+
+    A window through ``cell`` that holds only the mover's stones turns into a
+    five, a four or a three when the stone is played; a window holding only
+    the opponent's stones is one the move blocks. Several fours from the same
+    move (an open four or a double four) cannot both be blocked.
+
+    Args:
+        game: The game instance.
+        cell: The cell index (``row * board_size + col``) of the move.
+
+    Returns:
+        tuple: (tactical class, positional weight) where the weight sums the
+        scores of the windows the move extends or blocks.
+    """
+    own = game.window_counts[game.current_player]
+    other = game.window_counts[3 - game.current_player]
+    codes = _WINDOW_CODES
+    return _classify(sum([codes[base + own[w] * 6 + other[w]] for w, base in cell_window_bases(game)[cell]]))
+
+
+class MoveOrdering:
+    """Orders moves: transposition table move, tactics, killers, history."""
+
+    def __init__(self, killers=True, history=True):
+        """Initialize the move ordering.
+
+        Args:
+            killers: Use the killer heuristic (quiet moves that caused a
+                cutoff at the same depth are tried early).
+            history: Use the history heuristic (moves that often caused
+                cutoffs anywhere in the tree are tried early).
+        """
+        self.use_killers = killers
+        self.use_history = history
+        self.clear()
+
+    def clear(self):
+        """Forget the killer moves and history scores (e.g. between moves)."""
+        self.killers = {}  # depth -> up to two moves
+        self.history = {}  # move -> cutoff score
+
+    def age(self):
+        """Carry the tables over to the next move: forget the killers and halve the history scores."""
+        self.killers = {}
+        self.history = {move: score >> 1 for move, score in self.history.items() if score > 1}
+
+    def order(self, game, moves, depth, tt_move=None):
+        """Return the moves sorted from most to least promising.
+
+        Args:
+            game: The game instance.
+            moves: The list of (row, col) moves to order.
+            depth: The remaining search depth.
+            tt_move: The best move stored in the transposition table, if any.
+
+        Returns:
+            list: The moves in search order.
+        """
+        size = game.board_size
+        killers = self.killers.get(depth, ()) if self.use_killers else ()
+        history = self.history if self.use_history else {}
+        own = game.window_counts[game.current_player]
+        other = game.window_counts[3 - game.current_player]
+        codes = _WINDOW_CODES
+        bases = cell_window_bases(game)
+        keyed = []
+        for move in moves:
+            # Inlined tactical_value: this is the hot loop of the search
+            total = sum([codes[base + own[w] * 6 + other[w]] for w, base in bases[move[0] * size + move[1]]])
+            tactic, weight = _classify(total)
+            keyed.append(((move == tt_move, tactic, move in killers, history.get(move, 0), weight), move))
+        keyed.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in keyed]
+
+    def record_cutoff(self, move, depth):
+        """Record that ``move`` caused a beta cutoff at ``depth``."""
+        if self.use_killers:
+            killers = self.killers.setdefault(depth, [])
+            if move not in killers:
+                killers.insert(0, move)
+                del killers[2:]
+        if self.use_history:
+            self.history[move] = self.history.get(move, 0) + depth * depth
@@ -0,0 +1,188 @@
+"""
+Parallel root-split search for the Gomoku AI.
+
+``Negamax`` runs on a single core. ``ParallelNegamax`` keeps a pool of
+long-lived worker processes, each with its own ``Negamax`` engine and
+transposition table (which stay warm from one task and one move to the
+next), and splits every iteration of the iterative deepening at the root:
+
+1. the first root move (the previous iteration's best) is searched alone,
+   so that the others start with a good bound ("young brothers wait");
+2. the remaining root moves are searched in parallel.
+
+The best score found so far is shared between the workers through a
+``multiprocessing.Value``, so every root move is searched with the best
+bound known when it starts. Workers receive a compact position (the board
+size and the stones in the order they were played), not the game object.
+"""
+
+import os
+import time
+import weakref
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from gomoku import Negamax
+from move_ordering import MoveOrdering
+from position import Position
+from transposition_table import BoundedTranspositionTable
+
+# Per-process state of a worker (set by _init_worker)
+_worker = {}
+
+
+def encode_position(game):
+    """Return a compact, picklable description of a position.
+
+    Returns:
+        tuple: (board_size, stones, current_player) where ``stones`` lists
+        (cell, player) in the order the stones were played.
+    """
+    size = game.board_size
+    board = game.board
+    stones = tuple((cell, board[cell // size][cell % size]) for cell in game.move_history)
+    return size, stones, game.current_player
+
+
+def decode_position(position):
+    """Rebuild a position (a ``Position``, without players) from ``encode_position``'s output."""
+    board_size, stones, current_player = position
+    game = Position(board_size=board_size)
+    for cell, player in stones:
+        game.current_player = player
+        game.make_move(divmod(cell, board_size))
+    game.current_player = current_player
+    return game
+
+
+def _shutdown(executor):
+    """Shut a search's worker processes down (its ``close`` and its finalizer)."""
+    executor.shutdown(cancel_futures=True)
+
+
+def _init_worker(shared_alpha, tt_size_mb):
+    """Create the worker's engine and remember the shared bound."""
+    _worker['alpha'] = shared_alpha
+    _worker['engine'] = Negamax(depth=1, tt=BoundedTranspositionTable(size_mb=tt_size_mb))
+
+
+def _search_root_move(position, move, depth, deadline):
+    """Search one root move in a worker.
+
+    Args:
+        position: The root position (see ``encode_position``).
+        move: The root move to search.
+        depth: The depth of the iteration (the move itself is one ply).
+        deadline: The wall-clock time (``time.time()``) to stop at.
+
+    Returns:
+        tuple: (move, score, nodes), with score None if the deadline passed.
+    """
+    engine = _worker['engine']
+    shared_alpha = _worker['alpha']
+    game = decode_position(position)
+    engine.timeout = max(deadline - time.time(), 0.0)
+    engine.start_time = time.time()
+    engine.timed_out = False
+    engine.reset_stats()
+
+    game.make_move(move)
+    game.switch_player()
+    alpha = shared_alpha.value
+    score = -engine.search(game, depth - 1, -engine.win_score, -alpha)[0]
+    if engine.timed_out:
+        return move, None, engine.stats['nodes']
+    with shared_alpha.get_lock():
+        if score > shared_alpha.value:
+            shared_alpha.value = score
+    return move, score, engine.stats['nodes']
+
+
+class ParallelNegamax:
+    """Negamax with iterative deepening, split at the root over worker processes."""
+
+    def __init__(self, depth, win_score=100000, timeout=None, workers=None, tt_size_mb=16, neighbourhood=True):
+        """Initialize the parallel search.
+
+        Args:
+            depth: The maximum depth of the search tree.
+            win_score: The score for a winning position.
+            timeout: The maximum time (in seconds) to spend on a move.
+            workers: The number of worker processes (default: one per core).
+            tt_size_mb: The memory budget of each worker's transposition table.
+            neighbourhood: Search only the empty cells near existing stones.
+        """
+        self.depth = depth
+        self.win_score = win_score
+        self.timeout = timeout
+        self.workers = workers or os.cpu_count() or 1
+        self.tt_size_mb = tt_size_mb
+        self.neighbourhood = neighbourhood
+        # Orders the root moves before the first iteration
+        self.ordering = MoveOrdering()
+        self.executor = None
+        self.finalizer = None  # Shuts the workers down once the search is garbage collected
+        self.shared_alpha = None
+        self.result = None
+        self.stats = {'nodes': 0, 'depth': 0}
+
+    def start(self):
+        """Start the worker processes (done on the first search)."""
+        if self.executor is None:
+            self.shared_alpha = multiprocessing.Value('d', -self.win_score)
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                initargs=(self.shared_alpha, self.tt_size_mb))
+            self.finalizer = weakref.finalize(self, _shutdown, self.executor)
+
+    def close(self):
+        """Shut the worker processes down."""
+        if self.executor is not None:
+            self.finalizer()
+            self.executor = None
+
+    def __call__(self, game):
+        """Search increasing depths in parallel until the timeout or the maximum depth.
+
+        Args:
+            game: The game instance.
+
+        Returns:
+            The best move of the deepest completed iteration.
+        """
+        self.start()
+        start_time = time.time()
+        deadline = start_time + self.timeout if self.timeout is not None else float('inf')
+
+        def remaining():
+            return max(deadline - time.time(), 0) if self.timeout is not None else None
+
+        position = encode_position(game)
+        moves = game.candidate_moves() if self.neighbourhood else game.possible_moves()
+        moves = self.ordering.order(game, moves, self.depth)
+        self.stats = {'nodes': 0, 'depth': 0}
+        self.result = None
+        best_move = moves[0]
+
+        for depth in range(1, self.depth + 1):
+            self.shared_alpha.value = -self.win_score
+            first = self.executor.submit(_search_root_move, position, moves[0], depth, deadline)
+            done, _ = wait([first], timeout=remaining())
+            futures = [first]
+            if done and first.result()[1] is not None:
+                futures += [self.executor.submit(_search_root_move, position, move, depth, deadline)
+                            for move in moves[1:]]
+                done, _ = wait(futures, timeout=remaining())
+            results = [future.result() for future in futures if future in done]
+            for future in futures:
+                future.cancel()
+            self.stats['nodes'] += sum(nodes for _, _, nodes in results)
+            if len(results) < len(moves) or any(score is None for _, score, _ in results):
+                break  # Interrupted: keep the previous iteration's move
+            scores = {move: score for move, score, _ in results}
+            # The next iteration searches the best moves first
+            moves.sort(key=lambda move: scores[move], reverse=True)
+            best_move = moves[0]
+            self.result = (best_move, scores[best_move], depth)
+            self.stats['depth'] = depth
+        self.stats['elapsed'] = time.time() - start_time
+        return best_move
@@ -0,0 +1,166 @@
+"""
+Precomputed pattern tables for Gomoku line evaluation.
+
+A line (row, column or diagonal) is read as a sequence of cells holding
+0 (empty), 1 or 2 (stones) or 3 (the edge of the board). Packed two bits
+per cell, any six consecutive cells form a 12-bit code, and one index into
+a 4096-entry table classifies the run of stones that starts at the
+second of those cells:
+
+- five: five or more stones in a row;
+- open four / three / two: both cells next to the run are empty;
+- closed four / three / two: one of them is empty.
+
+A run blocked at both ends (and a single stone) scores nothing. A pattern
+is only recognised at the start of its run, so sliding the code along a
+line counts every run once. The tables are built once, at import.
+
+``build_window_tables`` builds the matching base-3 tables for the 5-cell
+windows scored by ``Gomoku._evaluate_line``.
+"""
+
+from itertools import chain
+
+EMPTY, WALL = 0, 3
+
+# Pattern classes, from least to most valuable
+NONE, CLOSED_TWO, OPEN_TWO, CLOSED_THREE, OPEN_THREE, CLOSED_FOUR, OPEN_FOUR, FIVE = range(8)
+CLASS_NAMES = ('none', 'closed two', 'open two', 'closed three', 'open three', 'closed four', 'open four',
+               'five')
+# The score of each class (see Gomoku.scoring)
+CLASS_SCORES = (0, 1, 10, 10, 100, 100, 1000, 10000)
+
+PATTERN_LENGTH = 6
+CODE_MASK = (1 << 2 * PATTERN_LENGTH) - 1
+# Cells read after a line, so that its last cells can start a pattern
+_LINE_END = (WALL,) * (PATTERN_LENGTH - 2)
+
+
+def _classify_cells(cells, player):
+    """Classify the run of the player's stones starting at ``cells[1]``."""
+    if cells[1] != player or cells[0] == player:
+        return NONE
+    length = 1
+    while length < 5 and cells[1 + length] == player:
+        length += 1
+    if length == 5:
+        return FIVE
+    if length == 1:
+        return NONE
+    ends = (cells[0] == EMPTY) + (cells[1 + length] == EMPTY)
+    if not ends:
+        return NONE
+    return {2: CLOSED_TWO, 3: CLOSED_THREE, 4: CLOSED_FOUR}[length] + ends - 1
+
+
+def _build_pattern_tables():
+    """Build ``(classes, scores)``: per player, the class and score of every 6-cell code."""
+    classes = [None, bytearray(CODE_MASK + 1), bytearray(CODE_MASK + 1)]
+    for code in range(CODE_MASK + 1):
+        cells = [(code >> 2 * (PATTERN_LENGTH - 1 - k)) & 3 for k in range(PATTERN_LENGTH)]
+        for player in (1, 2):
+            classes[player][code] = _classify_cells(cells, player)
+    scores = [None] + [tuple(CLASS_SCORES[cls] for cls in classes[player]) for player in (1, 2)]
+    return (None, bytes(classes[1]), bytes(classes[2])), tuple(scores)
+
+
+# PATTERN_CLASSES[player][code] and PATTERN_SCORES[player][code]
+PATTERN_CLASSES, PATTERN_SCORES = _build_pattern_tables()
+
+
+def build_window_tables(line_scores):
+    """Build per-player scores of every 5-cell window, indexed by its base-3 code.
+
+    The code of cells c0..c4 is ``c0 + 3*c1 + 9*c2 + 27*c3 + 81*c4``. A
+    window holding only one player's stones scores ``line_scores[count]``,
+    positive for the player and negative for the opponent.
+    """
+    tables = [None]
+    for player in (1, 2):
+        table = []
+        for code in range(3 ** 5):
+            cells = [(code // 3 ** k) % 3 for k in range(5)]
+            mine, theirs = cells.count(player), cells.count(3 - player)
+            if mine and not theirs:
+                table.append(line_scores[mine])
+            elif theirs and not mine:
+                table.append(-line_scores[theirs])
+            else:
+                table.append(0)
+        tables.append(tuple(table))
+    return tuple(tables)
+
+
+# Lines of cells (at least five long) in all four directions, keyed by board size
+_BOARD_LINES = {}
+
+
+def board_lines(board_size):
+    """Return every row, column and diagonal of a board that can hold a five, as tuples of cells."""
+    lines = _BOARD_LINES.get(board_size)
+    if lines is None:
+        size = board_size
+        lines = [tuple(row * size + col for col in range(size)) for row in range(size)]
+        lines += [tuple(row * size + col for row in range(size)) for col in range(size)]
+        for start in range(-(size - 5), size - 4):
+            # Diagonals (col - row == start) and anti-diagonals (row + col == size - 1 + start)
+            lines.append(tuple(row * size + row + start for row in range(size) if 0 <= row + start < size))
+            lines.append(tuple(row * size + size - 1 + start - row for row in range(size)
+                               if 0 <= size - 1 + start - row < size))
+        lines = tuple(lines)
+        _BOARD_LINES[board_size] = lines
+    return lines
+
+
+def _line_codes(cells):
+    """Yield the 6-cell code ending at every cell of a line (walls around it)."""
+    code = WALL
+    for value in chain(cells, _LINE_END):
+        code = ((code << 2) | value) & CODE_MASK
+        yield code
+
+
+def count_patterns(game, player):
+    """Count the player's patterns on the board.
+
+    Returns:
+        dict: The number of patterns of each class, keyed by class name
+        (``none`` is left out).
+    """
+    flat = [value for row in game.board for value in row]
+    classes = PATTERN_CLASSES[player]
+    counts = dict.fromkeys(CLASS_NAMES[1:], 0)
+    for line in board_lines(game.board_size):
+        for code in _line_codes([flat[cell] for cell in line]):
+            if classes[code]:
+                counts[CLASS_NAMES[classes[code]]] += 1
+    return counts
+
+
+def evaluate_patterns(game, player):
+    """Return the score of the player's patterns minus the opponent's."""
+    flat = [value for row in game.board for value in row]
+    own, other = PATTERN_SCORES[player], PATTERN_SCORES[3 - player]
+    mask = CODE_MASK
+    score = 0
+    for line in board_lines(game.board_size):
+        # _line_codes, inlined
+        code = WALL
+        for cell in line:
+            code = ((code << 2) | flat[cell]) & mask
+            score += own[code] - other[code]
+        for _ in _LINE_END:
+            code = ((code << 2) | WALL) & mask
+            score += own[code] - other[code]
+    return score
+
+
+def pattern_scoring(game):
+    """A scoring function (e.g. ``Negamax(scoring=pattern_scoring)``) for the player to move.
+
+    Scores open and closed shapes as described in ``Gomoku.scoring``; it
+    scans the whole board, so it is slower than the incremental score.
+    """
+    if game.lose():
+        return -10000
+    return evaluate_patterns(game, game.current_player)
@@ -0,0 +1,570 @@
+"""
+The Gomoku position: the board and the incremental state searched by the engines.
+
+``Position`` holds only the board, the side to move, the Zobrist hash, the
+move stack and the window counts behind the incremental evaluation. It
+uses ``__slots__`` and byte arrays, and shares the per-board-size tables
+between instances, so engines and servers can keep thousands of positions
+cheaply. ``gomoku.Gomoku`` adds the players and their engines on top.
+"""
+
+import random
+from contextlib import contextmanager
+
+from patterns import build_window_tables
+
+# Score of a 5-cell window holding 0..5 stones of a single player (see _evaluate_line)
+LINE_SCORES = (0, 1, 10, 100, 1000, 10000)
+# LINE_TABLES[player][code]: _evaluate_line's score of a window, by its base-3 code
+LINE_TABLES = build_window_tables(LINE_SCORES)
+
+# Window tables and Zobrist keys, keyed by board size
+_WINDOW_TABLES = {}
+_ZOBRIST_KEYS = {}
+# Neighbour tables, keyed by (board size, radius)
+_NEIGHBOUR_TABLES = {}
+
+def neighbour_table(board_size, radius):
+    """Return the cached neighbourhood of every cell for a board size.
+
+    Args:
+        board_size: The size of the board.
+        radius: The neighbourhood radius (Chebyshev distance).
+
+    Returns:
+        tuple: ``table[cell]`` is the tuple of cells (including ``cell``
+        itself) at most ``radius`` rows and columns away from ``cell``.
+    """
+    table = _NEIGHBOUR_TABLES.get((board_size, radius))
+    if table is None:
+        table = tuple(
+            tuple(r * board_size + c
+                  for r in range(max(0, row - radius), min(board_size, row + radius + 1))
+                  for c in range(max(0, col - radius), min(board_size, col + radius + 1)))
+            for row in range(board_size) for col in range(board_size))
+        _NEIGHBOUR_TABLES[(board_size, radius)] = table
+    return table
+
+def zobrist_keys(board_size):
+    """Return the cached Zobrist keys for a board size.
+
+    The keys come from a generator seeded with the board size, so the same
+    position always hashes to the same value, across games and processes.
+
+    Args:
+        board_size: The size of the board.
+
+    Returns:
+        tuple: (cell_keys, side_key) where ``cell_keys[cell][player]`` is the
+        64-bit key of a stone of ``player`` on ``cell`` (index 0 is unused) and
+        ``side_key`` is mixed in when player 2 is to move.
+    """
+    keys = _ZOBRIST_KEYS.get(board_size)
+    if keys is None:
+        rng = random.Random(f"gomoku-zobrist-{board_size}")
+        cell_keys = tuple((0, rng.getrandbits(64), rng.getrandbits(64))
+                          for _ in range(board_size * board_size))
+        keys = (cell_keys, rng.getrandbits(64))
+        _ZOBRIST_KEYS[board_size] = keys
+    return keys
+
+def window_tables(board_size):
+    """Return the cached 5-cell window tables for a board size.
+
+    Cells are numbered ``row * board_size + col``.
+
+    Args:
+        board_size: The size of the board.
+
+    Returns:
+        tuple: (window_cells, cell_windows) where ``window_cells[w]`` is the
+        tuple of the five cells of window ``w`` (rows, columns and both
+        diagonals) and ``cell_windows[cell]`` is the tuple of the windows
+        (at most 20) passing through ``cell``.
+    """
+    tables = _WINDOW_TABLES.get(board_size)
+    if tables is None:
+        window_cells = []
+        for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            for row in range(board_size):
+                for col in range(board_size):
+                    end_row, end_col = row + 4 * d_row, col + 4 * d_col
+                    if 0 <= end_row < board_size and 0 <= end_col < board_size:
+                        window_cells.append(tuple((row + k * d_row) * board_size + col + k * d_col
+                                                  for k in range(5)))
+        cell_windows = [[] for _ in range(board_size * board_size)]
+        for w, cells in enumerate(window_cells):
+            for cell in cells:
+                cell_windows[cell].append(w)
+        tables = (tuple(window_cells), tuple(tuple(windows) for windows in cell_windows))
+        _WINDOW_TABLES[board_size] = tables
+    return tables
+
+
+class Position:
+    """A Gomoku position, without players: the state the search engines work on."""
+
+    __slots__ = ('board_size', 'candidate_radius', 'window_cells', 'cell_windows', 'neighbours', 'zobrist_cells',
+                 'zobrist_side', 'verify_hash', 'hash_boards', 'verify_restore', 'board', 'current_player',
+                 'window_counts', 'eval_score', 'five_counts', 'stone_count', 'move_history', 'zobrist_hash',
+                 'near_counts', 'candidates')
+
+    def __init__(self, board_size=15, candidate_radius=2):
+        """Initialize an empty position, player 1 to move.
+
+        Args:
+            board_size: The size of the board (default: 15x15).
+            candidate_radius: How far from existing stones ``candidate_moves``
+                looks for moves (default: 2).
+        """
+        self.board_size = board_size
+        self.candidate_radius = candidate_radius
+        self.window_cells, self.cell_windows = window_tables(board_size)
+        self.neighbours = neighbour_table(board_size, candidate_radius)
+        self.zobrist_cells, self.zobrist_side = zobrist_keys(board_size)
+        # When True, ttentry() checks the incremental hash against the board
+        self.verify_hash = False
+        self.hash_boards = {}
+        # When True, every search checks that it left the game as it found it (see unchanged())
+        self.verify_restore = False
+        self.board = [[0 for _ in range(self.board_size)] for _ in range(self.board_size)]
+        self.reset_tracking()
+        self.current_player = 1  # Player 1 starts
+
+    def switch_player(self):
+        """Give the move to the other player."""
+        self.current_player = 3 - self.current_player
+
+    def possible_moves(self):
+        """Return a list of possible moves (empty cells) as (row, col) tuples."""
+        moves = []
+        for i in range(self.board_size):
+            for j in range(self.board_size):
+                if self.board[i][j] == 0:
+                    moves.append((i, j))
+        return moves
+
+    def candidate_moves(self):
+        """Return the empty cells near existing stones as (row, col) tuples.
+
+        Only cells within ``candidate_radius`` of a stone are returned (the
+        centre cell on an empty board), which keeps the branching factor of
+        the AI search small. ``possible_moves`` still lists every legal move.
+        """
+        if not self.candidates:
+            if self.stone_count:
+                return self.possible_moves()
+            center = self.board_size // 2
+            return [(center, center)]
+        size = self.board_size
+        return [divmod(cell, size) for cell in sorted(self.candidates)]
+
+    def make_move(self, move):
+        """Apply a move to the board.
+        
+        Args:
+            move: A tuple (row, col) representing the position to place the stone.
+
+        Raises:
+            ValueError: If the cell is outside the board or already occupied.
+        """
+        row, col = move
+        size = self.board_size
+        if not (0 <= row < size and 0 <= col < size):
+            raise ValueError(f"Move {move} is outside the board")
+        board_row = self.board[row]
+        if board_row[col]:
+            raise ValueError(f"Cell {move} is already occupied")
+        board_row[col] = self.current_player
+        self._add_stone(row * size + col, self.current_player)
+
+    def unmake_move(self, move):
+        """Undo a move from the board.
+        
+        The player who had played the stone is to move again, so a
+        ``make_move``/``switch_player`` pair is undone by ``unmake_move`` alone.
+        
+        Args:
+            move: A tuple (row, col) representing the position to remove the stone from.
+        """
+        row, col = move
+        player = self.board[row][col]
+        self.board[row][col] = 0
+        if player:
+            self._remove_stone(row * self.board_size + col, player)
+            self.current_player = player
+
+    def reset_tracking(self):
+        """Rebuild the incremental evaluation state from ``self.board``.
+
+        ``make_move`` and ``unmake_move`` keep this state up to date; call this
+        only after writing to the board directly.
+        """
+        num_windows = len(self.window_cells)
+        # window_counts[player][w]: number of the player's stones in window w (at most 5)
+        self.window_counts = [None, bytearray(num_windows), bytearray(num_windows)]
+        # Sum of all window scores from player 1's point of view
+        self.eval_score = 0
+        # five_counts[player]: number of windows filled by the player's stones
+        self.five_counts = [None, 0, 0]
+        self.stone_count = 0
+        self.move_history = []  # Occupied cells in the order they were played
+        self.zobrist_hash = 0
+        # near_counts[cell]: stones within candidate_radius of cell (itself included)
+        self.near_counts = bytearray(self.board_size * self.board_size)
+        self.candidates = set()  # Empty cells with a stone within candidate_radius
+        for row, cells in enumerate(self.board):
+            for col, cell in enumerate(cells):
+                if cell:
+                    self._add_stone(row * self.board_size + col, cell)
+
+    def _add_stone(self, cell, player):
+        """Update the window counts and running score for a placed stone.
+
+        Only the windows through ``cell`` change, so this costs at most 20
+        window updates instead of a full board evaluation.
+        """
+        own = self.window_counts[player]
+        other = self.window_counts[3 - player]
+        delta = 0
+        for w in self.cell_windows[cell]:
+            count = own[w]
+            own[w] = count + 1
+            if not other[w]:
+                # Still a pure window: it moves one step up the score ladder
+                delta += LINE_SCORES[count + 1] - LINE_SCORES[count]
+                if count == 4:
+                    # Only the stone just placed can complete a five
+                    self.five_counts[player] += 1
+            elif not count:
+                # The opponent's pure window is now blocked
+                delta += LINE_SCORES[other[w]]
+        self.eval_score += delta if player == 1 else -delta
+        self.stone_count += 1
+        self.move_history.append(cell)
+        self.zobrist_hash ^= self.zobrist_cells[cell][player]
+
+        # A neighbour seeing its first stone was empty (an occupied cell
+        # always counts its own stone), so it becomes a candidate
+        near = self.near_counts
+        for neighbour in self.neighbours[cell]:
+            near[neighbour] += 1
+            if near[neighbour] == 1:
+                self.candidates.add(neighbour)
+        self.candidates.discard(cell)
+
+    def _remove_stone(self, cell, player):
+        """Undo ``_add_stone`` for a stone removed from ``cell``."""
+        own = self.window_counts[player]
+        other = self.window_counts[3 - player]
+        delta = 0
+        for w in self.cell_windows[cell]:
+            count = own[w]
+            own[w] = count - 1
+            if not other[w]:
+                delta += LINE_SCORES[count - 1] - LINE_SCORES[count]
+                if count == 5:
+                    self.five_counts[player] -= 1
+            elif count == 1:
+                # The opponent's window becomes pure again
+                delta -= LINE_SCORES[other[w]]
+        self.eval_score += delta if player == 1 else -delta
+        self.stone_count -= 1
+        self.zobrist_hash ^= self.zobrist_cells[cell][player]
+
+        near = self.near_counts
+        for neighbour in self.neighbours[cell]:
+            near[neighbour] -= 1
+            if not near[neighbour]:
+                self.candidates.discard(neighbour)
+        if near[cell]:
+            self.candidates.add(cell)
+        if self.move_history[-1] == cell:
+            self.move_history.pop()
+        else:
+            self.move_history.remove(cell)
+
+    @property
+    def last_move(self):
+        """The (row, col) of the most recently placed stone, or None."""
+        if not self.move_history:
+            return None
+        return divmod(self.move_history[-1], self.board_size)
+
+    def lose(self):
+        """Has the opponent formed a five-in-a-row?"""
+        # A five can only appear in a window through a placed stone, so
+        # make_move already counted it; no board scan is needed
+        return self.five_counts[3 - self.current_player] > 0
+
+    def is_over(self):
+        """Is the game over?"""
+        # Check if current player lost (opponent won)
+        if self.five_counts[3 - self.current_player]:
+            return True
+        # Check if board is full
+        return self.stone_count == self.board_size * self.board_size
+
+    def show(self):
+        """Print the board.
+        
+        This method uses the __str__ method for consistency, ensuring that
+        the board is displayed with 1-based indexing and proper alignment
+        regardless of which method is used to show the board.
+        """
+        # Use the __str__ method for consistent display
+        print(self)
+
+    def scoring(self):
+        """Return a score for the current player.
+        
+        Every 5-cell window holding stones of one player only scores by its
+        number of stones (1, 10, 100, 1000 or 10000 points for 1 to 5), for
+        that player and against the opponent, so open shapes (which lie in
+        more such windows) score more than closed ones.
+        
+        The score is kept up to date incrementally by ``make_move`` and
+        ``unmake_move``, so this is O(1). It equals
+        ``_evaluate_board(player) - _evaluate_board(opponent)``.
+        ``patterns.pattern_scoring`` scores the shapes themselves instead:
+        
+        - 5 in a row: 10000 points
+        - 4 in a row (open): 1000 points
+        - 4 in a row (closed): 100 points
+        - 3 in a row (open): 100 points
+        - 3 in a row (closed): 10 points
+        - 2 in a row (open): 10 points
+        - 2 in a row (closed): 1 point
+        
+        Returns:
+            int: The score for the current player.
+        """
+        if self.lose():
+            return -10000
+        
+        # Every window counts for the player and, negated, for the opponent,
+        # so the difference is twice the running score
+        if self.current_player == 1:
+            return 2 * self.eval_score
+        return -2 * self.eval_score
+    
+    def _evaluate_board(self, player):
+        """Evaluate the board for a specific player.
+        
+        This walks every window of the board and is used as the reference
+        implementation for the incremental score kept by ``make_move``.
+        
+        Args:
+            player: The player to evaluate the board for (1 or 2).
+            
+        Returns:
+            int: The score for the player.
+        """
+        score = 0
+        size = self.board_size
+        board = self.board
+        
+        # Check rows
+        for i in range(size):
+            for j in range(size - 4):
+                # Count the number of player's stones in this row
+                row = [board[i][j + k] for k in range(5)]
+                score += self._evaluate_line(row, player)
+        
+        # Check columns
+        for i in range(size - 4):
+            for j in range(size):
+                # Count the number of player's stones in this column
+                col = [board[i + k][j] for k in range(5)]
+                score += self._evaluate_line(col, player)
+        
+        # Check diagonals (top-left to bottom-right)
+        for i in range(size - 4):
+            for j in range(size - 4):
+                # Count the number of player's stones in this diagonal
+                diag = [board[i + k][j + k] for k in range(5)]
+                score += self._evaluate_line(diag, player)
+        
+        # Check diagonals (top-right to bottom-left)
+        for i in range(size - 4):
+            for j in range(4, size):
+                # Count the number of player's stones in this diagonal
+                diag = [board[i + k][j - k] for k in range(5)]
+                score += self._evaluate_line(diag, player)
+        
+        return score
+    
+    def _evaluate_line(self, line, player):
+        """Evaluate a line of 5 cells for a specific player.
+        
+        A window holding only the player's stones scores 1, 10, 100, 1000 or
+        10000 for 1 to 5 stones, one holding only the opponent's stones the
+        negative of that, and a mixed or empty window 0. The score is read
+        from a precomputed table indexed by the window's base-3 code.
+        
+        Args:
+            line: A list of 5 cells.
+            player: The player to evaluate the line for (1 or 2).
+            
+        Returns:
+            int: The score for the line.
+        """
+        c0, c1, c2, c3, c4 = line
+        return LINE_TABLES[player][c0 + 3 * c1 + 9 * c2 + 27 * c3 + 81 * c4]
+
+    def five_in_a_row(self, opponent):
+        """Check if the opponent has five in a row.
+        
+        This scans the whole board; ``lose`` and ``is_over`` use the counts
+        kept by ``make_move`` instead.
+        
+        Args:
+            opponent: The player to check for five in a row (1 or 2).
+            
+        Returns:
+            bool: True if the opponent has five in a row, False otherwise.
+        """
+        size = self.board_size
+        board = self.board
+        
+        # Check if the board size is at least 5x5
+        if size < 5:
+            return False
+
+        # Check rows
+        for i in range(size):
+            for j in range(size - 4):
+                if all(board[i][j + k] == opponent for k in range(5)):
+                    return True
+
+        # Check columns
+        for i in range(size - 4):
+            for j in range(size):
+                if all(board[i + k][j] == opponent for k in range(5)):
+                    return True
+
+        # Check diagonals (top-left to bottom-right)
+        for i in range(size - 4):
+            for j in range(size - 4):
+                if all(board[i + k][j + k] == opponent for k in range(5)):
+                    return True
+
+        # Check diagonals (top-right to bottom-left)
+        for i in range(size - 4):
+            for j in range(4, size):
+                if all(board[i + k][j - k] == opponent for k in range(5)):
+                    return True
+
+        return False
+
+    def __str__(self):
+        """Return a string representation of the board with 1-based indexing.
+        
+        This method creates a visually appealing board display with:
+        - Row and column numbers starting from 1 (not 0)
+        - Proper alignment for all board sizes (9x9, 13x13, 15x15, 19x19)
+        - Consistent borders and spacing
+        - Colored pieces (blue O for player 1, red X for player 2)
+        """
+        # Calculate width needed for the largest index (for proper alignment)
+        cell_width = len(str(self.board_size))
+        
+        # Add column numbers (1-based indexing for user-friendly display)
+        header = " " * (cell_width + 3)
+        for i in range(self.board_size):
+            header += f"{i+1:>{cell_width}} "
+        s = header + "\n"
+        
+        # Calculate total width for the horizontal line
+        # Each cell takes 2 characters (the piece and a space)
+        total_width = self.board_size * 2
+        
+        # Add a horizontal line at the top of the board
+        s += " " * (cell_width + 1) + "+" + "-" * total_width + "+\n"
+        
+        # Add row numbers (1-based) and board content
+        for i, row in enumerate(self.board):
+            # Start the row with the row number and left border
+            row_str = f"{i+1:>{cell_width}} | "
+            
+            # Add each cell with proper formatting
+            for cell in row:
+                if cell == 0:
+                    # Empty cell
+                    row_str += "· "
+                elif cell == 1:
+                    # Player 1 (blue O)
+                    row_str += "\033[1;34mO\033[0m "
+                else:
+                    # Player 2 (red X)
+                    row_str += "\033[1;31mX\033[0m "
+            
+            # Add the right border (aligned consistently for all board sizes)
+            row_str += "|"
+            s += row_str + "\n"
+        
+        # Add a horizontal line at the bottom of the board
+        s += " " * (cell_width + 1) + "+" + "-" * total_width + "+\n"
+        
+        return s
+
+    def ttentry(self):
+        """Return a hashable representation of the board and current player for the transposition table.
+
+        This is the Zobrist hash kept up to date by ``make_move`` and
+        ``unmake_move``, with the side-to-move key mixed in for player 2.
+        Set ``verify_hash`` to check every key against a full recomputation
+        and against the boards previously seen with the same key.
+        """
+        key = self.zobrist_hash
+        if self.current_player == 2:
+            key ^= self.zobrist_side
+        if self.verify_hash:
+            self._verify_hash(key)
+        return key
+
+    def compute_hash(self):
+        """Compute the Zobrist hash of the board from scratch."""
+        key = 0
+        for row, cells in enumerate(self.board):
+            for col, cell in enumerate(cells):
+                if cell:
+                    key ^= self.zobrist_cells[row * self.board_size + col][cell]
+        return key
+
+    def _verify_hash(self, key):
+        """Check the incremental hash and look for collisions (debugging aid).
+
+        Raises:
+            AssertionError: If the incremental hash drifted from the board, or
+                if two different positions produced the same key.
+        """
+        assert self.zobrist_hash == self.compute_hash(), "Zobrist hash out of sync with the board"
+        position = (tuple(tuple(row) for row in self.board), self.current_player)
+        seen = self.hash_boards.setdefault(key, position)
+        assert seen == position, f"Zobrist collision on key {key:#018x}"
+
+    def snapshot(self):
+        """Return the position and all the incremental state, for comparison."""
+        return (tuple(tuple(row) for row in self.board), self.current_player, self.zobrist_hash,
+                self.eval_score, self.stone_count, tuple(self.move_history), tuple(self.five_counts[1:]),
+                tuple(self.window_counts[1]), tuple(self.window_counts[2]), tuple(self.near_counts),
+                frozenset(self.candidates))
+
+    @contextmanager
+    def unchanged(self):
+        """Check that a search leaves the game as it found it (when ``verify_restore`` is set).
+
+        The engines search on this instance with ``make_move``/``unmake_move``
+        and never copy it, so a missing or mismatched ``unmake_move`` would
+        corrupt the game; wrapping a search in this block catches that.
+
+        Raises:
+            AssertionError: If the game differs after the block.
+        """
+        if not self.verify_restore:
+            yield
+            return
+        before = self.snapshot()
+        yield
+        assert self.snapshot() == before, "The search did not restore the game"
@@ -0,0 +1,346 @@
+"""
+Proof-number search for the Gomoku AI.
+
+A proof-number search tries to *prove* that the player to move wins, rather
+than to score the position. Every node carries a proof number (how many
+leaves still have to be proven to prove it) and a disproof number; the search
+always expands the most-proving node, so it goes deep where the opponent's
+replies are forced and gives up early where they are not.
+
+This module implements depth-first proof-number search (df-pn) in negamax
+form: each node stores (phi, delta), its proof and disproof numbers from the
+point of view of the player to move. The numbers live in a fixed-size
+``ProofTable``, so a long solve cannot run out of memory; entries that are
+overwritten are simply recomputed.
+
+Move generation is shared with the other engines: candidate cells near the
+stones, ranked by ``MoveOrdering``, with the forced replies of
+``threat_search`` (blocking fives, answering open-four threats) pruning the
+defender's moves without losing soundness.
+"""
+
+import time
+from array import array
+
+from move_ordering import MoveOrdering
+from threat_search import five_cells, four_moves, open_four_threat, threat_moves, window_cells_with
+
+INFINITY = 2 ** 31 - 1
+KEY_MASK = (1 << 64) - 1
+NO_MOVE = -1
+
+# Bytes per slot: key (8) + phi, delta, work (4 each) + move (4)
+ENTRY_BYTES = 24
+
+PROVED, DISPROVED, UNKNOWN = 'proved', 'disproved', 'unknown'
+
+# Mixed into the table keys, so a table kept across solves never takes the
+# numbers proved for one attacker (or move generation) for the other's
+ATTACKER_KEYS = (0, 0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F)
+THREATS_ONLY_KEY = 0x165667B19E3779F9
+
+
+class ProofTable:
+    """A fixed-size table of proof and disproof numbers with two-slot buckets.
+
+    A store goes to the slot of its own position if present, otherwise to
+    the slot whose entry took less work to compute.
+    """
+
+    def __init__(self, entries=1 << 20):
+        """Initialize the table.
+
+        Args:
+            entries: The maximum number of entries (rounded down to a power of two).
+        """
+        buckets = 1
+        while buckets * 4 <= entries:
+            buckets *= 2
+        self.bucket_mask = buckets - 1
+        self.capacity = 2 * buckets
+        self.keys = array('Q', [0]) * self.capacity
+        self.phis = array('L', [0]) * self.capacity
+        self.deltas = array('L', [0]) * self.capacity
+        self.works = array('L', [0]) * self.capacity  # 0 marks an empty slot
+        self.moves = array('i', [NO_MOVE]) * self.capacity
+        self.filled = 0
+
+    def clear(self):
+        """Empty the table."""
+        self.works = array('L', [0]) * self.capacity
+        self.filled = 0
+
+    def lookup(self, key):
+        """Return (phi, delta, move cell) for a position key, or None."""
+        slot = 2 * (key & self.bucket_mask)
+        for index in (slot, slot + 1):
+            if self.works[index] and self.keys[index] == key:
+                return self.phis[index], self.deltas[index], self.moves[index]
+        return None
+
+    def store(self, key, phi, delta, work, move=NO_MOVE):
+        """Store the numbers of a position (``work`` is the size of its search, at least 1)."""
+        slot = 2 * (key & self.bucket_mask)
+        works = self.works
+        if works[slot] and self.keys[slot] == key:
+            index = slot
+        elif works[slot + 1] and self.keys[slot + 1] == key:
+            index = slot + 1
+        else:
+            index = slot if works[slot] <= works[slot + 1] else slot + 1
+            if not works[index]:
+                self.filled += 1
+        self.keys[index] = key
+        self.phis[index] = phi
+        self.deltas[index] = delta
+        works[index] = min(max(work, 1), INFINITY)
+        self.moves[index] = move
+
+    def __len__(self):
+        """Return the number of filled slots."""
+        return self.filled
+
+    def memory_bytes(self):
+        """Return the memory used by the table's columns, in bytes."""
+        return self.capacity * ENTRY_BYTES
+
+
+class ProofNumberSearch:
+    """Depth-first proof-number search (df-pn) for the player to move."""
+
+    def __init__(self, table=None, timeout=10, max_nodes=None, threats_only=False, fallback=None):
+        """Initialize the search.
+
+        Args:
+            table: A ``ProofTable`` (default: one with 2**20 entries).
+            timeout: The maximum time (in seconds) to spend on a solve.
+            max_nodes: The maximum number of nodes to expand (None: no limit).
+            threats_only: Let the attacker play threats only (see
+                ``threat_search.threat_moves``). Much faster for puzzles, but
+                a disproof then only means there is no win by threats.
+            fallback: The engine asked for a move when no win is proven (used
+                when the search plays as an AI).
+        """
+        self.table = table if table is not None else ProofTable()
+        self.timeout = timeout
+        self.max_nodes = max_nodes
+        self.threats_only = threats_only
+        self.fallback = fallback
+        self.ordering = MoveOrdering(killers=False, history=False)
+        self.start_time = None
+        self.aborted = False
+        self.attacker = None
+        self.salt = 0  # The key of the attacker and move generation (see ATTACKER_KEYS)
+        self.result = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the per-solve statistics."""
+        self.stats = {'nodes': 0, 'elapsed': 0.0}
+
+    def nodes_per_second(self):
+        """Return the node rate of the last solve."""
+        elapsed = self.stats['elapsed']
+        return self.stats['nodes'] / elapsed if elapsed > 0 else 0.0
+
+    def is_timeout(self):
+        """Check if the time or node budget is used up."""
+        if self.max_nodes is not None and self.stats['nodes'] >= self.max_nodes:
+            return True
+        if self.timeout is None:
+            return False
+        return time.time() - self.start_time > self.timeout
+
+    def __call__(self, game):
+        """Return the first move of a proven win, or ask the fallback engine.
+
+        Args:
+            game: The game instance.
+
+        Returns:
+            tuple: A tuple (row, col).
+        """
+        result = self.solve(game)
+        if result['status'] == PROVED and result['line']:
+            return result['line'][0]
+        if self.fallback is not None:
+            return self.fallback(game)
+        # Play the most promising attack (the child with the smallest disproof number)
+        move = result['best_move']
+        return move if move is not None else game.candidate_moves()[0]
+
+    def solve(self, game):
+        """Try to prove that the player to move wins.
+
+        Args:
+            game: The game instance (restored before returning).
+
+        Returns:
+            dict: ``status`` (proved, disproved or unknown), the root
+            ``proof``/``disproof`` numbers, the winning ``line`` if proved,
+            the ``best_move`` found, and ``nodes``, ``time`` and ``nps``.
+        """
+        self.start_time = time.time()
+        self.aborted = False
+        self.reset_stats()
+        self.attacker = game.current_player
+        self.salt = ATTACKER_KEYS[self.attacker] ^ (THREATS_ONLY_KEY if self.threats_only else 0)
+        with game.unchanged():
+            phi, delta = self.mid(game, INFINITY - 1, INFINITY - 1)
+        self.stats['elapsed'] = time.time() - self.start_time
+
+        if phi == 0:
+            status = PROVED
+        elif delta == 0:
+            status = DISPROVED
+        else:
+            status = UNKNOWN
+        entry = self.table.lookup(self.key(game))
+        best_move = divmod(entry[2], game.board_size) if entry is not None and entry[2] != NO_MOVE else None
+        self.result = {
+            'status': status,
+            'proof': phi,
+            'disproof': delta,
+            'line': self.winning_line(game) if status == PROVED else None,
+            'best_move': best_move,
+            'nodes': self.stats['nodes'],
+            'time': self.stats['elapsed'],
+            'nps': self.nodes_per_second(),
+        }
+        return self.result
+
+    def key(self, game):
+        """Return the 64-bit table key of a position, for the current attacker and move generation."""
+        entry = game.ttentry()
+        if not isinstance(entry, int):
+            entry = hash(entry)
+        return (entry ^ self.salt) & KEY_MASK
+
+    def children(self, game):
+        """Return the moves to expand, or (phi, delta) if the node is decided without them.
+
+        Returns:
+            tuple: (moves, numbers) where exactly one of the two is None.
+        """
+        player = game.current_player
+        if game.is_over():
+            # Lost, or a draw, which only counts as a win for the defender
+            won = not game.lose() and player != self.attacker
+            return None, (0, INFINITY) if won else (INFINITY, 0)
+        if five_cells(game, player):
+            return None, (0, INFINITY)  # The player to move completes a five
+        blocks = five_cells(game, 3 - player)
+        if len(blocks) > 1:
+            return None, (INFINITY, 0)  # Two fives cannot both be blocked
+        if blocks:
+            return list(blocks), None
+        if player != self.attacker and open_four_threat(game, 3 - player):
+            # Only these replies stop the attacker's open four (see threat_search)
+            cells = window_cells_with(game, 3 - player, 3) | four_moves(game, player)
+            return sorted(cells), None
+        if player == self.attacker and self.threats_only:
+            cells = threat_moves(game, player, True)
+            if not cells:
+                return None, (INFINITY, 0)
+            return cells, None
+        size = game.board_size
+        moves = self.ordering.order(game, game.candidate_moves(), 0)
+        return [row * size + col for row, col in moves], None
+
+    def child_numbers(self, game, cells):
+        """Look up the (phi, delta) of every child, (1, 1) for unknown ones."""
+        numbers = []
+        size = game.board_size
+        for cell in cells:
+            move = divmod(cell, size)
+            game.make_move(move)
+            game.switch_player()
+            entry = self.table.lookup(self.key(game))
+            game.unmake_move(move)
+            numbers.append(entry[:2] if entry is not None else (1, 1))
+        return numbers
+
+    def mid(self, game, phi_threshold, delta_threshold):
+        """Expand a node until its numbers reach the thresholds (Nagai's MID).
+
+        Args:
+            game: The game instance.
+            phi_threshold: Stop once the node's proof number reaches this.
+            delta_threshold: Stop once the node's disproof number reaches this.
+
+        Returns:
+            tuple: The node's (phi, delta).
+        """
+        self.stats['nodes'] += 1
+        key = self.key(game)
+        start_nodes = self.stats['nodes']
+        cells, numbers = self.children(game)
+        if numbers is not None:
+            self.table.store(key, numbers[0], numbers[1], 1)
+            return numbers
+
+        size = game.board_size
+        children = self.child_numbers(game, cells)
+        while True:
+            # phi is the smallest child delta, delta the sum of the child phis
+            best, best_delta, second_delta, delta = 0, INFINITY, INFINITY, 0
+            for index, (child_phi, child_delta) in enumerate(children):
+                delta = min(delta + child_phi, INFINITY)
+                if child_delta < best_delta:
+                    best, second_delta, best_delta = index, best_delta, child_delta
+                elif child_delta < second_delta:
+                    second_delta = child_delta
+            phi = best_delta
+            if phi >= phi_threshold or delta >= delta_threshold or self.aborted:
+                break
+            if self.is_timeout():
+                self.aborted = True
+                break
+            child_phi, child_delta = children[best]
+            child_phi_threshold = min(delta_threshold - delta + child_phi, INFINITY - 1)
+            child_delta_threshold = min(phi_threshold, second_delta + 1)
+            move = divmod(cells[best], size)
+            game.make_move(move)
+            game.switch_player()
+            children[best] = self.mid(game, child_phi_threshold, child_delta_threshold)
+            game.unmake_move(move)
+
+        self.table.store(key, phi, delta, self.stats['nodes'] - start_nodes + 1, cells[best])
+        return phi, delta
+
+    def winning_line(self, game):
+        """Follow the table from a proven position to recover a winning line.
+
+        At the attacker's nodes the proven move is played, at the defender's
+        nodes the first reply searched. The line may stop early if an entry
+        on it was overwritten.
+        """
+        line = []
+        played = []
+        size = game.board_size
+        while True:
+            fives = five_cells(game, game.current_player)
+            if fives and game.current_player == self.attacker:
+                line.append(divmod(min(fives), size))
+                break
+            entry = self.table.lookup(self.key(game))
+            if game.current_player == self.attacker:
+                if entry is None or entry[0] != 0 or entry[2] == NO_MOVE:
+                    break
+                cell = entry[2]
+            elif entry is not None and entry[2] != NO_MOVE:
+                cell = entry[2]
+            else:
+                # Decided without a search (e.g. a double four): any reply loses
+                cells = sorted(five_cells(game, self.attacker)) or self.children(game)[0]
+                if not cells:
+                    break
+                cell = cells[0]
+            move = divmod(cell, size)
+            game.make_move(move)
+            game.switch_player()
+            line.append(move)
+            played.append(move)
+        for move in reversed(played):
+            game.unmake_move(move)
+        return line
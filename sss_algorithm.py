@@ -1,124 +1,228 @@
 """
 SSS* (Secondary Search Strategy) algorithm implementation.
 
-This module provides an implementation of the SSS* algorithm for the Gomoku game.
-SSS* is a best-first search algorithm that can outperform alpha-beta pruning in some cases.
+This module provides a best-first search engine for the Gomoku game, written
+as MTD(f): a sequence of null-window alpha-beta searches ("memory-enhanced
+tests") that narrow the minimax value from both sides, with the bounds they
+prove kept in the transposition table. Plaat et al. showed that started from
+a first guess of +infinity this visits the same nodes as Stockman's SSS*,
+without SSS*'s OPEN list; starting from the previous iteration's score
+usually converges in a handful of tests.
+
+The search works on a single game instance with ``make_move``/``unmake_move``
+and never copies the game.
 """
 
-from easyAI import TranspositionTable
 import math
+import time
+
+from transposition_table import BoundedTranspositionTable, LOWERBOUND, EXACT, UPPERBOUND
+from move_ordering import MoveOrdering
+from iterative_deepening import IterativeDeepening
 
 class SSS:
-    """SSS* algorithm implementation."""
-    
-    def __init__(self, depth=3, scoring=None, win_score=100000, tt=None, timeout=10):
+    """SSS* algorithm implementation (MTD(f) over a bounds-storing transposition table)."""
+
+    def __init__(self, depth=3, scoring=None, win_score=100000, tt=None, timeout=10, neighbourhood=True,
+                 ordering=True, reuse=True):
         """Initialize the SSS* algorithm.
-        
+
         Args:
             depth: The maximum depth of the search tree.
             scoring: A function that returns a score for a given game state.
             win_score: The score for a winning position.
-            tt: A transposition table.
+            tt: A transposition table (default: a ``BoundedTranspositionTable``).
+                MTD(f) relies on it to remember the bounds of earlier tests.
             timeout: The maximum time (in seconds) to spend on a move.
+            neighbourhood: Search only the empty cells near existing stones
+                (``game.candidate_moves()``) instead of every empty cell.
+            ordering: Order moves by tactical value, killers and history
+                (True, or a ``MoveOrdering`` instance).
+            reuse: Age the transposition table and history scores between
+                moves instead of clearing them (see ``gomoku.Negamax``).
         """
         self.depth = depth
         self.scoring = scoring
         self.win_score = win_score
-        self.tt = tt if tt is not None else TranspositionTable()
+        self.tt = tt if tt is not None else BoundedTranspositionTable()
         self.timeout = timeout
+        self.neighbourhood = neighbourhood
+        if ordering is True:
+            ordering = MoveOrdering()
+        self.ordering = ordering or None
+        self.reuse = reuse
         self.start_time = None
-    
+        self.timed_out = False
+        self.pv_hints = {}  # position key -> move, from the previous iteration's PV
+        self.driver = IterativeDeepening(self)
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the per-search statistics."""
+        self.stats = {'nodes': 0, 'tests': 0}
+
+    def moves(self, game):
+        """Return the moves to search in the current position."""
+        if self.neighbourhood:
+            return game.candidate_moves()
+        return game.possible_moves()
+
     def is_timeout(self):
         """Check if the timeout has been reached."""
         if self.timeout is None:
             return False
         return time.time() - self.start_time > self.timeout
-    
-    def __call__(self, game):
-        """Run the SSS* algorithm to find the best move.
-        
+
+    def start_search(self):
+        """Prepare for a new search: start the clock and reset the per-search state."""
+        self.start_time = time.time()
+        self.timed_out = False
+        self.reset_stats()
+        if not self.reuse:
+            if self.ordering is not None:
+                self.ordering.clear()
+            if hasattr(self.tt, 'clear'):
+                self.tt.clear()
+            return
+        if self.ordering is not None:
+            self.ordering.age()
+        if hasattr(self.tt, 'new_search'):
+            self.tt.new_search()
+
+    def iteration(self, game, depth, previous=None):
+        """Run one iteration of iterative deepening with MTD(f).
+
+        Args:
+            game: The game instance.
+            depth: The depth of this iteration.
+            previous: The score of the previous iteration, used as the first guess.
+
+        Returns:
+            tuple: A tuple (score, move).
+        """
+        return self.mtdf(game, depth, previous if previous is not None else 0)
+
+    def mtdf(self, game, depth, guess):
+        """Find the minimax value of a position with null-window tests.
+
+        Each test ``search(game, depth, beta - 1, beta)`` either proves the
+        value is at least ``beta`` (a new lower bound) or returns an upper
+        bound; the next test is placed at the bound just found until the two
+        bounds meet.
+
         Args:
             game: The game instance.
-            
+            depth: The search depth.
+            guess: The first guess of the value.
+
         Returns:
-            The best move found.
+            tuple: A tuple (score, move).
         """
-        self.start_time = time.time()
-        best_move = None
-        best_value = -math.inf
-        
-        # Get all possible moves
-        moves = game.possible_moves()
-        
-        # Evaluate each move
-        for move in moves:
-            if self.is_timeout():
+        score, best_move = guess, None
+        lower, upper = -math.inf, math.inf
+        while lower < upper:
+            beta = score + 1 if score == lower else score
+            self.stats['tests'] += 1
+            score, move = self.search(game, depth, beta - 1, beta)
+            if self.timed_out:
                 break
-                
-            # Make the move
-            game_copy = game.copy()
-            game_copy.make_move(move)
-            
-            # Evaluate the position
-            value = self.sss_star(game_copy, -math.inf, math.inf, self.depth - 1)
-            
-            # Update best move if needed
-            if value > best_value:
-                best_value = value
+            if score < beta:
+                upper = score
+                if score > beta - 1:
+                    best_move = move  # An exact value inside the window
+            else:
+                # Only a test that fails high proves its move reaches the bound
+                lower = score
                 best_move = move
-                
-                # Early exit if we found a winning move
-                if best_value >= self.win_score:
-                    break
-        
-        return best_move
-    
-    def sss_star(self, game, alpha, beta, depth):
-        """Recursive SSS* search implementation.
-        
+        return score, best_move
+
+    def search(self, game, depth, alpha, beta):
+        """Fail-soft alpha-beta search that stores its bounds in the transposition table.
+
         Args:
             game: The game instance.
+            depth: The remaining search depth.
             alpha: The alpha value for pruning.
             beta: The beta value for pruning.
-            depth: The remaining search depth.
-            
+
         Returns:
-            The evaluation score for the position.
+            tuple: A tuple (score, move) representing the best score and move.
         """
-        # Check for terminal node or depth limit
+        if self.is_timeout():
+            self.timed_out = True
+            return -self.win_score, None
+
+        self.stats['nodes'] += 1
+        alpha_orig = alpha
+        lookup = self.tt.lookup(game)
+        if lookup is not None and lookup['depth'] >= depth:
+            flag, value = lookup['flag'], lookup['value']
+            if flag == EXACT:
+                return value, lookup['move']
+            elif flag == LOWERBOUND:
+                alpha = max(alpha, value)
+            elif flag == UPPERBOUND:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value, lookup['move']
+
         if depth == 0 or game.is_over():
-            return self.scoring(game) if self.scoring else 0
-        
-        # Check transposition table
-        tt_entry = self.tt.get(game)
-        if tt_entry is not None and tt_entry['depth'] >= depth:
-            return tt_entry['value']
-        
-        # Initialize
-        best_value = -math.inf
-        moves = game.possible_moves()
-        
-        # Search moves
+            score = self.scoring(game) if self.scoring else game.scoring()
+            # Quicker wins (and slower defeats) are worth more
+            return score * (1 + 0.001 * depth), None
+
+        moves = self.moves(game)
+        if lookup is not None:
+            tt_move = lookup['move']
+        else:
+            tt_move = self.pv_hints.get(game.ttentry()) if self.pv_hints else None
+        has_tt_move = tt_move in moves
+        if has_tt_move:
+            moves.remove(tt_move)
+        if self.ordering is not None:
+            moves = self.ordering.order(game, moves, depth)
+        if has_tt_move:
+            moves.insert(0, tt_move)
+
+        best_value, best_move = -math.inf, moves[0]
         for move in moves:
-            if self.is_timeout():
-                break
-                
-            # Make the move
-            game_copy = game.copy()
-            game_copy.make_move(move)
-            
-            # Recursive call
-            value = -self.sss_star(game_copy, -beta, -alpha, depth - 1)
-            
-            # Update best value and alpha
-            best_value = max(best_value, value)
-            alpha = max(alpha, best_value)
-            
-            # Beta cutoff
-            if alpha >= beta:
-                break
-        
-        # Store in transposition table
-        self.tt.store(game, depth=depth, value=best_value)
-        
-        return best_value
+            game.make_move(move)
+            game.switch_player()
+            value = -self.search(game, depth - 1, -beta, -alpha)[0]
+            game.unmake_move(move)
+
+            if value > best_value:
+                best_value, best_move = value, move
+            if value > alpha:
+                alpha = value
+                if alpha >= beta:
+                    if self.ordering is not None:
+                        self.ordering.record_cutoff(move, depth)
+                    break
+
+        # Results from an interrupted search are not reliable
+        if not self.timed_out:
+            if best_value <= alpha_orig:
+                flag = UPPERBOUND
+            elif best_value >= beta:
+                flag = LOWERBOUND
+            else:
+                flag = EXACT
+            self.tt.store(game=game, depth=depth, value=best_value, move=best_move, flag=flag)
+        return best_value, best_move
+
+    def __call__(self, game):
+        """Run the SSS* algorithm to find the best move.
+
+        Args:
+            game: The game instance.
+
+        Returns:
+            The best move found.
+        """
+        return self.driver(game)
+
+    @property
+    def result(self):
+        """The SearchResult (move, score, depth, pv, nodes, elapsed) of the last search."""
+        return self.driver.result
@@ -0,0 +1,109 @@
+"""
+Test script for the shared analysis cache.
+
+This script checks that symmetric positions share a cache entry and get
+their move back in their own orientation, the least-recently-used eviction,
+the SQLite file, the hit rates per board size, and that the engine pool
+answers a position searched by another game from the cache.
+"""
+
+import os
+import tempfile
+import threading
+
+from analysis_cache import AnalysisCache, canonical_position, symmetry_tables, SYMMETRIES
+from engine_pool import EnginePool
+from parallel_search import encode_position
+from game_fixtures import setup
+
+def transform(stones, symmetry, board_size):
+    """Apply a symmetry to a list of moves."""
+    return [SYMMETRIES[symmetry](row, col, board_size) for row, col in stones]
+
+def test_symmetries():
+    """Test that the 8 symmetric images of a position share one entry."""
+    print("Testing symmetric keys...")
+    forward, inverse = symmetry_tables(9)
+    assert len(set(forward)) == 8
+    assert all(inverse[index][forward[index][cell]] == cell for index in range(8) for cell in range(81))
+
+    black, white, move = [(2, 3), (4, 4)], [(3, 5)], (5, 6)
+    cache = AnalysisCache()
+    cache.put(encode_position(setup(9, black, white, to_move=2)), 'negamax', 3, True, move, 42, 3)
+    keys = set()
+    for symmetry in range(8):
+        game = setup(9, transform(black, symmetry, 9), transform(white, symmetry, 9), to_move=2)
+        position = encode_position(game)
+        keys.add(canonical_position(position)[0])
+        hit = cache.get(position, 'negamax', 3)
+        assert hit == {'move': SYMMETRIES[symmetry](*move, 9), 'score': 42, 'depth': 3}
+    assert len(keys) == 1 and len(cache) == 1
+
+    # Another side to move, depth, algorithm or board is another entry
+    position = encode_position(setup(9, black, white, to_move=2))
+    assert cache.get(position, 'negamax', 4) is None
+    assert cache.get(position, 'pvs', 3) is None
+    assert cache.get(position, 'negamax', 3, threat_search=False) is None
+    assert cache.get(encode_position(setup(9, black, white, to_move=1)), 'negamax', 3) is None
+    assert cache.get(encode_position(setup(11, black, white, to_move=2)), 'negamax', 3) is None
+    # Randomised searches are not cached
+    cache.put(position, 'mcts', 3, True, move, 0, 0)
+    assert cache.get(position, 'mcts', 3) is None
+
+def test_eviction_and_file():
+    """Test the LRU eviction, the SQLite file and the hit rate per board size."""
+    print("Testing cache eviction and the SQLite file...")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'analysis.db')
+        cache = AnalysisCache(max_entries=2, path=path)
+        positions = [encode_position(setup(15, [(7, 7), (row, 0)], [])) for row in range(3)]
+        for index, position in enumerate(positions):
+            cache.put(position, 'negamax', 2, True, (0, index + 1), index, 2)
+            if index == 1:
+                assert cache.get(positions[0], 'negamax', 2)['score'] == 0  # Now the most recent
+        assert len(cache) == 2
+        assert cache.key(positions[1], 'negamax', 2, True)[0] not in cache.entries
+        # Evicted from memory, still in the file
+        assert cache.get(positions[1], 'negamax', 2)['move'] == (0, 2)
+        cache.close()
+
+        # A new cache (a restarted server) reads the file
+        reopened = AnalysisCache(path=path)
+        assert reopened.get(positions[2], 'negamax', 2) == {'move': (0, 3), 'score': 2, 'depth': 2}
+        assert reopened.get(encode_position(setup(9, [(4, 4)], [])), 'negamax', 2) is None
+        stats = reopened.stats()
+        assert stats['boardSizes']['15'] == {'hits': 1, 'misses': 0, 'stores': 0, 'hitRate': 1.0}
+        assert stats['boardSizes']['9']['hitRate'] == 0.0
+        reopened.close()
+
+def test_pool_cache():
+    """Test that the engine pool answers a position another game searched from the cache."""
+    print("Testing the engine pool with the analysis cache...")
+    cache = AnalysisCache()
+    pool = EnginePool(workers=1, tt_size_mb=4, cache=cache)
+    try:
+        black, white = [(7, 7), (8, 8)], [(7, 8)]
+        first = pool.submit(setup(15, black, white, to_move=2), depth=3).result(30)
+        assert not first['cached'] and first['complete']
+        # A mirror image of the position, in another game
+        mirrored = setup(15, transform(black, 6, 15), transform(white, 6, 15), to_move=2)
+        second = pool.submit(mirrored, depth=3).result(30)
+        assert second['cached'] and second['worker'] is None
+        assert second['move'] == SYMMETRIES[6](*first['move'], 15) and second['score'] == first['score']
+        stats = pool.stats()
+        assert stats['cached'] == 1 and stats['completed'] == 1
+        assert cache.stats()['boardSizes']['15']['hitRate'] == 0.5
+
+        # A stopped search is not kept
+        started = threading.Event()
+        task = pool.submit(setup(15, [(3, 3)], [(3, 4), (9, 9)]), depth=20, progress=lambda event: started.set())
+        assert started.wait(30)
+        pool.stop(task)
+        assert not task.result(30)['complete'] and len(cache) == 1
+    finally:
+        pool.close()
+
+if __name__ == "__main__":
+    test_symmetries()
+    test_eviction_and_file()
+    test_pool_cache()
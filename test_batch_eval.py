@@ -0,0 +1,82 @@
+"""
+Test script for the vectorised batch evaluator.
+
+This script checks that the strided window views cover every window, that
+batch scores match the scalar evaluation, and that Negamax finds the same
+move when it scores its leaves in batches.
+"""
+
+import random
+
+import numpy as np
+
+from gomoku import Gomoku, Negamax
+from batch_eval import board_windows, evaluate_boards, score_boards, evaluate_children
+
+def random_game(board_size, num_moves, seed):
+    """Create a game by playing random moves (stopping at a five)."""
+    rng = random.Random(seed)
+    game = Gomoku(board_size=board_size)
+    for _ in range(num_moves):
+        game.make_move(rng.choice(game.possible_moves()))
+        if game.is_over():
+            break
+        game.switch_player()
+    return game
+
+def test_windows():
+    """Test that the window views are views, with one window per board window."""
+    print("Testing the window views...")
+    boards = np.arange(2 * 9 * 9, dtype=np.int16).reshape(2, 9, 9)
+    windows = board_windows(boards)
+    assert sum(view[0].size // 5 for view in windows) == len(Gomoku(board_size=9).window_cells)
+    assert all(np.shares_memory(view, boards) for view in windows)
+    rows, cols, diagonals, anti_diagonals = windows
+    assert list(rows[1, 2, 3]) == [boards[1, 2, 3 + k] for k in range(5)]
+    assert list(cols[1, 2, 3]) == [boards[1, 2 + k, 3] for k in range(5)]
+    assert list(diagonals[1, 2, 3]) == [boards[1, 2 + k, 3 + k] for k in range(5)]
+    assert list(anti_diagonals[1, 2, 3]) == [boards[1, 2 + k, 7 - k] for k in range(5)]
+
+def test_matches_scalar_evaluation():
+    """Test that batch scores equal _evaluate_board and scoring on random positions."""
+    print("Testing batch scores...")
+    games = [random_game(size, moves, seed) for seed, (size, moves) in
+             enumerate([(9, 10), (13, 30), (15, 0), (15, 50), (19, 60), (9, 70)])]
+    for game in games:
+        boards = np.array([game.board] * 3)
+        assert list(evaluate_boards(boards, 1)) == [game._evaluate_board(1)] * 3
+        assert evaluate_boards(game.board, 2)[0] == game._evaluate_board(2)
+        assert score_boards(game.board, game.current_player)[0] == game.scoring()
+
+    game = games[3]
+    moves = game.candidate_moves()
+    for move, score in zip(moves, evaluate_children(game, moves)):
+        game.make_move(move)
+        game.switch_player()
+        assert game.scoring() == score
+        game.switch_player()
+        game.unmake_move(move)
+
+    # A child where the player to move completes a five is lost for the opponent
+    game = Gomoku(board_size=9)
+    for move in [(4, 1), (4, 2), (4, 3), (4, 4)]:
+        game.make_move(move)
+    assert list(evaluate_children(game, [(4, 5), (0, 0)]))[0] == -10000
+
+def test_negamax_batch_leaves():
+    """Test that Negamax finds the same move and score with batched leaves."""
+    print("Testing Negamax with batched leaves...")
+    for seed in range(3):
+        game = random_game(15, 10, seed)
+        results = []
+        for batch_leaves in (False, True):
+            algorithm = Negamax(depth=2, batch_leaves=batch_leaves)
+            move = algorithm(game)
+            results.append((move, algorithm.result.score))
+        assert results[0][1] == results[1][1]
+    assert not Negamax(depth=2, scoring=lambda game: 0, batch_leaves=True).batch_leaves
+
+if __name__ == "__main__":
+    test_windows()
+    test_matches_scalar_evaluation()
+    test_negamax_batch_leaves()
@@ -0,0 +1,105 @@
+"""
+Test script for the bitboard board representation.
+
+This script checks that BitboardGomoku behaves exactly like the list-of-lists
+Gomoku board on random positions and can be searched by Negamax.
+"""
+
+import random
+
+from gomoku import Gomoku, Negamax
+from bitboard import BitboardGomoku
+from easyAI import TranspositionTable
+
+def play_random(games, num_moves, seed):
+    """Play the same random moves on several games."""
+    rng = random.Random(seed)
+    for _ in range(num_moves):
+        moves = games[0].possible_moves()
+        if not moves:
+            break
+        move = rng.choice(moves)
+        for game in games:
+            game.make_move(move)
+            game.current_player = 3 - game.current_player
+
+def test_bitboard_matches_list_board():
+    """Test that both backends agree on moves, wins and evaluation."""
+    print("Testing bitboard against the list-of-lists board...")
+    for size in (5, 9, 15, 19):
+        for seed in range(10):
+            game = Gomoku(board_size=size)
+            bitboard = BitboardGomoku(board_size=size)
+            play_random([game, bitboard], random.Random(seed).randint(0, size * size), seed)
+
+            assert bitboard.board == game.board
+            assert bitboard.possible_moves() == game.possible_moves()
+            assert bitboard.is_over() == game.is_over()
+            assert bitboard.scoring() == game.scoring()
+            for player in (1, 2):
+                assert bitboard.five_in_a_row(player) == game.five_in_a_row(player)
+                assert bitboard._evaluate_board(player) == game._evaluate_board(player)
+
+def test_bitboard_unmake_and_errors():
+    """Test that unmake_move restores the board and invalid moves raise."""
+    print("Testing bitboard make/unmake...")
+    game = BitboardGomoku(board_size=9)
+    entry = game.ttentry()
+    board = game.board
+    game.make_move((4, 4))
+    assert game.board[4][4] == 1
+    assert (4, 4) not in game.possible_moves()
+    # The same list, kept in step rather than rebuilt
+    assert game.board is board
+    game.unmake_move((4, 4))
+    assert game.ttentry() == entry and board[4][4] == 0
+
+    # Assigning a board copies it
+    rows = [[0] * 9 for _ in range(9)]
+    rows[2][3] = 2
+    game.board = rows
+    rows[2][3] = 0
+    assert game.board[2][3] == 2 and game.bitboards[2] == 1 << (2 * game.width + 3)
+    assert game.stone_count == 1 and game.zobrist_hash == game.compute_hash()
+
+    # The tracked state the search uses follows an assigned board
+    rows = [[0] * 9 for _ in range(9)]
+    for col in range(5):
+        rows[4][col] = 1
+    game.board = rows
+    game.current_player = 2
+    assert game.five_in_a_row(1) and game.lose() and game.is_over()
+    assert game.scoring() == -10000
+    rows[4][4] = 0
+    rows[0][0] = rows[8][8] = 2
+    game.board = rows
+    assert not game.is_over() and game.scoring() == game._evaluate_board(2) - game._evaluate_board(1) != 0
+    # Player 2 must block the four
+    assert Negamax(depth=2, tt=TranspositionTable())(game) == (4, 4)
+    assert game.board == rows and game.stone_count == 6
+    game.board = [[0] * 9 for _ in range(9)]
+
+    game.make_move((4, 4))
+    for move in [(4, 4), (-1, 0), (0, 9)]:
+        try:
+            game.make_move(move)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"Move {move} should have been rejected")
+
+def test_bitboard_negamax():
+    """Test that Negamax finds the winning move on a bitboard."""
+    print("Testing Negamax on a bitboard...")
+    game = BitboardGomoku(board_size=9)
+    for col in range(4):
+        game.make_move((4, col))
+    game.make_move((0, 8))
+    move = Negamax(depth=1, tt=TranspositionTable())(game)
+    game.make_move(move)
+    assert game.five_in_a_row(1)
+
+if __name__ == "__main__":
+    test_bitboard_matches_list_board()
+    test_bitboard_unmake_and_errors()
+    test_bitboard_negamax()
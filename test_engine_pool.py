@@ -0,0 +1,104 @@
+"""
+Test script for the AI engine pool.
+
+This script checks that the pool's workers search the same moves as an
+engine in the web process, that a worker's table stays warm between
+searches, that completed depths are streamed back, that a search can be
+stopped (running or queued), and the pool's load statistics.
+"""
+
+import time
+from concurrent.futures import CancelledError
+
+from gomoku import Negamax
+from engine_pool import EnginePool
+from transposition_table import BoundedTranspositionTable
+from game_fixtures import setup
+
+def test_search():
+    """Test that a worker finds the same move as a local engine, faster once its table is warm."""
+    print("Testing engine pool searches...")
+    pool = EnginePool(workers=2, tt_size_mb=4)
+    try:
+        pool.start()
+        game = setup(15, [(7, 7), (8, 8)], [(7, 8)], to_move=2)
+        local = Negamax(depth=3)
+        expected = local(game)
+        events = []
+        task = pool.submit(game, depth=3, threat_search=False, progress=events.append)
+        result = task.result(30)
+        assert result['move'] == expected and result['depth'] == 3
+        assert result['score'] == local.result.score
+        assert [event['depth'] for event in events] == [1, 2, 3]
+        assert events[-1]['move'] == {'row': expected[0], 'col': expected[1]}
+        # The position was not changed by sending it
+        assert game.stone_count == 3 and game.current_player == 2
+
+        # The same position again, on the same worker, is answered from its table
+        again = pool.submit(game, depth=3, threat_search=False).result(30)
+        if again['worker'] == result['worker']:
+            assert again['nodes'] < result['nodes']
+        assert again['move'] == expected
+
+        # A forced win is found by the threat search, and other algorithms run too
+        win = setup(9, [(4, 1), (4, 2), (4, 3), (4, 4)], [(0, 0), (8, 8), (0, 8)], to_move=1)
+        for algorithm in ('negamax', 'pvs', 'sss', 'mcts', 'lazysmp'):
+            assert pool.submit(win, algorithm=algorithm, depth=2).result(30)['move'] in [(4, 0), (4, 5)]
+
+        # A proven win is reported as such, not with the fallback's previous search
+        quiet = pool.submit(game, algorithm='pns', depth=3, threat_search=False).result(30)
+        assert quiet['depth'] == 3 and quiet['score'] is not None
+        proof = pool.submit(win, algorithm='pns', depth=3, threat_search=False).result(30)
+        assert proof['move'] in [(4, 0), (4, 5)] and proof['score'] is None
+        assert proof['nodes'] < quiet['nodes'] and proof['complete']
+    finally:
+        pool.close()
+
+def test_stop():
+    """Test that stopped searches return their best move so far, or are cancelled before they start."""
+    print("Testing stopping pool searches...")
+    pool = EnginePool(workers=1, tt_size_mb=4)
+    try:
+        game = setup(15, [(7, 7), (8, 8)], [(7, 8)], to_move=2)
+        events = []
+        running = pool.submit(game, depth=20, threat_search=False, progress=events.append)
+        queued = pool.submit(game, depth=20, threat_search=False)
+        assert pool.stop(queued)
+        deadline = time.time() + 30
+        while len(events) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        assert len(events) >= 2
+        start_time = time.time()
+        assert pool.stop(running)
+        result = running.result(10)
+        assert time.time() - start_time < 5
+        assert result['depth'] >= 2 and result['move'] in game.candidate_moves()
+        assert not pool.stop(running)
+        try:
+            # Already handed to the worker, it stops as soon as the pool hears it started
+            assert queued.result(10)['depth'] < 20
+        except CancelledError:
+            pass
+
+        # The next search of the worker is not stopped by the old request
+        assert pool.submit(game, depth=2, threat_search=False).result(30)['depth'] == 2
+        stats = pool.stats()
+        assert stats['completed'] == 1 and stats['stopped'] + stats['cancelled'] == 2
+        assert stats['queued'] == stats['running'] == 0
+        assert stats['perWorker'][0]['tasks'] == stats['queueWait']['count'] == 1 + stats['stopped']
+        assert 0 < stats['utilisation'] <= 1 and stats['searchTime']['p50'] > 0
+        # The memory the workers' tables actually allocated, not their budget
+        assert stats['ttBytes'] == BoundedTranspositionTable(size_mb=4).memory_bytes() < 4 * 1024 * 1024
+
+        # Stopping a queued search without cancelling it still gives a move
+        blocker = pool.submit(game, depth=20, threat_search=False)
+        queued = pool.submit(game, depth=20, threat_search=False)
+        assert pool.stop(queued, cancel=False)
+        pool.stop(blocker)
+        assert queued.result(10)['move'] in game.candidate_moves()
+    finally:
+        pool.close()
+
+if __name__ == "__main__":
+    test_search()
+    test_stop()
@@ -0,0 +1,91 @@
+"""
+Test script for the bounded game store.
+
+This script checks that game ids are unique, that idle and least recently
+used games are evicted, that the reserved transposition table memory stays
+under its cap, and the store's memory report.
+"""
+
+from gomoku import Gomoku, Human_Player
+from game_store import GameStore, tt_memory, MB
+
+class Clock:
+    """A clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def human_game(board_size=9):
+    """Create a game without an AI player."""
+    return Gomoku(board_size=board_size, players=[Human_Player(), Human_Player()])
+
+def test_ids_and_lru():
+    """Test that ids are unique and the least recently used games go first."""
+    print("Testing game ids and LRU eviction...")
+    evicted = []
+    store = GameStore(max_games=3, ttl=None, on_evict=lambda game_id, game, reason: evicted.append((game_id, reason)))
+    ids = [store.add(human_game()) for _ in range(3)]
+    assert len(set(ids)) == 3 and all(len(game_id) == 32 for game_id in ids)
+    assert store.get(ids[0]) is not None  # Now the most recently used
+    fourth = store.add(human_game())
+    assert evicted == [(ids[1], 'games')]
+    assert ids[1] not in store and store.get(ids[1]) is None
+    assert len(store) == 3 and fourth in store
+
+    game = human_game(15)
+    assert store.replace(ids[0], game) and store.get(ids[0]) is game
+    assert not store.replace(ids[1], game)
+    assert store.remove(ids[0]) is game and len(store) == 2
+
+def test_idle_eviction():
+    """Test that games idle for longer than the TTL are evicted."""
+    print("Testing idle eviction...")
+    clock = Clock()
+    store = GameStore(ttl=60, clock=clock)
+    first = store.add(human_game())
+    clock.now = 30
+    second = store.add(human_game())
+    clock.now = 70
+    assert store.get(second) is not None  # Idle for 40 s
+    assert first not in store  # Idle for 70 s
+    clock.now = 200
+    assert store.evict_idle() == 1 and len(store) == 0
+    assert store.stats()['evictions'] == {'idle': 2, 'games': 0, 'memory': 0}
+
+def test_memory_cap():
+    """Test that the reserved table memory stays under the cap and is reported."""
+    print("Testing the memory cap...")
+    store = GameStore(max_tt_mb=10, ttl=None)
+    ids = [store.add(Gomoku(board_size=9, tt_size_mb=4)) for _ in range(3)]
+    assert ids[0] not in store and len(store) == 2
+    stats = store.stats()
+    assert stats['ttReservedBytes'] == 8 * MB <= stats['maxTtBytes']
+    assert stats['evictions']['memory'] == 1
+    # The tables are only allocated with the AI players
+    assert stats['ttAllocatedBytes'] == 0 and stats['gamesWithAi'] == 0
+    game = store.get(ids[1])
+    game.players
+    assert 0 < tt_memory(game) <= 4 * MB
+    assert store.stats()['ttAllocatedBytes'] == tt_memory(game)
+    assert tt_memory(human_game()) == 0
+
+    # A game with its own players reserves its actual table (none for humans)
+    store.add(human_game())
+    stats = store.stats()
+    assert stats['ttReservedBytes'] == 8 * MB and len(store) == 3
+    # Only the game whose AI player was created holds an engine
+    assert stats['gamesWithAi'] == 1
+
+    try:
+        store.add(Gomoku(board_size=9, tt_size_mb=16))
+        assert False, "A game larger than the store should be refused"
+    except ValueError:
+        pass
+
+if __name__ == "__main__":
+    test_ids_and_lru()
+    test_idle_eviction()
+    test_memory_cap()
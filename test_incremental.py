@@ -0,0 +1,233 @@
+"""
+Test script for the incremental game state.
+
+This script plays random sequences of moves and take-backs and checks that the
+state kept up to date by make_move/unmake_move always matches a full
+recomputation from the board, and that the engines search without copying
+the game and leave it as they found it.
+"""
+
+import random
+
+from gomoku import Gomoku, Negamax, PVS
+from bitboard import BitboardGomoku
+from sss_algorithm import SSS
+from threat_search import ThreatSearch
+from proof_number import ProofNumberSearch
+from mcts import MCTS
+
+def random_walk(game, seed, check):
+    """Play random moves (and take some back), calling ``check`` after each step."""
+    rng = random.Random(seed)
+    history = []
+    for _ in range(rng.randint(0, game.board_size * game.board_size)):
+        move = rng.choice(game.possible_moves())
+        game.make_move(move)
+        game.current_player = 3 - game.current_player
+        history.append(move)
+        if rng.random() < 0.3:
+            game.current_player = 3 - game.current_player
+            game.unmake_move(history.pop())
+        check(game)
+
+def test_incremental_evaluation():
+    """Test that scoring() matches the full board evaluation."""
+    print("Testing incremental evaluation...")
+
+    def check(game):
+        player = game.current_player
+        assert game.eval_score == game._evaluate_board(1)
+        if not game.lose():
+            assert game.scoring() == game._evaluate_board(player) - game._evaluate_board(3 - player)
+
+    for game_class in (Gomoku, BitboardGomoku):
+        for size in (5, 9, 15):
+            for seed in range(5):
+                random_walk(game_class(board_size=size), seed, check)
+
+def test_win_and_draw_detection():
+    """Test that lose()/is_over() match a full board scan."""
+    print("Testing win and draw detection...")
+
+    def check(game):
+        opponent = 3 - game.current_player
+        full = all(cell for row in game.board for cell in row)
+        assert game.lose() == game.five_in_a_row(opponent)
+        assert game.is_over() == (game.five_in_a_row(opponent) or full)
+        assert game.stone_count == sum(1 for row in game.board for cell in row if cell)
+        if game.last_move is not None:
+            row, col = game.last_move
+            assert game.board[row][col]
+
+    for game_class in (Gomoku, BitboardGomoku):
+        for size in (3, 5, 9):
+            for seed in range(10):
+                random_walk(game_class(board_size=size), seed, check)
+
+def test_last_move():
+    """Test that unmake_move restores the previous last move."""
+    print("Testing last_move...")
+    game = Gomoku(board_size=9)
+    assert game.last_move is None
+    game.make_move((4, 4))
+    game.make_move((2, 3))
+    assert game.last_move == (2, 3)
+    game.unmake_move((2, 3))
+    assert game.last_move == (4, 4)
+    assert game.stone_count == 1
+
+def test_zobrist_hash():
+    """Test that the incremental hash matches a full recomputation."""
+    print("Testing Zobrist hashing...")
+
+    def check(game):
+        assert game.zobrist_hash == game.compute_hash()
+
+    for game_class in (Gomoku, BitboardGomoku):
+        for seed in range(5):
+            random_walk(game_class(board_size=9), seed, check)
+
+    # Transpositions share a key; the side to move does not
+    first, second = Gomoku(board_size=9), Gomoku(board_size=9)
+    for game, moves in ((first, [(1, 1), (2, 2), (3, 3)]), (second, [(3, 3), (2, 2), (1, 1)])):
+        for move in moves:
+            game.current_player = 1 if move != (2, 2) else 2
+            game.make_move(move)
+        game.current_player = 2
+    assert first.ttentry() == second.ttentry()
+    second.current_player = 1
+    assert first.ttentry() != second.ttentry()
+
+    # Keys are deterministic per board size
+    assert Gomoku(board_size=9).zobrist_cells == Gomoku(board_size=9).zobrist_cells
+
+def test_verify_hash():
+    """Test the debugging verification of the Zobrist hash."""
+    print("Testing Zobrist verification...")
+    game = Gomoku(board_size=9)
+    game.verify_hash = True
+    game.make_move((4, 4))
+    game.ttentry()
+    game.board[0][0] = 2  # Out-of-band write the hash does not know about
+    try:
+        game.ttentry()
+    except AssertionError:
+        pass
+    else:
+        raise AssertionError("Hash drift was not detected")
+
+def test_candidate_moves():
+    """Test that candidate_moves() lists the empty cells near stones."""
+    print("Testing candidate moves...")
+
+    def check(game):
+        radius = game.candidate_radius
+        stones = [(r, c) for r, row in enumerate(game.board) for c, cell in enumerate(row) if cell]
+        expected = [(r, c) for r, c in game.possible_moves()
+                    if any(abs(r - sr) <= radius and abs(c - sc) <= radius for sr, sc in stones)]
+        if stones and expected:
+            assert game.candidate_moves() == expected
+
+    for game_class in (Gomoku, BitboardGomoku):
+        for radius in (1, 2):
+            for seed in range(5):
+                random_walk(game_class(board_size=9, candidate_radius=radius), seed, check)
+
+    assert Gomoku(board_size=15).candidate_moves() == [(7, 7)]
+
+def test_reset_tracking():
+    """Test that reset_tracking() rebuilds the state after direct board writes."""
+    print("Testing reset_tracking...")
+    game = Gomoku(board_size=9)
+    for i in range(4):
+        game.board[i][i] = 1
+        game.board[i][i + 1] = 2
+    game.reset_tracking()
+    assert game.eval_score == game._evaluate_board(1)
+    assert game.zobrist_hash == game.compute_hash()
+
+def test_unmake_restores_player():
+    """Test that unmake_move alone undoes a move and the switch of player."""
+    print("Testing unmake_move and the player to move...")
+    for game_class in (Gomoku, BitboardGomoku):
+        game = game_class(board_size=9)
+        game.make_move((4, 4))
+        game.switch_player()
+        game.make_move((3, 3))
+        game.switch_player()
+        snapshot = game.snapshot()
+        game.make_move((2, 2))
+        game.switch_player()
+        assert game.current_player == 2
+        game.unmake_move((2, 2))
+        assert game.current_player == 1
+        assert game.snapshot() == snapshot
+        game.unmake_move((3, 3))
+        assert game.current_player == 2
+
+def test_invalid_moves():
+    """Test that both backends reject occupied and outside cells and keep their state."""
+    print("Testing invalid moves...")
+    for game_class in (Gomoku, BitboardGomoku):
+        game = game_class(board_size=9)
+        game.make_move((4, 4))
+        game.switch_player()
+        snapshot = game.snapshot()
+        for move in [(4, 4), (9, 0), (0, -1), (-1, 3)]:
+            try:
+                game.make_move(move)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"{game_class.__name__} accepted {move}")
+            assert game.snapshot() == snapshot
+        assert game.stone_count == 1 and game.board[4][4] == 1
+        assert game.zobrist_hash == game.compute_hash()
+
+def test_engines_restore_game():
+    """Test that every engine searches without copying the game and leaves it unchanged."""
+    print("Testing that the engines restore the game...")
+
+    def no_copy(self, *args):
+        raise AssertionError("The game was copied during a search")
+
+    game = Gomoku(board_size=9)
+    for move in [(4, 4), (4, 5), (3, 3), (5, 5), (3, 4), (2, 2)]:
+        game.make_move(move)
+        game.switch_player()
+    game.verify_restore = True
+    snapshot = game.snapshot()
+    Gomoku.copy = Gomoku.__deepcopy__ = no_copy
+    try:
+        for engine in [Negamax(depth=3), PVS(depth=3), SSS(depth=3), MCTS(timeout=None, max_playouts=200),
+                       ThreatSearch(timeout=None), ProofNumberSearch(max_nodes=2000)]:
+            engine(game)
+            assert game.snapshot() == snapshot, type(engine).__name__
+    finally:
+        del Gomoku.copy, Gomoku.__deepcopy__
+
+    # A search that forgets to undo a move is caught
+    def broken_iteration(game, depth, previous=None):
+        game.make_move(game.candidate_moves()[0])
+        return 0, None
+
+    engine = Negamax(depth=2)
+    engine.iteration = broken_iteration
+    try:
+        engine(game)
+    except AssertionError:
+        pass
+    else:
+        raise AssertionError("The unrestored game was not detected")
+
+if __name__ == "__main__":
+    test_incremental_evaluation()
+    test_win_and_draw_detection()
+    test_last_move()
+    test_zobrist_hash()
+    test_verify_hash()
+    test_candidate_moves()
+    test_reset_tracking()
+    test_unmake_restores_player()
+    test_invalid_moves()
+    test_engines_restore_game()
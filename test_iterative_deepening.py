@@ -5,8 +5,10 @@ This script tests the Iterative Deepening algorithm for the Negamax algorithm
 used in the Gomoku game.
 """
 
-from gomoku import Gomoku, Human_Player, AI_Player
-from iterative_deepening import NegamaxID
+import time
+
+from gomoku import Gomoku, Human_Player, AI_Player, Negamax, PVS
+from iterative_deepening import NegamaxID, IterativeDeepening
 from easyAI import TranspositionTable
 
 def test_iterative_deepening():
@@ -29,6 +31,9 @@ def test_iterative_deepening():
     # Make a few moves
     moves = [(4, 4), (3, 3), (5, 5), (2, 2), (6, 6)]
     for move in moves:
+        if game.board[move[0]][move[1]]:
+            # The AI already took this cell
+            continue
         print(f"Human move: {move}")
         game.make_move(move)
         game.current_player = 3 - game.current_player
@@ -55,5 +60,130 @@ def test_iterative_deepening():
         else:
             print("It's a draw!")
 
+def test_principal_variation():
+    """Test that the driver returns the deepest result with its principal variation."""
+    print("Testing the principal variation...")
+    game = Gomoku(board_size=9)
+    for move in [(4, 4), (3, 3), (4, 5), (3, 5)]:
+        game.make_move(move)
+        game.current_player = 3 - game.current_player
+    entry = game.ttentry()
+
+    ai = Negamax(depth=4)
+    reported = []
+    ai.driver.progress = reported.append
+    move = ai(game)
+    result = ai.result
+    assert reported == ai.driver.iterations and reported[-1] is result
+    assert result.depth == 4
+    assert result.move == move and result.pv[0] == move
+    assert 1 <= len(result.pv) <= 4
+    assert len(set(result.pv)) == len(result.pv)
+    assert game.ttentry() == entry and game.stone_count == 4
+    assert ai.pv_hints == {}
+
+def test_forced_win_stops_early():
+    """Test that deepening stops once the score is a forced win."""
+    print("Testing early stop on a forced win...")
+    game = Gomoku(board_size=9)
+    for col in range(4):
+        game.make_move((4, col))
+    game.current_player = 2
+    game.make_move((0, 8))
+    game.current_player = 1
+    ai = Negamax(depth=6)
+    assert ai(game) == (4, 4)
+    assert ai.result.depth == 1 and ai.result.pv == [(4, 4)]
+
+def test_terminal_pv_is_not_forced():
+    """Test that a principal variation ending the game does not stop deepening without a winning score."""
+    print("Testing deepening past a terminal principal variation...")
+    game = Gomoku(board_size=9)
+    for col in range(4):
+        game.make_move((4, col))
+    game.current_player = 1
+
+    class Engine:
+        """An engine whose move completes a five but whose score is not a win (as from a bound)."""
+        depth, reuse, tt, timed_out, pv_hints, start_time = 4, False, None, False, {}, 0.0
+        stats = {'nodes': 0}
+        def __init__(self, score):
+            self.score = score
+        def start_search(self):
+            self.start_time = time.time()
+        def iteration(self, game, depth, previous=None):
+            return self.score, (4, 4)
+
+    driver = IterativeDeepening(Engine(score=50))
+    assert driver.run(game).pv == [(4, 4)] and len(driver.iterations) == 4
+    driver = IterativeDeepening(Engine(score=10000 * 1.001))
+    assert driver.run(game).depth == 1
+
+def test_timeout_keeps_deepest_result():
+    """Test that an interrupted iteration does not replace the completed one."""
+    print("Testing timeout handling...")
+    game = Gomoku(board_size=15)
+    game.make_move((7, 7))
+    game.current_player = 2
+    ai = Negamax(depth=20, timeout=0.5)
+    move = ai(game)
+    assert ai.timed_out
+    assert ai.result is None or (ai.result.move == move and ai.result.depth < 20)
+    assert move in game.possible_moves()
+
+def test_reuse_across_moves():
+    """Test that the next move's search starts from the previous move's table and line."""
+    print("Testing search reuse across moves...")
+    game = Gomoku(board_size=15)
+    for move in [(7, 7), (8, 8), (7, 8), (6, 6)]:
+        game.make_move(move)
+        game.switch_player()
+    ai = Negamax(depth=4)
+    ai(game)
+    assert len(ai.driver.iterations) == ai.result.depth
+    assert [result.depth for result in ai.driver.iterations] == list(range(1, ai.result.depth + 1))
+    assert ai.driver.previous_hints and ai.pv_hints == {}
+    for move in ai.result.pv[:2]:
+        game.make_move(move)
+        game.switch_player()
+
+    # The shallow iterations are answered from the previous move's table
+    cold = Negamax(depth=4, reuse=False)
+    cold_move = cold(game)
+    move = ai(game)
+    assert move == cold_move or ai.result.score == cold.result.score
+    assert ai.driver.iterations[0].nodes < cold.driver.iterations[0].nodes
+    assert ai.driver.iterations[1].nodes < cold.driver.iterations[1].nodes
+    # Without reuse every search starts cold
+    first_iteration = cold.driver.iterations[0].nodes
+    cold(game)
+    assert cold.driver.iterations[0].nodes == first_iteration
+
+def test_pvs_reuse():
+    """Test that PVS passes ``reuse`` on, so a cold PVS search repeats itself exactly."""
+    print("Testing PVS search reuse...")
+    game = Gomoku(board_size=15)
+    for move in [(7, 7), (8, 8), (7, 8), (6, 6)]:
+        game.make_move(move)
+        game.switch_player()
+    warm = PVS(depth=3)
+    cold = PVS(depth=3, reuse=False)
+    assert warm.reuse and not cold.reuse
+    for ai in (warm, cold):
+        ai(game)
+    first_iteration = cold.driver.iterations[0].nodes
+    assert warm.driver.iterations[0].nodes == first_iteration
+    # Searching the same position again: warm hits its table, cold starts over
+    warm(game)
+    cold(game)
+    assert cold.driver.iterations[0].nodes == first_iteration
+    assert warm.driver.iterations[0].nodes < first_iteration
+
 if __name__ == "__main__":
     test_iterative_deepening()
+    test_principal_variation()
+    test_forced_win_stops_early()
+    test_terminal_pv_is_not_forced()
+    test_timeout_keeps_deepest_result()
+    test_reuse_across_moves()
+    test_pvs_reuse()
@@ -0,0 +1,126 @@
+"""
+Test script for the Lazy SMP search.
+
+This script checks that the shared-memory transposition table is seen by
+other processes, that Lazy SMP agrees with the serial Negamax, and that it
+respects its timeout.
+"""
+
+import pickle
+import gc
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+
+from gomoku import Gomoku, Negamax
+from lazy_smp import LazySMP
+from transposition_table import SharedTranspositionTable
+from game_fixtures import setup
+
+def store_entry(tt):
+    """Store an entry from another process."""
+    game = setup(9, [(4, 4)], [(3, 3)])
+    tt.store(game, 3, 42.0, (5, 5))
+
+def test_shared_table():
+    """Test that entries stored by another process can be looked up."""
+    print("Testing the shared transposition table...")
+    tt = SharedTranspositionTable(size_mb=1)
+    try:
+        process = multiprocessing.Process(target=store_entry, args=(tt,))
+        process.start()
+        process.join()
+        assert process.exitcode == 0
+        game = setup(9, [(4, 4)], [(3, 3)])
+        entry = tt.lookup(game)
+        assert entry['depth'] == 3 and entry['value'] == 42.0 and entry['move'] == (5, 5)
+        assert len(tt) == 1
+
+        # A pickled table attaches to the same memory
+        copy = pickle.loads(pickle.dumps(tt))
+        assert copy.memory.name == tt.memory.name and copy.capacity == tt.capacity
+        copy.clear()
+        assert tt.lookup(game) is None
+        copy.close()
+        assert tt.report()['torn_reads'] == 0
+    finally:
+        tt.close()
+
+def test_matches_serial_search():
+    """Test that Lazy SMP finds the serial search's score and tactics."""
+    print("Testing the Lazy SMP search...")
+    algorithm = LazySMP(depth=3, workers=2, tt_size_mb=1)
+    try:
+        game = setup(9, [(4, 4), (3, 3), (5, 4)], [(4, 5), (3, 4)], to_move=2)
+        serial = Negamax(depth=3)
+        serial(game)
+        move = algorithm(game)
+        assert algorithm.result.depth >= 3
+        if algorithm.result.depth == 3:
+            assert abs(algorithm.result.score - serial.result.score) < 1e-6
+        assert move == algorithm.result.move
+        assert len(algorithm.reports) == 2
+        assert game.stone_count == 5
+
+        game = setup(9, [(4, 1), (4, 2), (4, 3), (4, 4)], [(0, 0), (8, 8), (0, 8)], to_move=2)
+        assert algorithm(game) in [(4, 0), (4, 5)]
+    finally:
+        algorithm.close()
+
+def test_timeout():
+    """Test that Lazy SMP returns a legal move within its timeout."""
+    print("Testing the Lazy SMP timeout...")
+    game = setup(15, [(7, 7), (8, 8)], [(7, 8)], to_move=2)
+    algorithm = LazySMP(depth=20, timeout=1, workers=2, tt_size_mb=1)
+    try:
+        algorithm.start()
+        start_time = time.time()
+        move = algorithm(game)
+        assert time.time() - start_time < 3
+        assert move in game.possible_moves()
+        assert algorithm.stats['depth'] < 20
+    finally:
+        algorithm.close()
+    assert isinstance(Gomoku(board_size=9, ai_algorithm="lazysmp").players[1].AI_algo, LazySMP)
+
+def shared_block_exists(name):
+    """Return True if a shared memory block still exists."""
+    try:
+        block = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    block.close()
+    return True
+
+def start_game_workers():
+    """Create a game with the Lazy SMP search, search once, and return its worker processes and table."""
+    game = Gomoku(board_size=9, difficulty=1, ai_algorithm="lazysmp")
+    game.make_move((4, 4))
+    game.current_player = 2
+    game.players[1].AI_algo(game)
+    algorithm = game.players[1].AI_algo
+    return game, list(algorithm.executor._processes.values()), algorithm.tt.memory.name
+
+def test_workers_follow_the_game():
+    """Test that a game's workers stop on close() and when the game is garbage collected."""
+    print("Testing the Lazy SMP search's workers and the game's lifetime...")
+    game, processes, name = start_game_workers()
+    assert processes and all(process.is_alive() for process in processes)
+    game.close()
+    assert game.players[1].AI_algo.executor is None
+    assert not any(process.is_alive() for process in processes) and not shared_block_exists(name)
+    game.close()  # Closing again does nothing
+
+    # Never closed: dropping the game shuts the workers down and frees the shared table
+    game, processes, name = start_game_workers()
+    del game
+    gc.collect()
+    for process in processes:
+        process.join(10)
+    assert not any(process.is_alive() for process in processes) and not shared_block_exists(name)
+
+if __name__ == "__main__":
+    test_shared_table()
+    test_matches_serial_search()
+    test_timeout()
+    test_workers_follow_the_game()
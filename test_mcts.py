@@ -0,0 +1,117 @@
+"""
+Test script for the Monte Carlo Tree Search engine.
+
+This script checks the array-backed tree, that playouts leave the game
+unchanged, that forced wins and blocks are played, and that the search
+respects its timeout and keeps its tree between moves.
+"""
+
+import time
+
+from gomoku import Gomoku
+from mcts import MCTS, NO_CHILDREN
+from game_fixtures import setup
+
+def test_tree_arrays():
+    """Test that the tree's visits add up and its links are consistent."""
+    print("Testing the tree arrays...")
+    game = setup(9, [(4, 4), (3, 3)], [(4, 5)], to_move=2)
+    entry = game.ttentry()
+    algorithm = MCTS(timeout=None, max_playouts=400, batch=4, seed=1)
+    move = algorithm(game)
+    assert game.ttentry() == entry and game.current_player == 2 and game.stone_count == 3
+    assert move in game.candidate_moves()
+    assert algorithm.stats['playouts'] == 400
+    assert algorithm.visits[0] == 400
+    assert algorithm.stats['nodes'] == len(algorithm.visits) == len(algorithm.moves)
+
+    first, count = algorithm.first_child[0], algorithm.child_count[0]
+    assert count == len(game.candidate_moves())
+    assert sum(algorithm.visits[first:first + count]) == algorithm.visits[0]
+    for node in range(1, len(algorithm.visits)):
+        parent = algorithm.parents[node]
+        assert algorithm.first_child[parent] <= node < algorithm.first_child[parent] + algorithm.child_count[parent]
+        if algorithm.first_child[node] != NO_CHILDREN:
+            assert algorithm.visits[node] > 0
+    assert algorithm.result[0] == move
+
+def test_tree_reuse():
+    """Test that the next search keeps the subtree of the moves played since."""
+    print("Testing tree reuse...")
+    game = setup(9, [(4, 4), (3, 3)], [(4, 5)], to_move=2)
+    algorithm = MCTS(timeout=None, max_playouts=400, batch=4, seed=5)
+    move = algorithm(game)
+    node = algorithm.best_child(0)
+    reply_node = algorithm.best_child(node)
+    reply = divmod(algorithm.moves[reply_node], 9)
+    kept_visits, kept_wins = algorithm.visits[reply_node], algorithm.wins[reply_node]
+    assert kept_visits > 0
+
+    for played in (move, reply):
+        game.make_move(played)
+        game.switch_player()
+    assert algorithm.find_root(game) == reply_node
+    algorithm(game)
+    assert algorithm.stats['reused_visits'] == kept_visits
+    assert algorithm.visits[0] == kept_visits + 400
+    assert algorithm.wins[0] >= kept_wins
+    for child in range(1, len(algorithm.visits)):
+        parent = algorithm.parents[child]
+        assert algorithm.first_child[parent] <= child < algorithm.first_child[parent] + algorithm.child_count[parent]
+    # The playouts the root had as a leaf are not in its children
+    first, count = algorithm.first_child[0], algorithm.child_count[0]
+    assert 400 <= sum(algorithm.visits[first:first + count]) <= algorithm.visits[0]
+
+    # A position that does not follow from the last root starts a new tree
+    algorithm(setup(9, [(4, 4)], [(0, 0)], to_move=1))
+    assert algorithm.stats['reused_visits'] == 0
+    fresh = MCTS(timeout=None, max_playouts=100, seed=5, reuse=False)
+    fresh(game)
+    fresh(game)
+    assert fresh.stats['reused_visits'] == 0 and fresh.visits[0] == 100
+
+def test_simulate():
+    """Test that a batch of playouts returns a win count and leaves the game unchanged."""
+    print("Testing playouts...")
+    game = setup(9, [(4, 4), (3, 3)], [(4, 5)], to_move=2)
+    board = [row[:] for row in game.board]
+    counts = [game.window_counts[1][:], game.window_counts[2][:]]
+    algorithm = MCTS(seed=2)
+    wins = algorithm.simulate(game, 50)
+    assert 0 <= wins <= 50
+    assert algorithm.stats['playouts'] == 50
+    assert game.board == board and [game.window_counts[1], game.window_counts[2]] == counts
+    assert game.move_history == [4 * 9 + 4, 3 * 9 + 3, 4 * 9 + 5]
+
+def test_forced_moves():
+    """Test that MCTS completes its five, blocks the opponent's, and sees a lost position."""
+    print("Testing forced moves...")
+    algorithm = MCTS(timeout=None, max_playouts=200, seed=3)
+    game = setup(9, [(4, 1), (4, 2), (4, 3), (4, 4)], [(0, 0), (8, 8), (0, 8)], to_move=1)
+    assert algorithm(game) in [(4, 0), (4, 5)]
+    game.current_player = 2
+    assert algorithm(game) in [(4, 0), (4, 5)]
+
+    # Player 1's open four cannot be stopped: every move of player 2 loses
+    game = setup(9, [(4, 2), (4, 3), (4, 4), (4, 5)], [(0, 0), (8, 8), (0, 8)], to_move=2)
+    algorithm(game)
+    assert algorithm.result[1] < 0.1
+
+def test_timeout():
+    """Test that MCTS returns a legal move within its timeout."""
+    print("Testing the MCTS timeout...")
+    game = setup(15, [(7, 7), (8, 8)], [(7, 8)], to_move=2)
+    algorithm = MCTS(timeout=0.5)
+    start_time = time.time()
+    move = algorithm(game)
+    assert time.time() - start_time < 1.5
+    assert move in game.possible_moves()
+    assert algorithm.playouts_per_second() > 0
+    assert isinstance(Gomoku(board_size=9, ai_algorithm="mcts").players[1].AI_algo, MCTS)
+
+if __name__ == "__main__":
+    test_tree_arrays()
+    test_tree_reuse()
+    test_simulate()
+    test_forced_moves()
+    test_timeout()
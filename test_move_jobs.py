@@ -0,0 +1,136 @@
+"""
+Test script for the background AI move jobs.
+
+This script checks that jobs run an AI search and report its result, that
+the queue refuses work beyond its limit, that queued and running jobs can
+be cancelled or accepted early, that progress events reach the clients
+following a job, and the latency percentiles.
+"""
+
+import threading
+import time
+
+from gomoku import Negamax
+from move_jobs import MoveJobQueue, QueueFullError, percentiles, DONE, CANCELLED, FAILED
+from game_fixtures import setup
+
+def test_run_job():
+    """Test that a job searches a move in the background and reports it."""
+    print("Testing AI move jobs...")
+    queue = MoveJobQueue(max_workers=2, max_pending=4)
+    game = setup(9, [(4, 1), (4, 2), (4, 3), (4, 4)], [(0, 0), (8, 8), (0, 8)], to_move=2, difficulty=2)
+
+    def work(job):
+        move = game.players[1].ask_move(game)
+        game.make_move(move)
+        return {'row': move[0], 'col': move[1]}
+
+    job = queue.submit('1', work)
+    assert job.wait(30)
+    assert job.status == DONE and (job.result['row'], job.result['col']) in [(4, 0), (4, 5)]
+    assert queue.get(job.id) is job and queue.active('1') is None
+    assert job.to_dict()['result'] == job.result
+
+    failed = queue.submit('2', lambda job: 1 / 0)
+    assert failed.wait(5) and failed.status == FAILED and 'division' in failed.to_dict()['error']
+    stats = queue.stats()
+    assert stats[DONE] == 1 and stats[FAILED] == 1 and stats['queued'] == stats['running'] == 0
+    assert stats['latency']['count'] == 1 and stats['latency']['p50'] > 0
+    queue.shutdown()
+
+def test_queue_limit():
+    """Test that the queue refuses jobs beyond max_pending."""
+    print("Testing the queue limit...")
+    queue = MoveJobQueue(max_workers=1, max_pending=2)
+    release = threading.Event()
+    first = queue.submit('1', lambda job: release.wait(5))
+    second = queue.submit('2', lambda job: 'second')
+    assert queue.is_full()
+    try:
+        queue.submit('3', lambda job: 'third')
+        assert False, "The third job should be refused"
+    except QueueFullError:
+        pass
+    assert queue.stats()['rejected'] == 1
+    assert queue.active('2') is second
+    release.set()
+    assert first.wait(5) and second.wait(5) and second.result == 'second'
+    assert not queue.is_full()
+    queue.shutdown()
+
+def test_cancel():
+    """Test that cancelling drops a queued job and stops a running search."""
+    print("Testing job cancellation...")
+    queue = MoveJobQueue(max_workers=1, max_pending=4)
+    game = setup(15, [(7, 7), (8, 8)], [(7, 8)], to_move=2, difficulty=2)
+    engine = Negamax(depth=20)  # No timeout: only stop() ends the search early
+    started = threading.Event()
+
+    def work(job):
+        started.set()
+        return engine(game)
+
+    def stop():
+        engine.timeout = 0
+
+    running = queue.submit('1', work, stop=stop)
+    queued = queue.submit('1', lambda job: 'never')
+    assert started.wait(5)
+    start_time = time.time()
+    assert queue.cancel_game('1') == 2
+    assert running.wait(10) and queued.wait(1)
+    assert time.time() - start_time < 5
+    assert running.status == CANCELLED and running.result is None
+    assert queued.status == CANCELLED and queued.result is None
+    assert not queue.cancel(running)
+    assert queue.stats()[CANCELLED] == 2 and not queue.is_full()
+    assert game.stone_count == 3 and game.current_player == 2
+    queue.shutdown()
+
+def test_progress_and_accept():
+    """Test that a job streams its completed depths and can be stopped with its best move."""
+    print("Testing job progress and early accept...")
+    queue = MoveJobQueue(max_workers=1)
+    game = setup(15, [(7, 7), (8, 8)], [(7, 8)], to_move=2, difficulty=2)
+    engine = Negamax(depth=20)
+
+    def work(job):
+        engine.driver.progress = lambda result: job.publish({'depth': result.depth, 'move': result.move})
+        try:
+            return engine(game)
+        finally:
+            engine.driver.progress = None
+            engine.timeout = None
+
+    def stop():
+        engine.timeout = 0
+
+    job = queue.submit('1', work, stop=stop)
+    events = []
+    while len(events) < 2:
+        new_events = job.wait_events(len(events), timeout=10)
+        assert new_events and not job.done.is_set()
+        events += new_events
+    assert [event['depth'] for event in events[:2]] == [1, 2]
+    assert queue.accept(job)
+    assert job.wait(10) and job.status == DONE
+    assert job.result == engine.result.move == job.events[-1]['move']
+    assert [event['depth'] for event in job.events] == list(range(1, engine.result.depth + 1))
+    assert engine.timeout is None and not queue.accept(job)
+    # A finished job wakes its followers at once
+    assert job.wait_events(len(job.events), timeout=5) == []
+    queue.shutdown()
+
+def test_percentiles():
+    """Test the nearest-rank percentiles."""
+    print("Testing percentiles...")
+    assert percentiles(range(1, 101)) == {'p50': 50, 'p90': 90, 'p99': 99}
+    assert percentiles([3.0]) == {'p50': 3.0, 'p90': 3.0, 'p99': 3.0}
+    assert percentiles([]) == {'p50': None, 'p90': None, 'p99': None}
+
+if __name__ == "__main__":
+    test_run_job()
+    test_queue_limit()
+    test_cancel()
+    test_progress_and_accept()
+    test_percentiles()
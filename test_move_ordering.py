@@ -0,0 +1,68 @@
+"""
+Test script for the move ordering.
+
+This script checks that tactical moves are ranked first and that the killer
+and history heuristics and the search statistics behave as expected.
+"""
+
+from gomoku import Negamax
+from move_ordering import (MoveOrdering, tactical_value, FIVE, BLOCK_FIVE, OPEN_FOUR, FOUR,
+                           DOUBLE_THREE, QUIET)
+from game_fixtures import setup
+
+def test_tactical_classes():
+    """Test the tactical classification of single moves."""
+    print("Testing tactical classes...")
+    game = setup(15, [(7, 3), (7, 4), (7, 5), (7, 6)], [(0, 0)], to_move=1)
+    assert tactical_value(game, 7 * 15 + 7)[0] == FIVE
+    game.current_player = 2
+    assert tactical_value(game, 7 * 15 + 7)[0] == BLOCK_FIVE
+
+    game = setup(15, [(7, 4), (7, 5), (7, 6)], [(0, 0)], to_move=1)
+    assert tactical_value(game, 7 * 15 + 7)[0] == OPEN_FOUR
+
+    game = setup(15, [(7, 4), (7, 5), (7, 6)], [(7, 3)], to_move=1)
+    assert tactical_value(game, 7 * 15 + 7)[0] == FOUR
+
+    game = setup(15, [(7, 5), (7, 6), (5, 7), (6, 7)], [(0, 0)], to_move=1)
+    assert tactical_value(game, 7 * 15 + 7)[0] == DOUBLE_THREE
+
+    assert tactical_value(game, 14 * 15 + 14)[0] == QUIET
+
+def test_order():
+    """Test that the transposition table move, tactics and killers come first."""
+    print("Testing move order...")
+    game = setup(15, [(7, 4), (7, 5), (7, 6)], [(8, 4), (8, 5), (8, 6), (8, 7)], to_move=1)
+    ordering = MoveOrdering()
+    moves = game.candidate_moves()
+    ordered = ordering.order(game, moves, 3)
+    assert ordered[0] in [(8, 3), (8, 8)]  # Block the five before making an open four
+    assert sorted(ordered) == sorted(moves)
+
+    assert ordering.order(game, moves, 3, tt_move=(5, 5))[0] == (5, 5)
+
+    game = setup(15, [(7, 7)], [(0, 0)], to_move=2)
+    ordering.record_cutoff((6, 6), 3)
+    assert ordering.order(game, game.candidate_moves(), 3)[0] == (6, 6)
+    assert ordering.history[(6, 6)] == 9
+
+    # Between moves the killers are forgotten and the history scores halve
+    ordering.record_cutoff((5, 5), 1)
+    ordering.age()
+    assert ordering.killers == {} and ordering.history == {(6, 6): 4}
+
+def test_ordering_statistics():
+    """Test that ordering prunes more and reports its cutoff rate."""
+    print("Testing ordering statistics...")
+    game = setup(15, [(7, 7), (8, 8), (8, 7)], [(7, 8), (6, 6)], to_move=2)
+    plain = Negamax(depth=3, ordering=False)
+    ordered = Negamax(depth=3)
+    assert plain(game) is not None and ordered(game) is not None
+    assert ordered.stats['nodes'] < plain.stats['nodes']
+    assert ordered.first_move_cutoff_rate() > plain.first_move_cutoff_rate()
+    assert 0.0 <= ordered.first_move_cutoff_rate() <= 1.0
+
+if __name__ == "__main__":
+    test_tactical_classes()
+    test_order()
+    test_ordering_statistics()
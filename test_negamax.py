@@ -0,0 +1,78 @@
+"""
+Test script for the Negamax search.
+
+This script checks the native Negamax search against easyAI's reference
+negamax and on simple tactical positions.
+"""
+
+from gomoku import Gomoku, Negamax, PVS, AI_Player
+from easyAI import Negamax as EasyAI_Negamax, TranspositionTable
+from game_fixtures import setup
+
+def test_matches_easyai_negamax():
+    """Test that the full-width search scores positions like easyAI's negamax."""
+    print("Testing Negamax against easyAI...")
+    game = setup(6, [(2, 2), (3, 3)], [(2, 3)])
+    for depth in (1, 2):
+        reference = EasyAI_Negamax(depth, win_score=100000)
+        reference(game)
+        ai = Negamax(depth, tt=None, neighbourhood=False)
+        score, _ = ai.search(game, depth, -ai.win_score, ai.win_score)
+        assert abs(score - reference.alpha) < 1e-6
+
+def test_takes_win_and_blocks():
+    """Test that Negamax completes its own five and blocks the opponent's."""
+    print("Testing Negamax tactics...")
+    for neighbourhood in (True, False):
+        # Player 2 to move with four in a row: must win
+        game = setup(9, [(0, 0), (8, 8), (0, 8)], [(4, 1), (4, 2), (4, 3), (4, 4)], to_move=2)
+        move = Negamax(depth=2, neighbourhood=neighbourhood)(game)
+        assert move in [(4, 0), (4, 5)]
+
+        # Player 2 to move, player 1 threatens five: must block
+        game = setup(9, [(4, 1), (4, 2), (4, 3), (4, 4)], [(0, 0), (8, 8), (0, 8)], to_move=2)
+        move = Negamax(depth=2, neighbourhood=neighbourhood)(game)
+        assert move in [(4, 0), (4, 5)]
+
+def test_board_restored_after_search():
+    """Test that the search leaves the game exactly as it found it."""
+    print("Testing make/unmake during search...")
+    game = setup(9, [(4, 4), (3, 3)], [(4, 5)], to_move=2)
+    entry, score = game.ttentry(), game.scoring()
+    Negamax(depth=3)(game)
+    assert game.ttentry() == entry
+    assert game.scoring() == score
+    assert game.current_player == 2
+
+def test_pvs_matches_alpha_beta():
+    """Test that PVS and aspiration windows find the same scores as plain alpha-beta."""
+    print("Testing PVS against alpha-beta...")
+    game = setup(9, [(4, 4), (3, 3), (5, 4)], [(4, 5), (3, 4)], to_move=2)
+    for depth in (1, 2, 3):
+        plain, pvs = Negamax(depth), PVS(depth)
+        plain.tt = pvs.tt = None  # Table entries from deeper searches would change the scores
+        expected, _ = plain.search(game, depth, -plain.win_score, plain.win_score)
+        score, _ = pvs.search(game, depth, -pvs.win_score, pvs.win_score)
+        assert abs(score - expected) < 1e-6
+        # Windows that are too high, too low and right around the score
+        for previous in (expected - 500, expected + 500, expected):
+            score, _ = pvs.iteration(game, depth, previous)
+            assert abs(score - expected) < 1e-6
+    assert pvs.stats['fail_highs'] and pvs.stats['fail_lows']
+
+def test_pvs_tactics():
+    """Test that PVS completes its own five, blocks the opponent's and is selectable."""
+    print("Testing PVS tactics...")
+    game = setup(9, [(0, 0), (8, 8), (0, 8)], [(4, 1), (4, 2), (4, 3), (4, 4)], to_move=2)
+    assert PVS(depth=3)(game) in [(4, 0), (4, 5)]
+    game = setup(9, [(4, 1), (4, 2), (4, 3), (4, 4)], [(0, 0), (8, 8), (0, 8)], to_move=2)
+    assert PVS(depth=3)(game) in [(4, 0), (4, 5)]
+    player = Gomoku(board_size=9, ai_algorithm="pvs").players[1]
+    assert isinstance(player, AI_Player) and isinstance(player.AI_algo, PVS)
+
+if __name__ == "__main__":
+    test_matches_easyai_negamax()
+    test_takes_win_and_blocks()
+    test_board_restored_after_search()
+    test_pvs_matches_alpha_beta()
+    test_pvs_tactics()
@@ -0,0 +1,90 @@
+"""
+Test script for the parallel root-split search.
+
+This script checks the compact position encoding, that the parallel search
+agrees with the serial Negamax, and that it respects its timeout.
+"""
+
+import gc
+import time
+
+from gomoku import Gomoku, Negamax
+from parallel_search import ParallelNegamax, encode_position, decode_position
+from game_fixtures import setup
+
+def test_position_encoding():
+    """Test that a decoded position is the same game."""
+    print("Testing position encoding...")
+    game = setup(13, [(6, 6), (5, 5), (7, 8)], [(6, 7), (4, 4)], to_move=2)
+    copy = decode_position(encode_position(game))
+    assert copy.board == game.board
+    assert copy.ttentry() == game.ttentry()
+    assert copy.scoring() == game.scoring()
+    assert copy.move_history == game.move_history
+
+def test_matches_serial_search():
+    """Test that the parallel search finds the serial search's score and tactics."""
+    print("Testing the parallel search...")
+    algorithm = ParallelNegamax(depth=3, workers=2)
+    try:
+        game = setup(9, [(4, 4), (3, 3), (5, 4)], [(4, 5), (3, 4)], to_move=2)
+        serial = Negamax(depth=3)
+        serial(game)
+        move = algorithm(game)
+        assert algorithm.result[2] == 3
+        assert abs(algorithm.result[1] - serial.result.score) < 1e-6
+        assert move == algorithm.result[0]
+        assert game.stone_count == 5
+
+        game = setup(9, [(4, 1), (4, 2), (4, 3), (4, 4)], [(0, 0), (8, 8), (0, 8)], to_move=2)
+        assert algorithm(game) in [(4, 0), (4, 5)]
+    finally:
+        algorithm.close()
+
+def test_timeout():
+    """Test that the parallel search returns a legal move within its timeout."""
+    print("Testing the parallel search timeout...")
+    game = setup(15, [(7, 7), (8, 8)], [(7, 8)], to_move=2)
+    algorithm = ParallelNegamax(depth=20, timeout=1, workers=2)
+    try:
+        algorithm.start()
+        start_time = time.time()
+        move = algorithm(game)
+        assert time.time() - start_time < 3
+        assert move in game.possible_moves()
+        assert algorithm.stats['depth'] < 20
+    finally:
+        algorithm.close()
+    assert isinstance(Gomoku(board_size=9, ai_algorithm="parallel").players[1].AI_algo, ParallelNegamax)
+
+def start_game_workers():
+    """Create a game with the parallel search, search once, and return its worker processes."""
+    game = Gomoku(board_size=9, difficulty=1, ai_algorithm="parallel")
+    game.make_move((4, 4))
+    game.current_player = 2
+    game.players[1].AI_algo(game)
+    return game, list(game.players[1].AI_algo.executor._processes.values())
+
+def test_workers_follow_the_game():
+    """Test that a game's workers stop on close() and when the game is garbage collected."""
+    print("Testing the parallel search's workers and the game's lifetime...")
+    game, processes = start_game_workers()
+    assert processes and all(process.is_alive() for process in processes)
+    game.close()
+    assert game.players[1].AI_algo.executor is None
+    assert not any(process.is_alive() for process in processes)
+    game.close()  # Closing again does nothing
+
+    # Never closed: dropping the game shuts the workers down
+    game, processes = start_game_workers()
+    del game
+    gc.collect()
+    for process in processes:
+        process.join(10)
+    assert not any(process.is_alive() for process in processes)
+
+if __name__ == "__main__":
+    test_position_encoding()
+    test_matches_serial_search()
+    test_timeout()
+    test_workers_follow_the_game()
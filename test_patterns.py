@@ -0,0 +1,89 @@
+"""
+Test script for the pattern lookup tables.
+
+This script checks the pattern classes of hand-made lines and boards, that
+each run of stones is counted once, and that the window table reproduces
+the counting evaluation of a 5-cell line.
+"""
+
+import itertools
+
+from gomoku import Gomoku, LINE_SCORES, Negamax
+from patterns import (PATTERN_CLASSES, CLASS_NAMES, NONE, CLOSED_TWO, OPEN_TWO, CLOSED_THREE, OPEN_THREE,
+                      CLOSED_FOUR, OPEN_FOUR, FIVE, WALL, board_lines, count_patterns, evaluate_patterns,
+                      pattern_scoring, build_window_tables)
+from game_fixtures import setup
+
+def pack(cells):
+    """Pack six cells into a pattern code."""
+    code = 0
+    for value in cells:
+        code = (code << 2) | value
+    return code
+
+def test_pattern_classes():
+    """Test the class of hand-made 6-cell codes."""
+    print("Testing pattern classes...")
+    cases = [
+        ((0, 1, 1, 1, 1, 1), FIVE),
+        ((WALL, 1, 1, 1, 1, 1), FIVE),
+        ((0, 1, 1, 1, 1, 0), OPEN_FOUR),
+        ((2, 1, 1, 1, 1, 0), CLOSED_FOUR),
+        ((0, 1, 1, 1, 1, WALL), CLOSED_FOUR),
+        ((2, 1, 1, 1, 1, 2), NONE),
+        ((0, 1, 1, 1, 0, 2), OPEN_THREE),
+        ((WALL, 1, 1, 1, 0, 0), CLOSED_THREE),
+        ((0, 1, 1, 0, 1, 1), OPEN_TWO),
+        ((2, 1, 1, 0, 0, 0), CLOSED_TWO),
+        ((0, 1, 0, 0, 0, 0), NONE),
+        ((1, 1, 1, 1, 0, 0), NONE),  # Not the start of the run
+    ]
+    for cells, expected in cases:
+        assert PATTERN_CLASSES[1][pack(cells)] == expected, (cells, CLASS_NAMES[expected])
+        # The same shape in the other colour
+        swapped = tuple({1: 2, 2: 1}.get(value, value) for value in cells)
+        assert PATTERN_CLASSES[2][pack(swapped)] == expected
+
+def test_board_patterns():
+    """Test that runs on a board are classified once each, edges counting as blocked."""
+    print("Testing board patterns...")
+    lines = board_lines(15)
+    assert len(lines) == 15 + 15 + 2 * 21
+    assert sorted(len(line) for line in lines)[:2] == [5, 5]
+
+    game = setup(15, [(7, 5), (7, 6), (7, 7), (7, 8), (0, 0), (1, 1), (2, 2)], [(7, 4), (10, 10)])
+    counts = count_patterns(game, 1)
+    assert counts['closed four'] == 1
+    assert counts['closed three'] == 1  # The diagonal from the corner
+    assert sum(counts.values()) == 2
+    assert sum(count_patterns(game, 2).values()) == 0
+
+    game = setup(15, [(3, 3), (4, 4), (5, 5), (6, 6)], [(2, 2), (0, 14), (1, 13)])
+    assert count_patterns(game, 1)['closed four'] == 1
+    assert count_patterns(game, 2)['closed two'] == 1  # The anti-diagonal at the edge
+
+    # Open shapes score more than closed ones
+    open_three = setup(15, [(7, 6), (7, 7), (7, 8)], [(0, 0)])
+    closed_three = setup(15, [(7, 6), (7, 7), (7, 8)], [(7, 5)])
+    assert evaluate_patterns(open_three, 1) > evaluate_patterns(closed_three, 1)
+    assert evaluate_patterns(open_three, 2) == -evaluate_patterns(open_three, 1)
+    assert pattern_scoring(setup(15, [(7, 4), (7, 5), (7, 6), (7, 7), (7, 8)], [], to_move=2)) == -10000
+    assert Negamax(depth=2, scoring=pattern_scoring)(open_three) in open_three.candidate_moves()
+
+def test_window_tables():
+    """Test that the window table reproduces the counting evaluation of every 5-cell line."""
+    print("Testing window tables...")
+    tables = build_window_tables(LINE_SCORES)
+    game = Gomoku(board_size=9)
+    for line in itertools.product(range(3), repeat=5):
+        code = sum(value * 3 ** k for k, value in enumerate(line))
+        for player in (1, 2):
+            mine, theirs = line.count(player), line.count(3 - player)
+            expected = LINE_SCORES[mine] if not theirs else -LINE_SCORES[theirs] if not mine else 0
+            assert tables[player][code] == expected
+            assert game._evaluate_line(list(line), player) == expected
+
+if __name__ == "__main__":
+    test_pattern_classes()
+    test_board_patterns()
+    test_window_tables()
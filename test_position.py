@@ -0,0 +1,69 @@
+"""
+Test script for the compact position class.
+
+This script checks that positions carry no per-instance dictionary, that
+the search engines work on a bare position, and that games only create
+their default players (and transposition table) when asked for them.
+"""
+
+from gomoku import Gomoku, Negamax, Human_Player, AI_Player
+from position import Position
+from parallel_search import encode_position, decode_position
+from threat_search import ThreatSearch
+from game_fixtures import setup
+
+def test_slots():
+    """Test that a position has no __dict__ and stores its counts as bytes."""
+    print("Testing position slots...")
+    position = setup(15, [(7, 7), (7, 8)], [(8, 8)], to_move=2, game_class=Position)
+    assert not hasattr(position, '__dict__')
+    try:
+        position.players = []
+        assert False, "A position has no players"
+    except AttributeError:
+        pass
+    assert isinstance(position.window_counts[1], bytearray)
+    assert isinstance(position.near_counts, bytearray)
+    assert max(position.window_counts[1]) == 2
+
+    # The same stones give the same state as a game
+    game = Gomoku(board_size=15)
+    for move in [(7, 7), (8, 8), (7, 8)]:
+        game.make_move(move)
+        game.switch_player()
+    assert position.ttentry() == game.ttentry()
+    assert position.scoring() == game.scoring()
+    assert position.candidate_moves() == game.candidate_moves()
+    assert decode_position(encode_position(game)).ttentry() == game.ttentry()
+
+def test_engines_on_position():
+    """Test that the engines search a bare position and leave it unchanged."""
+    print("Testing engines on a position...")
+    position = setup(15, [(7, 4), (7, 5), (7, 6)], [(0, 0), (14, 14)], game_class=Position)
+    position.verify_restore = True
+    entry = position.ttentry()
+    assert Negamax(depth=2)(position) in [(7, 3), (7, 7)]
+    assert ThreatSearch().solve(position) is not None
+    assert position.ttentry() == entry and position.current_player == 1
+    position.unmake_move((7, 6))
+    assert position.current_player == 1 and position.stone_count == 4
+
+def test_lazy_players():
+    """Test that a game creates its default players on first use."""
+    print("Testing lazy players...")
+    game = Gomoku(board_size=9, difficulty=2, ai_algorithm="pvs")
+    assert game._players is None
+    players = game.players
+    assert isinstance(players[0], Human_Player) and isinstance(players[1], AI_Player)
+    assert players[1].AI_algo.depth == 2 and game.players is players
+
+    humans = [Human_Player(), Human_Player()]
+    game = Gomoku(board_size=9, players=humans)
+    assert game.players is humans
+    game.players = None
+    assert isinstance(game.players[1], AI_Player)
+
+if __name__ == "__main__":
+    test_slots()
+    test_engines_on_position()
+    test_lazy_players()
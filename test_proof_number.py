@@ -0,0 +1,96 @@
+"""
+Test script for the proof-number search.
+
+This script checks that forced wins are proven with a line that replays to a
+five, that lost attacks are disproven, that a tiny node table still works,
+and that the search plays as an AI backend.
+"""
+
+from gomoku import Gomoku, AI_Player
+from proof_number import ProofNumberSearch, ProofTable, PROVED, DISPROVED, INFINITY
+from game_fixtures import setup, play, replay_wins
+
+# Player 1 to move wins by continuous fours (and with a double four at (7, 10))
+WIN_MOVES = [(7, 7), (4, 10), (11, 4), (10, 10), (7, 6), (10, 7), (5, 10), (9, 8), (5, 7), (5, 5), (4, 7),
+             (11, 5), (6, 9), (6, 8), (11, 10), (11, 11), (5, 8), (11, 6)]
+
+def test_proves_win():
+    """Test that a forced win is proven and its line replays to a five."""
+    print("Testing proofs...")
+    for threats_only in (False, True):
+        game = play(15, WIN_MOVES)
+        entry = game.ttentry()
+        result = ProofNumberSearch(timeout=None, threats_only=threats_only).solve(game)
+        assert result['status'] == PROVED
+        assert result['proof'] == 0 and result['disproof'] == INFINITY
+        assert result['nodes'] > 0 and result['nps'] >= 0
+        assert game.ttentry() == entry and game.current_player == 1
+        assert replay_wins(game, result['line'])
+
+def test_disproves_blocked_attack():
+    """Test that an attack with no threats left is disproven."""
+    print("Testing disproofs...")
+    # Player 1 must block the four at (3, 7), after which nothing is forcing
+    game = Gomoku(board_size=15)
+    for player, stones in ((1, [(7, 7), (7, 8), (3, 2)]), (2, [(3, 3), (3, 4), (3, 5), (3, 6), (10, 10)])):
+        game.current_player = player
+        for move in stones:
+            game.make_move(move)
+    game.current_player = 1
+    result = ProofNumberSearch(timeout=None, threats_only=True).solve(game)
+    assert result['status'] == DISPROVED and result['disproof'] == 0
+
+def test_reused_for_both_sides():
+    """Test that a solver kept across solves does not take one attacker's numbers for the other's."""
+    print("Testing a solver reused for both sides...")
+    search = ProofNumberSearch(timeout=None, threats_only=True)
+    black = [(0, 0), (0, 14), (14, 0)]
+    game = setup(15, black, [(7, 7), (7, 8), (7, 9)], to_move=1)
+    assert search.solve(game)['status'] == DISPROVED
+    # The same cells, now with player 2 attacking: still no forced win
+    game = setup(15, black, [(7, 7), (7, 8)], to_move=2)
+    result = search.solve(game)
+    fresh = ProofNumberSearch(timeout=None, threats_only=True).solve(game)
+    assert result['status'] == fresh['status'] == DISPROVED and result['line'] is None
+
+    # Entries found with threats only are not reused by a full solve
+    game = play(15, WIN_MOVES)
+    search.solve(game)
+    search.threats_only = False
+    result = search.solve(game)
+    assert result['status'] == PROVED and replay_wins(game, result['line'])
+
+def test_tiny_table():
+    """Test that the search still proves the win when the node table overflows."""
+    print("Testing a tiny node table...")
+    table = ProofTable(entries=16)
+    game = play(15, WIN_MOVES)
+    result = ProofNumberSearch(table=table, timeout=None, threats_only=True).solve(game)
+    assert result['status'] == PROVED
+    assert len(table) <= table.capacity == 16
+    assert table.memory_bytes() == 16 * 24
+
+def test_ai_backend():
+    """Test the search as an AI: proven wins are played, otherwise the fallback moves."""
+    print("Testing the AI backend...")
+    game = play(15, WIN_MOVES)
+    search = ProofNumberSearch(timeout=None, threats_only=True)
+    assert AI_Player(search, threat_search=False).ask_move(game) == search.result['line'][0]
+
+    calls = []
+    def fallback(game):
+        calls.append(game)
+        return (0, 0)
+    game = play(15, [(7, 7), (8, 8)])
+    assert ProofNumberSearch(max_nodes=50, threats_only=True, fallback=fallback)(game) == (0, 0)
+    assert calls
+
+    player = Gomoku(board_size=9, ai_algorithm="pns").players[1]
+    assert isinstance(player.AI_algo, ProofNumberSearch)
+
+if __name__ == "__main__":
+    test_proves_win()
+    test_disproves_blocked_attack()
+    test_reused_for_both_sides()
+    test_tiny_table()
+    test_ai_backend()
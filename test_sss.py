@@ -4,9 +4,10 @@ Test script for the SSS* algorithm.
 This script tests the SSS* algorithm implementation for the Gomoku game.
 """
 
-from gomoku import Gomoku, Human_Player, AI_Player
+from gomoku import Gomoku, Human_Player, AI_Player, Negamax, SSS_AI_Player
 from sss_algorithm import SSS
 from easyAI import TranspositionTable
+from game_fixtures import setup
 
 def test_sss():
     """Test the SSS* algorithm."""
@@ -28,6 +29,9 @@ def test_sss():
     # Make a few moves
     moves = [(4, 4), (3, 3), (5, 5), (2, 2), (6, 6)]
     for move in moves:
+        if game.board[move[0]][move[1]]:
+            # The AI already took this cell
+            continue
         print(f"Human move: {move}")
         game.make_move(move)
         game.current_player = 3 - game.current_player
@@ -54,5 +58,39 @@ def test_sss():
         else:
             print("It's a draw!")
 
+def test_mtdf_matches_alpha_beta():
+    """Test that MTD(f) converges to the alpha-beta value from any first guess."""
+    print("Testing MTD(f) against alpha-beta...")
+    game = setup(9, [(4, 4), (3, 3), (5, 4)], [(4, 5), (3, 4)], to_move=2)
+    for depth in (1, 2, 3):
+        reference = Negamax(depth)
+        reference.tt = None
+        expected, _ = reference.search(game, depth, -reference.win_score, reference.win_score)
+        for guess in (0, expected, -5000, 5000):
+            sss = SSS(depth=depth)
+            sss.start_search()
+            score, move = sss.mtdf(game, depth, guess)
+            assert abs(score - expected) < 1e-6
+            assert move in game.possible_moves()
+
+def test_sss_uses_make_unmake():
+    """Test that SSS* never copies the game and leaves it as it found it."""
+    print("Testing SSS* make/unmake...")
+    game = setup(9, [(0, 0), (8, 8), (0, 8)], [(4, 1), (4, 2), (4, 3), (4, 4)], to_move=2)
+    def no_copy():
+        raise AssertionError("SSS* copied the game")
+    game.copy = no_copy
+    entry = game.ttentry()
+    assert SSS(depth=3)(game) in [(4, 0), (4, 5)]
+    assert game.ttentry() == entry and game.current_player == 2
+
+    game = setup(9, [(4, 1), (4, 2), (4, 3), (4, 4)], [(0, 0), (8, 8), (0, 8)], to_move=2)
+    assert SSS(depth=3)(game) in [(4, 0), (4, 5)]
+
+    player = Gomoku(board_size=9, ai_algorithm="sss").players[1]
+    assert isinstance(player, SSS_AI_Player) and isinstance(player.SSS_algo, SSS)
+
 if __name__ == "__main__":
     test_sss()
+    test_mtdf_matches_alpha_beta()
+    test_sss_uses_make_unmake()
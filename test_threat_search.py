@@ -0,0 +1,75 @@
+"""
+Test script for the threat-space search.
+
+This script checks that forced wins by continuous fours and threats are found
+and replay to a five, that quiet positions report no win, and that the AI
+player plays a forced win without running its main search.
+"""
+
+import time
+
+from gomoku import Gomoku, Negamax, AI_Player, SSS_AI_Player
+from sss_algorithm import SSS
+from threat_search import ThreatSearch
+from game_fixtures import setup, play, replay_wins
+
+# Player 1 to move has a 19-ply win by continuous fours
+VCF_MOVES = [(7, 7), (4, 10), (11, 4), (10, 10), (7, 6), (10, 7), (5, 10), (9, 8), (5, 7), (5, 5), (4, 7),
+             (11, 5), (6, 9), (6, 8), (11, 10), (11, 11), (5, 8), (11, 6)]
+
+def test_finds_vcf():
+    """Test that a long VCF is found quickly and replays to a five."""
+    print("Testing VCF...")
+    game = play(15, VCF_MOVES)
+    entry = game.ttentry()
+    search = ThreatSearch(max_threats=0, timeout=None)
+    start_time = time.time()
+    line = search.solve(game)
+    assert time.time() - start_time < 2
+    assert line is not None and len(line) >= 15
+    assert game.ttentry() == entry and game.current_player == 1
+    assert replay_wins(game, line)
+
+def test_finds_vct():
+    """Test that a win through open threes is found when there is no VCF."""
+    print("Testing VCT...")
+    # Player 1 wins with a double three at (5, 6)
+    game = play(15, [(6, 6), (10, 10), (7, 6), (10, 8), (10, 5), (9, 4), (4, 5), (8, 8), (6, 7), (4, 8)])
+    assert ThreatSearch(max_threats=0, timeout=None).solve(game) is None
+    line = ThreatSearch(max_threats=3, timeout=None).solve(game)
+    assert line is not None
+    assert replay_wins(game, line)
+
+def test_no_false_wins():
+    """Test that positions without a forced win report none."""
+    print("Testing quiet positions...")
+    game = setup(15, [(7, 7), (7, 8)], [(8, 8), (6, 6)])
+    assert ThreatSearch(timeout=None)(game) is None
+
+    # The opponent's four must be blocked, which here leaves no attack
+    game = setup(15, [(7, 7), (7, 8), (3, 2)], [(3, 3), (3, 4), (3, 5), (3, 6), (10, 10)])
+    assert ThreatSearch(timeout=None)(game) is None
+
+def test_ai_player_plays_forced_win():
+    """Test that the AI player plays the forced win found before the main search."""
+    print("Testing the AI player...")
+    game = play(15, VCF_MOVES)
+    line = ThreatSearch(max_threats=0, timeout=None).solve(game)
+    player = AI_Player(Negamax(depth=1), threat_search=ThreatSearch(timeout=None))
+    assert player.ask_move(game) == line[0]
+    assert player.threat_search.line == line
+    assert AI_Player(Negamax(depth=1), threat_search=False).threat_search is None
+
+    # The SSS* player looks for the forced win first too
+    game.verify_restore = True
+    player = SSS_AI_Player(SSS(depth=1), threat_search=ThreatSearch(timeout=None))
+    assert player.ask_move(game) == line[0]
+    assert player.threat_search.line == line
+    assert SSS_AI_Player(SSS(depth=1), threat_search=False).threat_search is None
+    assert isinstance(Gomoku(board_size=9, ai_algorithm="sss").players[1].threat_search, ThreatSearch)
+
+if __name__ == "__main__":
+    test_finds_vcf()
+    test_finds_vct()
+    test_no_false_wins()
+    test_ai_player_plays_forced_win()
@@ -0,0 +1,80 @@
+"""
+Test script for the bounded transposition table.
+
+This script checks the store/lookup round trip, the bucket replacement policy
+and that Negamax works the same with a tiny table.
+"""
+
+from gomoku import Gomoku, Negamax
+from transposition_table import BoundedTranspositionTable, LOWERBOUND, EXACT, UPPERBOUND
+
+class Position:
+    """A stand-in game whose transposition key is fixed."""
+
+    def __init__(self, key):
+        self.key = key
+
+    def ttentry(self):
+        return self.key
+
+def test_store_and_lookup():
+    """Test that stored entries come back unchanged."""
+    print("Testing store/lookup...")
+    table = BoundedTranspositionTable(entries=1024)
+    assert table.lookup(Position(7)) is None
+    table.store(game=Position(7), depth=3, value=-12.5, move=(4, 11), flag=LOWERBOUND)
+    assert table.lookup(Position(7)) == {'depth': 3, 'value': -12.5, 'flag': LOWERBOUND, 'move': (4, 11)}
+    table.store(game=Position(7), depth=1, value=2.0, move=(0, 0), flag=UPPERBOUND)
+    assert table.lookup(Position(7))['flag'] == UPPERBOUND
+    assert len(table) == 1
+    assert table.hit_rate() == 2 / 3
+
+def test_capacity_is_bounded():
+    """Test that the table never grows beyond its capacity."""
+    print("Testing capacity...")
+    table = BoundedTranspositionTable(entries=64)
+    assert table.capacity <= 64
+    for key in range(10000):
+        table.store(game=Position(key * 0x9E3779B97F4A7C15), depth=key % 5, value=0.0, flag=EXACT)
+    assert len(table) == table.capacity
+    assert table.fill_ratio() == 1.0
+    assert table.collisions > 0
+    assert table.memory_bytes() == table.capacity * 23
+
+def test_replacement_policy():
+    """Test the depth-preferred and always-replace slots of a bucket."""
+    print("Testing replacement policy...")
+    table = BoundedTranspositionTable(entries=2)  # A single bucket
+    deep, shallow, other, newer = Position(1), Position(2), Position(3), Position(4)
+    table.store(game=deep, depth=6, value=1.0)
+    table.store(game=shallow, depth=1, value=2.0)
+    table.store(game=other, depth=2, value=3.0)
+    assert table.lookup(deep) is not None  # Kept by the depth-preferred slot
+    assert table.lookup(shallow) is None   # Replaced in the always-replace slot
+    assert table.lookup(other) is not None
+
+    # After a new search the old deep entry no longer blocks slot 0; it is demoted
+    table.new_search()
+    table.store(game=newer, depth=1, value=4.0)
+    assert table.lookup(newer) is not None
+    assert table.lookup(deep) is not None
+    assert table.lookup(other) is None
+
+def test_negamax_with_tiny_table():
+    """Test that Negamax still finds the winning plan with a heavily contended table."""
+    print("Testing Negamax with a tiny table...")
+    game = Gomoku(board_size=9)
+    for col in range(2, 5):
+        game.make_move((4, col))
+    game.current_player = 2
+    game.make_move((0, 0))
+    game.current_player = 1
+    table = BoundedTranspositionTable(entries=8)
+    assert Negamax(depth=3, tt=table)(game) in [(4, 1), (4, 5)]
+    assert table.report()['collisions'] > 0
+
+if __name__ == "__main__":
+    test_store_and_lookup()
+    test_capacity_is_bounded()
+    test_replacement_policy()
+    test_negamax_with_tiny_table()
@@ -0,0 +1,238 @@
+"""
+Threat-space search for the Gomoku AI.
+
+Gomoku is mostly decided by forcing sequences, which a fixed-depth search
+only sees when they fit inside its horizon. A threat-space search looks at
+nothing but threats, so it reads a forced win many moves deep in the time a
+full-width search needs for a few plies:
+
+- VCF (victory by continuous fours): every attacking move makes a *four*
+  (a window holding four of the attacker's stones and an empty cell), so
+  the defender's reply is forced.
+- VCT (victory by continuous threats): attacking moves may also threaten to
+  make an open four on the next move; the defender may then answer anywhere
+  in the windows holding three attacking stones, or with a four of their own.
+
+Both are read from the game's incremental window counts, on a single game
+instance with ``make_move``/``unmake_move``. A win is only reported when
+every defence has been refuted, so the search never claims a win that is
+not there; it may miss wins that need quiet attacking moves.
+"""
+
+import time
+
+from move_ordering import cell_window_bases
+
+
+class ThreatSearch:
+    """Searches for a forced win by continuous fours (VCF) and threats (VCT)."""
+
+    def __init__(self, max_fours=12, max_threats=4, timeout=0.2):
+        """Initialize the threat-space search.
+
+        Args:
+            max_fours: The maximum number of attacking moves of a VCF.
+            max_threats: The maximum number of attacking moves of a VCT
+                (0 searches fours only).
+            timeout: The maximum time (in seconds) to spend on a move.
+        """
+        self.max_fours = max_fours
+        self.max_threats = max_threats
+        self.timeout = timeout
+        self.start_time = None
+        self.timed_out = False
+        self.line = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the per-search statistics."""
+        self.stats = {'nodes': 0}
+
+    def is_timeout(self):
+        """Check if the timeout has been reached."""
+        if self.timeout is None:
+            return False
+        return time.time() - self.start_time > self.timeout
+
+    def __call__(self, game):
+        """Return the first move of a forced win for the player to move, or None.
+
+        The winning line (attacking moves and forced replies) is kept in
+        ``self.line``.
+        """
+        line = self.solve(game)
+        return line[0] if line else None
+
+    def solve(self, game):
+        """Search for a VCF, then for a VCT of increasing length.
+
+        Args:
+            game: The game instance (restored before returning).
+
+        Returns:
+            list: The winning line as (row, col) moves, or None.
+        """
+        self.start_time = time.time()
+        self.timed_out = False
+        self.reset_stats()
+        self.line = None
+        self.proven = {}  # (position key, depth, threes) -> winning line or None
+        with game.unchanged():
+            self.line = self.attack(game, self.max_fours, False)
+            for depth in range(2, self.max_threats + 1):
+                if self.line is not None or self.timed_out:
+                    break
+                self.line = self.attack(game, depth, True)
+        return self.line
+
+    def attack(self, game, depth, threes):
+        """Search an attacking (OR) node: the player to move tries to win.
+
+        Args:
+            game: The game instance.
+            depth: The number of attacking moves left.
+            threes: Allow open-three threats as well as fours (VCT).
+
+        Returns:
+            list: The winning line from this position, or None.
+        """
+        attacker = game.current_player
+        fives = five_cells(game, attacker)
+        if fives:
+            return [divmod(min(fives), game.board_size)]
+        if depth <= 0 or self.timed_out:
+            return None
+        if self.is_timeout():
+            self.timed_out = True
+            return None
+        key = (game.ttentry(), depth, threes)
+        if key in self.proven:
+            return self.proven[key]
+        self.stats['nodes'] += 1
+
+        blocks = five_cells(game, 3 - attacker)
+        if len(blocks) > 1:
+            moves = []  # Two fives cannot both be blocked
+        elif blocks:
+            moves = list(blocks)  # The defender's four must be blocked first
+        else:
+            moves = threat_moves(game, attacker, threes)
+
+        line = None
+        size = game.board_size
+        for cell in moves:
+            move = divmod(cell, size)
+            game.make_move(move)
+            game.switch_player()
+            rest = self.defend(game, depth - 1, threes)
+            game.unmake_move(move)
+            if rest is not None:
+                line = [move] + rest
+                break
+        if not self.timed_out:
+            self.proven[key] = line
+        return line
+
+    def defend(self, game, depth, threes):
+        """Search a defending (AND) node: every reply must lose.
+
+        Args:
+            game: The game instance.
+            depth: The number of attacking moves left.
+            threes: Allow open-three threats as well as fours (VCT).
+
+        Returns:
+            list: The winning line (starting with the defender's first
+            reply) if every defence loses, or None.
+        """
+        defender = game.current_player
+        attacker = 3 - defender
+        if five_cells(game, defender):
+            return None  # The defender wins first
+        fives = five_cells(game, attacker)
+        if fives:
+            replies = fives
+        elif threes and open_four_threat(game, attacker):
+            # Only a stone in a window holding three attacking stones (or a
+            # counter-four) can stop the open four
+            replies = window_cells_with(game, attacker, 3) | four_moves(game, defender)
+        else:
+            return None  # No threat: the defender gets a free move
+
+        line = None
+        size = game.board_size
+        for cell in sorted(replies):
+            move = divmod(cell, size)
+            game.make_move(move)
+            game.switch_player()
+            rest = self.attack(game, depth, threes)
+            game.unmake_move(move)
+            if rest is None:
+                return None
+            if line is None:
+                line = [move] + rest
+        return line
+
+
+def window_cells_with(game, player, count):
+    """Return the empty cells of the windows holding ``count`` of the player's stones and none of the opponent's."""
+    own = game.window_counts[player]
+    other = game.window_counts[3 - player]
+    window_cells = game.window_cells
+    size = game.board_size
+    board = game.board
+    cells = set()
+    for w, stones in enumerate(own):
+        if stones == count and not other[w]:
+            for cell in window_cells[w]:
+                if not board[cell // size][cell % size]:
+                    cells.add(cell)
+    return cells
+
+
+def five_cells(game, player):
+    """Return the empty cells where the player would complete a five."""
+    return window_cells_with(game, player, 4)
+
+
+def four_moves(game, player):
+    """Return the empty cells where the player would make a four."""
+    return window_cells_with(game, player, 3)
+
+
+def open_four_threat(game, player):
+    """Can the player make two fives at once (an open four or a double four) next move?"""
+    own = game.window_counts[player]
+    other = game.window_counts[3 - player]
+    size = game.board_size
+    board = game.board
+    fives = {}  # cell -> the cells that would then complete a five
+    for w, stones in enumerate(own):
+        if stones == 3 and not other[w]:
+            empty = [cell for cell in game.window_cells[w] if not board[cell // size][cell % size]]
+            first, second = empty
+            fives.setdefault(first, set()).add(second)
+            fives.setdefault(second, set()).add(first)
+    return any(len(cells) > 1 for cells in fives.values())
+
+
+def threat_moves(game, player, threes):
+    """Return the player's threat moves, fours first.
+
+    A three is only returned if it adds a stone to at least two windows of
+    the same direction, the shape that can become an open four.
+    """
+    fours = four_moves(game, player)
+    moves = sorted(fours)
+    if threes:
+        own = game.window_counts[player]
+        other = game.window_counts[3 - player]
+        bases = cell_window_bases(game)
+        for cell in sorted(window_cells_with(game, player, 2) - fours):
+            directions = [0, 0, 0, 0]
+            for w, base in bases[cell]:
+                if own[w] == 2 and not other[w]:
+                    directions[base // 36] += 1
+            if max(directions) >= 2:
+                moves.append(cell)
+    return moves
@@ -0,0 +1,330 @@
+"""
+Bounded transposition table for the Gomoku search engines.
+
+easyAI's ``TranspositionTable`` is a dictionary that grows for as long as the
+game object lives. This module provides a fixed-capacity table with the same
+``lookup``/``store`` interface, backed by compact ``array`` columns instead of
+one dictionary per entry, so its memory use is known up front.
+
+``SharedTranspositionTable`` keeps the same columns in one
+``multiprocessing.shared_memory`` block, so several processes can probe and
+fill a single table.
+
+The table is split into buckets of two slots:
+
+- slot 0 is *depth-preferred*: it keeps the deepest result seen for the
+  bucket, unless that result is from an older search (see ``new_search``);
+- slot 1 is *always-replace*: it takes every store that slot 0 refuses.
+"""
+
+from array import array
+from multiprocessing import shared_memory, resource_tracker
+
+# Bound types stored in the flag column (shared with easyAI's negamax)
+from easyAI.AI.Negamax import LOWERBOUND, EXACT, UPPERBOUND
+
+KEY_MASK = (1 << 64) - 1
+NO_MOVE = -1
+
+# Bytes per slot: key (8) + value (8) + move (4) + depth, flag, age (1 each)
+ENTRY_BYTES = 23
+
+DEFAULT_SIZE_MB = 4
+
+
+def table_capacity(size_mb=DEFAULT_SIZE_MB, entries=None):
+    """Return the number of slots for a memory budget (or a maximum number of entries).
+
+    The capacity is rounded down to a power-of-two number of two-slot buckets.
+    """
+    if entries is None:
+        entries = int(size_mb * 1024 * 1024) // ENTRY_BYTES
+    buckets = 1
+    while buckets * 4 <= entries:
+        buckets *= 2
+    return 2 * buckets
+
+
+class BoundedTranspositionTable:
+    """A fixed-size transposition table with depth-preferred/always-replace buckets."""
+
+    def __init__(self, size_mb=DEFAULT_SIZE_MB, entries=None):
+        """Initialize the table.
+
+        Args:
+            size_mb: The memory budget in megabytes (ignored if ``entries`` is given).
+            entries: The maximum number of entries.
+
+        The capacity is rounded down to a power-of-two number of buckets.
+        """
+        self.capacity = table_capacity(size_mb, entries)
+        self.bucket_mask = self.capacity // 2 - 1
+
+        self.keys = array('Q', [0]) * self.capacity
+        self.values = array('d', [0.0]) * self.capacity
+        self.moves = array('i', [NO_MOVE]) * self.capacity
+        self.depths = array('b', [-1]) * self.capacity  # -1 marks an empty slot
+        self.flags = array('b', [EXACT]) * self.capacity
+        self.ages = array('B', [0]) * self.capacity
+        self.age = 0
+        self.filled = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the probe/hit/store/collision counters."""
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.collisions = 0
+
+    def clear(self):
+        """Empty the table."""
+        self.depths = array('b', [-1]) * self.capacity
+        self.filled = 0
+        self.reset_stats()
+
+    def new_search(self):
+        """Start a new search: older entries become preferred for replacement.
+
+        Entries are kept (they may still be useful), but a depth-preferred
+        slot holding an entry from an earlier search no longer resists being
+        overwritten by a shallower result.
+        """
+        self.age = (self.age + 1) & 0xFF
+
+    @staticmethod
+    def _key(game):
+        """Return the 64-bit key of a game position."""
+        entry = game.ttentry()
+        if not isinstance(entry, int):
+            entry = hash(entry)
+        return entry & KEY_MASK
+
+    def lookup(self, game):
+        """Requests the entry in the table. Returns None if the entry has not
+        been previously stored in the table."""
+        self.probes += 1
+        key = self._key(game)
+        slot = 2 * (key & self.bucket_mask)
+        for index in (slot, slot + 1):
+            if self.keys[index] == key and self.depths[index] >= 0:
+                self.hits += 1
+                move = self.moves[index]
+                return {
+                    'depth': self.depths[index],
+                    'value': self.values[index],
+                    'flag': self.flags[index],
+                    'move': divmod(move, 256) if move != NO_MOVE else None,
+                }
+        return None
+
+    def __call__(self, game):
+        """Return the stored move for a position (easyAI-style AI usage)."""
+        entry = self.lookup(game)
+        if entry is None:
+            raise KeyError("Position not in the transposition table")
+        return entry['move']
+
+    def store(self, game, depth, value, move=None, flag=EXACT):
+        """Stores an entry into the table."""
+        self.stores += 1
+        key = self._key(game)
+        slot = 2 * (key & self.bucket_mask)
+        depths, keys = self.depths, self.keys
+        if depths[slot] < 0 or keys[slot] == key or self.ages[slot] != self.age or depth >= depths[slot]:
+            if depths[slot] >= 0 and keys[slot] != key:
+                # Demote the previous depth-preferred entry to the always-replace slot
+                self._occupy(slot + 1, keys[slot])
+                for column in (keys, depths, self.values, self.moves, self.flags, self.ages):
+                    column[slot + 1] = column[slot]
+            else:
+                self._occupy(slot, key)
+            index = slot
+        else:
+            index = slot + 1
+            self._occupy(index, key)
+        keys[index] = key
+        depths[index] = min(depth, 127)
+        self.values[index] = value
+        self.moves[index] = NO_MOVE if move is None else move[0] * 256 + move[1]
+        self.flags[index] = flag
+        self.ages[index] = self.age
+
+    def _occupy(self, index, key):
+        """Update the fill and collision counters before ``key`` is written to a slot."""
+        if self.depths[index] < 0:
+            self.filled += 1
+        elif self.keys[index] != key:
+            # A different position is evicted
+            self.collisions += 1
+
+    def __len__(self):
+        """Return the number of filled slots."""
+        return self.filled
+
+    def memory_bytes(self):
+        """Return the memory used by the table's columns, in bytes."""
+        return self.capacity * ENTRY_BYTES
+
+    def hit_rate(self):
+        """Return the fraction of lookups that found an entry."""
+        return self.hits / self.probes if self.probes else 0.0
+
+    def fill_ratio(self):
+        """Return the fraction of slots in use."""
+        return self.filled / self.capacity
+
+    def report(self):
+        """Return the table statistics as a dictionary."""
+        return {
+            'capacity': self.capacity,
+            'memory_mb': self.memory_bytes() / (1024 * 1024),
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': self.hit_rate(),
+            'stores': self.stores,
+            'fill_ratio': self.fill_ratio(),
+            'collisions': self.collisions,
+        }
+
+
+class SharedTranspositionTable(BoundedTranspositionTable):
+    """A ``BoundedTranspositionTable`` whose columns live in shared memory.
+
+    Processes share the table by pickling it (for example as an argument of
+    a pool initializer): the copy attaches to the same memory block by name.
+    There is no lock. A writer first marks the slot empty, then writes the
+    entry and finally its depth; a reader checks the key and depth again
+    after reading the entry and treats a slot that changed underneath it as
+    a miss (counted in ``torn_reads``).
+    """
+
+    def __init__(self, size_mb=DEFAULT_SIZE_MB, entries=None, name=None, capacity=None):
+        """Create a shared table, or attach to an existing one.
+
+        Args:
+            size_mb: The memory budget in megabytes (ignored if ``entries`` is given).
+            entries: The maximum number of entries.
+            name: The name of an existing shared memory block to attach to.
+            capacity: The capacity of the existing table (with ``name``).
+        """
+        self.capacity = capacity if name is not None else table_capacity(size_mb, entries)
+        self.bucket_mask = self.capacity // 2 - 1
+        self.age = 0
+        self.filled = 0
+        self.reset_stats()
+        self.owner = name is None
+        if self.owner:
+            self.memory = shared_memory.SharedMemory(create=True, size=self.capacity * ENTRY_BYTES)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+            # Only the creator frees the block; without this the resource
+            # tracker would unlink it when an attached process exits
+            resource_tracker.unregister(self.memory._name, 'shared_memory')
+        self._map_columns()
+        if self.owner:
+            self.clear()
+
+    def _map_columns(self):
+        """View the shared block as the six columns, laid out one after the other."""
+        buf = self.memory.buf
+        cap = self.capacity
+        self.keys = buf[0:8 * cap].cast('Q')
+        self.values = buf[8 * cap:16 * cap].cast('d')
+        self.moves = buf[16 * cap:20 * cap].cast('i')
+        self.depths = buf[20 * cap:21 * cap].cast('b')
+        self.flags = buf[21 * cap:22 * cap].cast('b')
+        self.ages = buf[22 * cap:23 * cap].cast('B')
+
+    def __reduce__(self):
+        """Pickle as a handle that attaches to the same memory block."""
+        return (SharedTranspositionTable, (DEFAULT_SIZE_MB, None, self.memory.name, self.capacity))
+
+    def reset_stats(self):
+        """Reset the probe/hit/store/collision/torn read counters."""
+        super().reset_stats()
+        self.torn_reads = 0
+
+    def clear(self):
+        """Empty the table (for every process sharing it)."""
+        depths = self.depths
+        for index in range(self.capacity):
+            depths[index] = -1
+        self.filled = 0
+        self.reset_stats()
+
+    def lookup(self, game):
+        """Requests the entry in the table. Returns None if the entry has not
+        been previously stored in the table."""
+        self.probes += 1
+        key = self._key(game)
+        slot = 2 * (key & self.bucket_mask)
+        keys, depths = self.keys, self.depths
+        for index in (slot, slot + 1):
+            depth = depths[index]
+            if keys[index] == key and depth >= 0:
+                value, move, flag = self.values[index], self.moves[index], self.flags[index]
+                if keys[index] != key or depths[index] != depth:
+                    self.torn_reads += 1  # Overwritten by another process while reading
+                    return None
+                self.hits += 1
+                return {
+                    'depth': depth,
+                    'value': value,
+                    'flag': flag,
+                    'move': divmod(move, 256) if move != NO_MOVE else None,
+                }
+        return None
+
+    def store(self, game, depth, value, move=None, flag=EXACT):
+        """Stores an entry into the table."""
+        self.stores += 1
+        key = self._key(game)
+        slot = 2 * (key & self.bucket_mask)
+        depths, keys = self.depths, self.keys
+        if depths[slot] < 0 or keys[slot] == key or self.ages[slot] != self.age or depth >= depths[slot]:
+            if depths[slot] >= 0 and keys[slot] != key:
+                # Demote the previous depth-preferred entry to the always-replace slot
+                self._occupy(slot + 1, keys[slot])
+                self._write(slot + 1, keys[slot], depths[slot], self.values[slot], self.moves[slot],
+                            self.flags[slot], self.ages[slot])
+            else:
+                self._occupy(slot, key)
+            index = slot
+        else:
+            index = slot + 1
+            self._occupy(index, key)
+        self._write(index, key, min(depth, 127), value, NO_MOVE if move is None else move[0] * 256 + move[1],
+                    flag, self.age)
+
+    def _write(self, index, key, depth, value, move, flag, age):
+        """Write a slot so that concurrent readers never accept a half-written entry."""
+        self.depths[index] = -1
+        self.keys[index] = key
+        self.values[index] = value
+        self.moves[index] = move
+        self.flags[index] = flag
+        self.ages[index] = age
+        self.depths[index] = depth
+
+    def __len__(self):
+        """Return the number of filled slots (counted, since other processes fill it too)."""
+        return sum(1 for depth in self.depths if depth >= 0)
+
+    def fill_ratio(self):
+        """Return the fraction of slots in use."""
+        return len(self) / self.capacity
+
+    def report(self):
+        """Return the table statistics (as seen by this process) as a dictionary."""
+        report = super().report()
+        report['torn_reads'] = self.torn_reads
+        return report
+
+    def close(self):
+        """Detach from the shared block; the creating process also frees it."""
+        for column in (self.keys, self.values, self.moves, self.depths, self.flags, self.ages):
+            column.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()